@@ -0,0 +1,471 @@
+"""
+Benchmark do supervisor de bots (rwds_functions.start_bots) sem navegadores.
+
+Cada slot roda um subprocesso falso (os comandos `node`/`npm` são trocados por
+scripts que reproduzem um log gravado ou um cenário sintético), com linhas de
+erro crítico, pontos, suspensão e travamentos silenciosos. Discord e Google
+Sheets são substituídos por stand-ins locais, então tudo roda offline.
+
+Métricas reportadas por quantidade de slots:
+  - custo de processamento por linha (CPU do supervisor / linhas lidas)
+  - tempo entre um erro crítico e o reinício do bot
+  - latência dos alertas (linha emitida -> webhook local recebeu)
+  - threads e uso de CPU do processo supervisor
+
+Uso:
+    python bench_supervisor.py                          # 5, 20 e 100 slots
+    python bench_supervisor.py --slots 20 --speed 4
+    python bench_supervisor.py --log captured.log --output bench_output.txt
+
+Formato do log gravado: uma linha por saída do bot, opcionalmente prefixada
+com o intervalo em segundos desde a linha anterior e um TAB ("0.25\\t...").
+Linhas "#HANG" (silêncio até ser encerrado) e "#EXIT <código>" são diretivas.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import resource
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_SCENARIO_FILE = "bench_scenario.json"
+BENCH_ATTEMPT_FILE = "bench_attempt"
+DEFAULT_SLOT_COUNTS = (5, 20, 100)
+
+# Atrasos reduzidos para que um benchmark leve segundos, não horas
+BENCH_RESTART_DELAY_SECONDS = 0.5
+BENCH_BACKOFF_BASE_SECONDS = 0.5
+BENCH_INACTIVITY_TIMEOUT_SECONDS = 3
+
+#==============================================================
+# SUBPROCESSO FALSO (executado por `npm run start` dentro do slot)
+
+def replay_child():
+    """Reproduz o cenário do slot atual (cwd) e registra eventos com horário."""
+    with open(BENCH_SCENARIO_FILE) as f:
+        scenario = json.load(f)
+
+    attempt = 1
+    if os.path.exists(BENCH_ATTEMPT_FILE):
+        with open(BENCH_ATTEMPT_FILE) as f:
+            attempt = int(f.read().strip() or 0) + 1
+    with open(BENCH_ATTEMPT_FILE, "w") as f:
+        f.write(str(attempt))
+
+    events_fd = os.open(scenario["events"], os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def record(event, **extra):
+        data = {"slot": scenario["slot"], "attempt": attempt, "event": event, "t": time.time(), **extra}
+        os.write(events_fd, (json.dumps(data) + "\n").encode())
+
+    lines = scenario["lines"] if attempt == 1 else scenario["restart_lines"]
+    speed = scenario["speed"]
+    record("start")
+    out = sys.stdout
+    for delay, text, tag in lines:
+        if delay:
+            time.sleep(delay / speed)
+        if text == "#HANG":
+            record("hang")
+            while True:
+                time.sleep(3600)
+        if text.startswith("#EXIT"):
+            out.flush()
+            record("exit")
+            os._exit(int(text.split()[1]))
+        out.write(text + "\n")
+        out.flush()
+        if tag:
+            record(tag)
+    record("exit")
+
+#==============================================================
+# STAND-INS LOCAIS (Discord e Google Sheets)
+
+class LocalWebhookServer:
+    """Servidor HTTP local que aceita webhooks do Discord e registra o horário de chegada."""
+
+    def __init__(self):
+        self.received = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                try:
+                    content = json.loads(body or b"{}").get("content", "")
+                except ValueError:
+                    content = ""
+                with server._lock:
+                    server.received.append((time.time(), self.path, content))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.received.clear()
+
+
+class LocalSheet:
+    """Stand-in do Google Sheets: guarda as atualizações de pontos em memória."""
+
+    def __init__(self):
+        self.updates = []
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def write_points_batch(self, sheet_name, points_by_email):
+        with self._lock:
+            self.batches += 1
+            for email, points in points_by_email.items():
+                self.updates.append((time.time(), sheet_name, email, points))
+
+#==============================================================
+# CENÁRIOS
+
+def boot_lines(interval):
+    return [
+        [interval, "[PID: 1] [MAIN] Bot started with 1 clusters", None],
+        [interval, "[PID: 1] [BROWSER] Launching chromium", None],
+        [interval, '[PID: 1] [BROWSER] Created browser with User-Agent: "bench"', None],
+    ]
+
+def activity_lines(count, interval):
+    return [[interval, f"[PID: 1] [SEARCH-BING] Search {i} completed, waiting before next", None] for i in range(count)]
+
+def synthetic_scenarios(lines, interval):
+    """Cenários sintéticos: (linhas da 1ª execução, linhas dos reinícios)."""
+    ok = boot_lines(interval) + activity_lines(lines, interval) + [
+        [interval, "[PID: 1] [POINTS] Current total: 7000", "points"],
+        [interval, "#EXIT 0", None],
+    ]
+    return {
+        "ok": (ok, ok),
+        "critical": (
+            boot_lines(interval) + activity_lines(lines // 2, interval) + [
+                [interval, "[PID: 1] [ERROR] read ECONNRESET", "critical"],
+                [0, "#HANG", None],
+            ],
+            ok,
+        ),
+        "suspended": (
+            boot_lines(interval) + activity_lines(lines // 4, interval) + [
+                [interval, "[PID: 1] [LOGIN] Account has been suspended!", "suspended"],
+                [interval, "#EXIT 0", None],
+            ],
+            ok,
+        ),
+        "hang": (
+            boot_lines(interval) + activity_lines(lines // 4, interval) + [[0, "#HANG", None]],
+            boot_lines(interval) + [[0, "#HANG", None]],
+        ),
+        "exit_error": (
+            boot_lines(interval) + activity_lines(lines // 4, interval) + [[interval, "#EXIT 1", None]],
+            ok,
+        ),
+    }
+
+def recorded_scenario(path, interval, classify):
+    """Converte um log gravado em linhas do cenário, marcando erros/pontos/suspensões."""
+    lines = []
+    with open(path, errors="replace") as f:
+        for raw in f:
+            raw = raw.rstrip("\n")
+            delay = interval
+            head, sep, tail = raw.partition("\t")
+            if sep:
+                try:
+                    delay, raw = float(head), tail
+                except ValueError:
+                    pass
+            tag = None
+            if not raw.startswith("#"):
+                event = classify(raw)
+                if event.critical_error:
+                    tag = "critical"
+                elif event.suspended:
+                    tag = "suspended"
+                elif event.points is not None:
+                    tag = "points"
+            lines.append([delay, raw, tag])
+    return lines
+
+#==============================================================
+# BENCHMARK
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def format_seconds(values):
+    if not values:
+        return "-"
+    return f"mediana {statistics.median(values) * 1000:.0f} ms | p95 {percentile(values, 0.95) * 1000:.0f} ms | máx {max(values) * 1000:.0f} ms (n={len(values)})"
+
+def read_events(path):
+    events = []
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    events.append(json.loads(line))
+    return events
+
+def run_benchmark(rwds_functions, slot_count, args, webhook, sheet, workdir):
+    r = rwds_functions
+    basedir = os.path.join(workdir, f"slots_{slot_count}")
+    events_path = os.path.join(basedir, "events.jsonl")
+    os.makedirs(basedir, exist_ok=True)
+    webhook.reset()
+    sheet.updates.clear()
+    sheet.batches = 0
+
+    interval = args.line_interval
+    scenarios = synthetic_scenarios(args.lines, interval)
+    recorded = recorded_scenario(args.log, interval, r.classify_bot_output) if args.log else None
+    names = ["ok", "critical", "suspended", "hang", "exit_error"]
+
+    slots = [r.bot_slot_id(i) for i in range(slot_count)]
+    slot_scenarios = {}
+    for index, slot in enumerate(slots):
+        slot_dir = os.path.join(basedir, f"{r.BOT_BASE_DIR_NAME}_{slot}")
+        os.makedirs(os.path.join(slot_dir, "dist"), exist_ok=True)
+        os.makedirs(os.path.join(slot_dir, "src"), exist_ok=True)
+        with open(os.path.join(slot_dir, "package.json"), "w") as f:
+            f.write('{"scripts": {"start": "bench"}}')
+        with open(os.path.join(slot_dir, "src", "accounts.json"), "w") as f:
+            json.dump([{"email": f"bench-{slot.lower()}@example.com"}], f)
+        with open(os.path.join(slot_dir, "src", "config.json"), "w") as f:
+            json.dump({"sessionPath": "sessions/_multi-BR-bench", "workers": {"doDesktopSearch": True}}, f)
+
+        if recorded is not None:
+            name, (first, restart) = "recorded", (recorded, recorded)
+        else:
+            name = names[index % len(names)]
+            first, restart = scenarios[name]
+        slot_scenarios[slot] = name
+        with open(os.path.join(slot_dir, BENCH_SCENARIO_FILE), "w") as f:
+            json.dump({"slot": slot, "events": events_path, "speed": args.speed, "lines": first, "restart_lines": restart}, f)
+
+    # Apontar o supervisor para os slots do benchmark
+    r.BASEDIR = basedir
+    r.banned_bots.clear()
+    r.last_alerts.clear()
+    r.last_banned_alerts.clear()
+    r.bing_unreachable_count = 0
+    r.is_shutdown_requested = False
+    for slot in slots:
+        r.bot_pids[slot] = []
+
+    # Contar linhas e tempo do classificador
+    original_classify = r.classify_bot_output
+    classify_stats = {"lines": 0, "seconds": 0.0}
+
+    def counting_classify(line):
+        started = time.perf_counter()
+        event = original_classify(line)
+        classify_stats["seconds"] += time.perf_counter() - started
+        classify_stats["lines"] += 1
+        return event
+
+    r.classify_bot_output = counting_classify
+
+    # Amostrar threads do processo durante a execução
+    thread_samples = []
+    sampling = threading.Event()
+
+    def sample_threads():
+        while not sampling.wait(0.1):
+            try:
+                with open("/proc/self/status") as f:
+                    for line in f:
+                        if line.startswith("Threads:"):
+                            thread_samples.append(int(line.split()[1]))
+                            break
+            except OSError:
+                thread_samples.append(threading.active_count())
+
+    sampler = threading.Thread(target=sample_threads, daemon=True)
+    sampler.start()
+
+    real_stdout = sys.stdout
+    sink = None if args.show_output else open(os.devnull, "w")
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    wall_started = time.monotonic()
+    try:
+        if sink is not None:
+            sys.stdout = sink
+        # Webhooks distintos por rodada: o outbox ignora mensagens idênticas já registradas
+        r.start_bots(f"{webhook.url}/{slot_count}/br", f"{webhook.url}/{slot_count}/us", *slots)
+    finally:
+        sys.stdout = real_stdout
+        if sink is not None:
+            sink.close()
+        r.classify_bot_output = original_classify
+        sampling.set()
+        sampler.join()
+    wall = time.monotonic() - wall_started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+
+    # Cruzar eventos emitidos pelos bots falsos com o que o supervisor fez
+    events = read_events(events_path)
+    emitted = {}
+    for event in events:
+        emitted.setdefault((event["slot"], event["event"], event["attempt"]), event["t"])
+
+    restart_latency = []
+    for (slot, name, attempt), t in emitted.items():
+        if name == "critical":
+            restarted = emitted.get((slot, "start", attempt + 1))
+            if restarted:
+                restart_latency.append(restarted - t)
+
+    def first_delivery(slot, keyword, after):
+        tag = f"-{slot}]"
+        for received_at, path, content in webhook.received:
+            if received_at >= after and tag in content and keyword in content:
+                return received_at
+        return None
+
+    points_latency, suspension_latency, timeout_detection = [], [], []
+    for (slot, name, attempt), t in emitted.items():
+        if name == "points":
+            delivered = first_delivery(slot, "pontos", t)
+            if delivered:
+                points_latency.append(delivered - t)
+        elif name == "suspended":
+            delivered = first_delivery(slot, "BANIDA", t)
+            if delivered:
+                suspension_latency.append(delivered - t)
+        elif name == "hang" and attempt > 1:
+            delivered = first_delivery(slot, "inatividade", t)
+            if delivered:
+                timeout_detection.append(delivered - t - r.BOT_INACTIVITY_TIMEOUT_SECONDS)
+
+    expected_restart = BENCH_RESTART_DELAY_SECONDS + r.RESTART_POLICIES["connection"].base_delay
+    lines = classify_stats["lines"]
+    report = [
+        f"== {slot_count} slots ({'log gravado' if recorded is not None else 'cenários sintéticos'}, velocidade {args.speed}x) ==",
+        f"  duração total:            {wall:.2f} s",
+        f"  linhas processadas:       {lines}",
+        f"  CPU do supervisor/linha:  {cpu / lines * 1e6:.1f} µs" if lines else "  CPU do supervisor/linha:  -",
+        f"  classificador/linha:      {classify_stats['seconds'] / lines * 1e6:.1f} µs" if lines else "  classificador/linha:      -",
+        f"  CPU do supervisor:        {cpu:.2f} s ({cpu / wall * 100:.1f}% de um núcleo)",
+        f"  threads (pico/mediana):   {max(thread_samples, default=0)}/{statistics.median(thread_samples) if thread_samples else 0:.0f}",
+        f"  erro crítico -> reinício: {format_seconds(restart_latency)} (atraso configurado ~{expected_restart * 1000:.0f} ms)",
+        f"  alerta de pontos:         {format_seconds(points_latency)}",
+        f"  alerta de suspensão:      {format_seconds(suspension_latency)}",
+        f"  detecção de inatividade:  {format_seconds(timeout_detection)} (além do timeout de {r.BOT_INACTIVITY_TIMEOUT_SECONDS}s)",
+        f"  atualizações da planilha: {len(sheet.updates)} (em {sheet.batches} lote(s))",
+    ]
+    return "\n".join(report)
+
+def install_fake_toolchain(workdir):
+    """Cria `node` e `npm` falsos no PATH: `npm run start` executa o replay."""
+    bin_dir = os.path.join(workdir, "bin")
+    os.makedirs(bin_dir, exist_ok=True)
+    scripts = {
+        "node": "#!/bin/sh\necho v20.0.0-bench\n",
+        "npm": (
+            "#!/bin/sh\n"
+            "if [ \"$1\" = \"-v\" ]; then echo 10.0.0-bench; exit 0; fi\n"
+            f"exec \"{sys.executable}\" \"{os.path.abspath(__file__)}\" --replay-child\n"
+        ),
+    }
+    for name, content in scripts.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        os.chmod(path, 0o755)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do supervisor de bots.")
+    parser.add_argument("--slots", default=",".join(map(str, DEFAULT_SLOT_COUNTS)), help="Quantidades de slots, separadas por vírgula (padrão: 5,20,100)")
+    parser.add_argument("--log", help="Log gravado para reproduzir em todos os slots (padrão: cenários sintéticos)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiplicador de velocidade do replay")
+    parser.add_argument("--lines", type=int, default=200, help="Linhas de atividade por execução nos cenários sintéticos")
+    parser.add_argument("--line-interval", type=float, default=0.01, help="Intervalo padrão entre linhas (segundos)")
+    parser.add_argument("--host-admission", action="store_true", help="Manter o controle de admissão por memória/CPU do host")
+    parser.add_argument("--show-output", action="store_true", help="Mostrar a saída do supervisor")
+    parser.add_argument("--output", help="Arquivo onde gravar o relatório (ex.: bench_output.txt)")
+    parser.add_argument("--replay-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.replay_child:
+        replay_child()
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bench_supervisor_")
+    webhook = LocalWebhookServer().start()
+    sheet = LocalSheet()
+
+    # Configuração antes de importar: diretórios temporários, webhooks locais e atrasos curtos
+    os.environ.update({
+        "BOT_LOG_SPOOL_DIR": os.path.join(workdir, "logs"),
+        "RUN_JOURNAL_PATH": os.path.join(workdir, "run_journal.sqlite3"),
+        "OUTBOX_PATH": os.path.join(workdir, "outbox.sqlite3"),
+        "DISCORD_WEBHOOK_URL_LOG": f"{webhook.url}/log",
+        "BOT_ACCOUNT": "bench",
+        "BOT_RESTART_BACKOFF_BASE_SECONDS": str(BENCH_BACKOFF_BASE_SECONDS),
+        "BOT_RESTART_JITTER": "0",
+        "ADMISSION_MIN_GAP_SECONDS": "0",
+    })
+    install_fake_toolchain(workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import rwds_functions
+
+    # Stand-ins offline: Discord vai para o servidor local, Sheets para memória
+    rwds_functions.post_discord_with_custom_dns = lambda url, data, dns_servers=None: rwds_functions.http_session().post(url, json=data, timeout=10)
+    rwds_functions.write_points_batch = sheet.write_points_batch
+    rwds_functions.discord_webhook_log_env = f"{webhook.url}/log"
+    rwds_functions.BOT_RESTART_DELAY_SECONDS = BENCH_RESTART_DELAY_SECONDS
+    rwds_functions.BOT_INACTIVITY_TIMEOUT_SECONDS = BENCH_INACTIVITY_TIMEOUT_SECONDS
+    if not args.host_admission:
+        rwds_functions.host_pressure_reason = lambda: None
+
+    reports = []
+    try:
+        for slot_count in [int(value) for value in args.slots.split(",") if value.strip()]:
+            rwds_functions.BOT_SLOTS = [rwds_functions.bot_slot_id(i) for i in range(slot_count)]
+            print(f"⏱️ Executando benchmark com {slot_count} slots...")
+            report = run_benchmark(rwds_functions, slot_count, args, webhook, sheet, workdir)
+            print(report)
+            reports.append(report)
+    finally:
+        webhook.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\n\n".join(reports) + "\n")
+        print(f"📄 Relatório salvo em {args.output}")
+
+if __name__ == "__main__":
+    main()
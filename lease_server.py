@@ -0,0 +1,139 @@
+"""
+Servidor de leases para coordenar vários hosts (Spaces, GitHub Actions).
+
+Guarda os leases em um SQLite (lease_store.SqliteLeaseStore) e expõe uma
+API JSON mínima usada por rwds_functions.HttpLeaseStore:
+
+    POST /leases/<nome>/acquire  {"owner": "...", "ttl": 300}  -> 200 lease | 409 dono atual
+    POST /leases/<nome>/renew    {"token": 7, "ttl": 300}      -> 200 lease | 409 perdido
+    POST /leases/<nome>/release  {"token": 7}                  -> 200
+    GET  /leases/<nome>                                        -> 200 lease | 404 livre
+
+Os vencimentos são devolvidos como "ttl_remaining" (segundos), para que cada
+host calcule o prazo no próprio relógio.
+
+Uso:
+    python lease_server.py --port 8787 --db leases.sqlite3
+    LEASE_SERVER_TOKEN=segredo python lease_server.py   # exige "Authorization: Bearer segredo"
+
+Nos hosts: LEASE_SERVER_URL=http://servidor:8787 (e o mesmo LEASE_SERVER_TOKEN).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from lease_store import Lease, LeaseHeld, SqliteLeaseStore
+
+DEFAULT_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "300").strip() or 300)
+
+
+def lease_json(lease):
+    return {
+        "name": lease.name,
+        "owner": lease.owner,
+        "token": lease.token,
+        "ttl_remaining": max(0.0, lease.expires_at - time.time()),
+    }
+
+
+def make_handler(store, token, max_ttl):
+    class LeaseHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _route(self):
+            """Retorna (nome, ação) ou None se a rota não existe ou não está autorizada."""
+            if token and self.headers.get("Authorization") != f"Bearer {token}":
+                self._send(401, {"error": "não autorizado"})
+                return None
+            parts = self.path.split("?", 1)[0].strip("/").split("/")
+            if len(parts) not in (2, 3) or parts[0] != "leases":
+                self._send(404, {"error": "rota desconhecida"})
+                return None
+            return unquote(parts[1]), (parts[2] if len(parts) == 3 else None)
+
+        def do_GET(self):
+            route = self._route()
+            if route is None:
+                return
+            lease = store.current(route[0])
+            if lease is None:
+                self._send(404, {"error": "livre"})
+            else:
+                self._send(200, lease_json(lease))
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                return self._send(400, {"error": "JSON inválido"})
+            route = self._route()
+            if route is None:
+                return
+            if not isinstance(body, dict):
+                return self._send(400, {"error": "o corpo deve ser um objeto JSON"})
+            name, action = route
+            try:
+                ttl = float(body.get("ttl") or DEFAULT_TTL_SECONDS)
+                if not 0 < ttl < float("inf"):
+                    raise ValueError(f"ttl fora do intervalo: {body.get('ttl')}")
+                ttl = min(ttl, max_ttl)
+                if action == "acquire":
+                    self._send(200, lease_json(store.acquire(name, str(body["owner"]), ttl)))
+                elif action == "renew":
+                    lease = store.renew(Lease(name, "", int(body["token"]), 0), ttl)
+                    if lease is None:
+                        self._send(409, {"error": "lease perdido"})
+                    else:
+                        self._send(200, lease_json(store.current(name) or lease))
+                elif action == "release":
+                    store.release(Lease(name, "", int(body["token"]), 0))
+                    self._send(200, {})
+                else:
+                    self._send(404, {"error": "ação desconhecida"})
+            except LeaseHeld as e:
+                self._send(409, lease_json(e.holder))
+            except (KeyError, ValueError, TypeError) as e:
+                self._send(400, {"error": f"campo inválido: {e}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return LeaseHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de leases das execuções")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("LEASE_SERVER_PORT", "8787")))
+    parser.add_argument("--db", default=os.getenv("LEASE_SERVER_DB", "leases.sqlite3"), help="arquivo SQLite dos leases")
+    parser.add_argument("--max-ttl", type=float, default=3600.0, help="TTL máximo aceito (segundos)")
+    args = parser.parse_args()
+
+    store = SqliteLeaseStore(args.db)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, os.getenv("LEASE_SERVER_TOKEN", "").strip(), args.max_ttl))
+    print(f"🔑 Servidor de leases em http://{args.host}:{args.port} (banco {args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
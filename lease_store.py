@@ -0,0 +1,100 @@
+"""
+Leases com TTL e token de fencing guardados em SQLite.
+
+Usado por rwds_functions (LEASE_BACKEND=sqlite) e por lease_server.py, que
+expõe o mesmo armazenamento por HTTP para vários hosts. Só depende da
+biblioteca padrão.
+"""
+import os
+import time
+import sqlite3
+import threading
+from typing import NamedTuple
+
+
+class Lease(NamedTuple):
+    name: str
+    owner: str
+    token: int          # token de fencing (cresce a cada aquisição)
+    expires_at: float   # relógio local de quem guarda o lease
+
+
+class LeaseHeld(Exception):
+    """O lease pertence a outro dono e ainda não expirou."""
+
+    def __init__(self, holder):
+        super().__init__(f"lease '{holder.name}' em uso por {holder.owner}")
+        self.holder = holder
+
+
+class SqliteLeaseStore:
+    """Leases em um arquivo SQLite (processos do mesmo host ou servidor de leases)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                token INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def acquire(self, name, owner, ttl):
+        """Obtém o lease (novo token) ou levanta LeaseHeld com o dono atual."""
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE: outro processo não lê o mesmo estado no meio da troca
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row and row[2] > now and row[0] != owner:
+                    raise LeaseHeld(Lease(name, row[0], row[1], row[2]))
+                lease = Lease(name, owner, (row[1] if row else 0) + 1, now + ttl)
+                self._conn.execute(
+                    """
+                    INSERT INTO leases (name, owner, token, expires_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, token = excluded.token, expires_at = excluded.expires_at
+                    """,
+                    lease,
+                )
+                self._conn.execute("COMMIT")
+                return lease
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def renew(self, lease, ttl):
+        """Estende o lease; retorna None se outro dono já o obteve (token mudou)."""
+        expires_at = time.time() + ttl
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE name = ? AND token = ?",
+                (expires_at, lease.name, lease.token),
+            )
+        return lease._replace(expires_at=expires_at) if cursor.rowcount else None
+
+    def release(self, lease):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE leases SET expires_at = 0 WHERE name = ? AND token = ?",
+                (lease.name, lease.token),
+            )
+
+    def current(self, name):
+        """Lease vigente (ou None se livre/expirado)."""
+        with self._lock:
+            row = self._conn.execute("SELECT owner, token, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+        if row and row[2] > time.time():
+            return Lease(name, row[0], row[1], row[2])
+        return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
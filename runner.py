@@ -13,11 +13,9 @@ config_mode_env = str(os.getenv("CONFIG_MODE", "DEFAULT_CONFIG")).strip()
 bot_directory_env = str(os.getenv("BOT_DIRECTORY", "")).strip()
 bot_account_env = str(os.getenv("BOT_ACCOUNT", "")).strip()
 
-bot_a_env = os.getenv("BOT_A", "False").strip().lower() == "true"
-bot_b_env = os.getenv("BOT_B", "False").strip().lower() == "true"
-bot_c_env = os.getenv("BOT_C", "False").strip().lower() == "true"
-bot_d_env = os.getenv("BOT_D", "False").strip().lower() == "true"
-bot_e_env = os.getenv("BOT_E", "False").strip().lower() == "true"
+# Seleção de bots: BOT_<ID>=True para cada slot (A, B, ..., Z, AA...)
+# ou BOT_ALL=True para executar todos os slots do pool
+bot_all_env = os.getenv("BOT_ALL", "False").strip().lower() == "true"
 
 # URLs de Webhook do Discord carregadas do config.env
 # Se não estiverem definidas, serão strings vazias.
@@ -39,6 +37,9 @@ BOT_BASE_DIR_NAME = "pinoquio-v2"
 def load_functions():
     os.makedirs(BASEDIR, exist_ok=True)
     rwd_path = os.path.join(BASEDIR, "rwds_functions.py")
+    # Módulos auxiliares (lease_store.py) ficam ao lado do rwds_functions.py
+    if BASEDIR not in sys.path:
+        sys.path.insert(0, BASEDIR)
     spec = importlib.util.spec_from_file_location("rwds_functions", rwd_path)
     module = importlib.util.module_from_spec(spec)
     sys.modules["rwds_functions"] = module
@@ -66,19 +67,40 @@ def run_bots():
     
 
     rwds_functions.send_discord_log_message(BOT_ACCOUNT, "Iniciando execução...", DISCORD_WEBHOOK_URL_LOG)
+
+    # Outbox: reenvia efeitos externos (Discord, planilha, Todoist) pendentes de execuções anteriores
+    rwds_functions.start_outbox()
     if CONFIG_MODE == "GEN_COOKIE_CONFIG":
         pass
-    else:
-        rwds_functions.criar_tarefa(BOT_ACCOUNT)
+    elif not rwds_functions.acquire_run_lease(BOT_ACCOUNT):
+        # Lease da conta em outro host (ou backend inacessível): não rodar a mesma conta duas vezes
+        rwds_functions.send_discord_log_message(BOT_ACCOUNT, "Lease da conta indisponível (em execução em outro host ou servidor de leases inacessível), encerrando.", DISCORD_WEBHOOK_URL_LOG)
+        rwds_functions.flush_notifications()
+        rwds_functions.drain_outbox()
+        print("🏁 Processo concluído.")
+        return
+
+    # Diário da execução: retoma uma execução interrompida (crash/restart do Space)
+    rwds_functions.open_run_journal()
 
 
 
-    folder_path = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_A")
-    bot_selections = {
-        "A": bot_a_env, "B": bot_b_env, "C": bot_c_env, 
-        "D": bot_d_env, "E": bot_e_env
-    }
-    selected_bots = [bot for bot, selected in bot_selections.items() if selected]
+    bot_slots = rwds_functions.BOT_SLOTS
+    first_slot = bot_slots[0]
+    folder_path = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{first_slot}")
+    if bot_all_env:
+        selected_bots = list(bot_slots)
+    else:
+        selected_bots = rwds_functions.selected_bot_slots_from_env()
+
+    # Clona um slot compartilhando arquivos imutáveis (ver rwds_functions.clone_slot_dir)
+    def clone_slot(src_copy, dst_copy):
+        print(f"Clonando {src_copy} para {dst_copy} (modo {rwds_functions.SLOT_CLONE_MODE})...")
+        try:
+            shared, copied = rwds_functions.clone_slot_dir(src_copy, dst_copy)
+            print(f"✅ Clone concluído: {shared} arquivo(s) compartilhados, {copied} copiados.")
+        except Exception as e:
+            print(f"❌ Exceção ao clonar '{src_copy}' para '{dst_copy}': {str(e)}")
 
     # Função auxiliar para executar subprocessos e capturar/yield sua saída
     def run_subprocess_and_print_output(command_list, description=""):
@@ -110,29 +132,36 @@ def run_bots():
     print(f"[DEBUG runner.py] DISCORD_WEBHOOK_URL_US: '{DISCORD_WEBHOOK_URL_US}'")
     print(f"[DEBUG runner.py] SPACE_REPO_ID: '{SPACE_REPO_ID}'")
     print(f"[DEBUG runner.py] HF_TOKEN: '{HF_TOKEN}'")
+    print(f"[DEBUG runner.py] BOT_SLOTS: {len(bot_slots)} ({', '.join(bot_slots)})")
 
     if not os.path.exists(folder_path):
         print("Instalando bots...")
         source_mv = os.path.join(BASEDIR, BOT_BASE_DIR_NAME)
-        dest_mv = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_A")
+        dest_mv = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{first_slot}")
 
         if os.path.exists(source_mv):
             run_subprocess_and_print_output(command_list=["mv", source_mv, dest_mv], description=f"Movendo {source_mv} para {dest_mv}")
         else:
             print(f"⚠️ '{source_mv}' não encontrado para mover. Verifique se o diretório base '{BOT_BASE_DIR_NAME}' existe.")
 
-        src_copy = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_A")
+        src_copy = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{first_slot}")
         if os.path.exists(src_copy):
-            for suffix in ["B", "C", "D", "E"]:
+            for suffix in bot_slots[1:]:
                 dst_copy = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{suffix}")
                 if os.path.exists(dst_copy):
                     run_subprocess_and_print_output(command_list=["rm", "-rf", dst_copy], description=f"Removendo destino existente {dst_copy}")
-                run_subprocess_and_print_output(command_list=["cp", "-r", src_copy, dst_copy], description=f"Copiando {src_copy} para {dst_copy}")
+                clone_slot(src_copy, dst_copy)
             print("✅ Estrutura de diretórios dos bots criada.")
         else:
-            print(f"⚠️ '{src_copy}' não encontrado para copiar. A etapa de mover/criar '{BOT_BASE_DIR_NAME}_A' pode ter falhado.")
+            print(f"⚠️ '{src_copy}' não encontrado para copiar. A etapa de mover/criar '{BOT_BASE_DIR_NAME}_{first_slot}' pode ter falhado.")
     else:
         print("📁 Diretório já existe. Pulando instalação.")
+        # O pool pode ter crescido desde a instalação: cria apenas os slots que faltam
+        src_copy = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{first_slot}")
+        for suffix in bot_slots[1:]:
+            dst_copy = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{suffix}")
+            if not os.path.exists(dst_copy):
+                clone_slot(src_copy, dst_copy)
 
     os.chdir(BASEDIR)
 
@@ -144,33 +173,50 @@ def run_bots():
     if selected_bots:
         print(f"Executando tarefas para os bots selecionados: {', '.join(selected_bots)}")
         rwds_functions.execute_tasks_for_selected_bots(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE, *selected_bots)
-        
-        print("Iniciando bots...")
-        rwds_functions.start_bots(DISCORD_WEBHOOK_URL_BR, DISCORD_WEBHOOK_URL_US, *selected_bots) # Saída principal ainda no console
-        print("✅ Bots executados e encerrados.")
+
+        # Ao retomar, pula as contas que já concluíram nesta execução
+        pending_bots = rwds_functions.pending_bot_slots(selected_bots)
+        if pending_bots:
+            print("Iniciando bots...")
+            rwds_functions.start_bots(DISCORD_WEBHOOK_URL_BR, DISCORD_WEBHOOK_URL_US, *pending_bots) # Saída principal ainda no console
+            print("✅ Bots executados e encerrados.")
+        else:
+            print("⏭️ Todas as contas selecionadas já foram concluídas nesta execução.")
 
         if CONFIG_MODE == "GEN_COOKIE_CONFIG":
             pass
         else:
-            print("Concluindo tarefa...")
-            rwds_functions.concluir_tarefa(BOT_ACCOUNT) 
             # Só concluir tarefa do IP se ela foi criada
             if ip_task_created:
                 rwds_functions.concluir_tarefa(current_ip, "6cjh8V9GcVr6r4x7") 
         time.sleep(5)
-        print("Fazendo upload de sessions para o google drive...")
-        rwds_functions.upload_rewards_drive(BOT_ACCOUNT)
+        # Fencing: sem o lease, outro host é dono da conta e as sessions dele prevalecem
+        if rwds_functions.run_lease_is_current(verify=True):
+            print("Fazendo upload de sessions para o google drive...")
+            rwds_functions.upload_rewards_drive(BOT_ACCOUNT)
+        else:
+            print("⚠️ Lease da conta perdido: upload de sessions ignorado.")
     else:
         print("⚠️ Nenhum bot foi selecionado.")
 
+    print("Liberando lease da conta...")
+    rwds_functions.release_run_lease()
+
+    # Execução completa: a próxima inicialização começa uma nova execução
+    rwds_functions.finish_run_journal()
+
     if SPACE_REPO_ID:
         rwds_functions.send_discord_log_message(BOT_ACCOUNT, "Execução finalizada, desligando Space.", DISCORD_WEBHOOK_URL_LOG)
-        time.sleep(5)
+        # Entrega as notificações e o outbox antes de desligar o Space (o restante fica para a próxima execução)
+        rwds_functions.flush_notifications()
+        rwds_functions.drain_outbox()
         rwds_functions.stop_space(HF_TOKEN, SPACE_REPO_ID)
         print("🏁 Processo concluído.")
         time.sleep(180)
     else:
         rwds_functions.send_discord_log_message(BOT_ACCOUNT, "Execução finalizada, encerrando GITHUB Action.", DISCORD_WEBHOOK_URL_LOG)
+        rwds_functions.flush_notifications()
+        rwds_functions.drain_outbox()
         print("🏁 Processo concluído.")
 
 
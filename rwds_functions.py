@@ -1,7 +1,23 @@
-import os, sys, time, re, shutil
+import os, sys, time, re, shutil, random
 from math import e
 import subprocess
+import signal
+import sqlite3
+import gzip
+import zipfile
+import zlib
+import stat
+import tempfile
+import hashlib
+import uuid
 import threading
+import queue
+import selectors
+import heapq
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import NamedTuple, Optional
 import requests
 import json
 from huggingface_hub import HfApi
@@ -11,8 +27,14 @@ from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import dns.resolver, socket
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote
 import urllib3
+from urllib3.util.retry import Retry
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPSConnectionPool
+from urllib3.util import connection as urllib3_connection
+from requests.adapters import HTTPAdapter
+from lease_store import Lease, LeaseHeld, SqliteLeaseStore
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # SISTEMA DE TIMEOUT DE INATIVIDADE (COM REINÍCIO)
@@ -30,8 +52,25 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 processes_lock = threading.Lock()
 
 
-# Configuração de delay entre inicialização de bots (em segundos)
-BOT_START_DELAY_SECONDS = 10  # Delay progressivo entre bots (0, 10, 20, 30 segundos, etc.)
+# Controle de admissão: um novo bot só inicia quando o host tem folga de
+# memória/CPU e o navegador do bot anterior terminou de abrir
+ADMISSION_MIN_GAP_SECONDS = float(os.getenv("ADMISSION_MIN_GAP_SECONDS", "2").strip() or 2)  # Intervalo mínimo entre inícios
+ADMISSION_STARTUP_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_STARTUP_TIMEOUT_SECONDS", "90").strip() or 90)  # Tempo máximo esperando o navegador anterior
+ADMISSION_MAX_LOAD_PER_CORE = float(os.getenv("ADMISSION_MAX_LOAD_PER_CORE", "1.5").strip() or 1.5)  # Load average (1 min) por núcleo
+ADMISSION_MIN_FREE_MB = int(os.getenv("ADMISSION_MIN_FREE_MB", "0").strip() or 0)  # Reserva além da memória de um slot (BOT_SLOT_RAM_MB)
+
+BOT_RESTART_DELAY_SECONDS = 10  # Espera antes de encerrar um bot após erro crítico
+BOT_MAX_RESTARTS = 8  # Reinícios por slot antes de desistir (classes sem limite próprio)
+BOT_RESTART_BACKOFF_BASE_SECONDS = float(os.getenv("BOT_RESTART_BACKOFF_BASE_SECONDS", "10").strip() or 10)  # Primeiro atraso de reinício
+BOT_RESTART_BACKOFF_MAX_SECONDS = float(os.getenv("BOT_RESTART_BACKOFF_MAX_SECONDS", "600").strip() or 600)  # Teto do backoff exponencial
+BOT_RESTART_JITTER = float(os.getenv("BOT_RESTART_JITTER", "0.2").strip() or 0.2)  # Variação aleatória (±20%) para não sincronizar slots
+BOT_RESTART_STABLE_SECONDS = float(os.getenv("BOT_RESTART_STABLE_SECONDS", "600").strip() or 600)  # Execução longa assim zera as falhas seguidas
+BOT_INACTIVITY_TIMEOUT_SECONDS = 30 * 60  # Sem nenhuma saída por 30 minutos = bot travado
+SUPERVISOR_STATUS_INTERVAL_SECONDS = 300  # Log de status a cada 5 minutos
+ADMISSION_RECHECK_SECONDS = 1.0  # Reavaliação da admissão enquanto houver bots na fila
+
+# Threads usadas pelo supervisor apenas para chamadas bloqueantes (Discord, Space)
+SUPERVISOR_IO_WORKERS = 4
 
 def load_json_with_comments(file_path):
     """
@@ -108,6 +147,285 @@ TODOIST_API_TOKEN = todoist_api_env
 # Define o nome base dos diretórios dos bots (facilita mudanças futuras)
 BOT_BASE_DIR_NAME = "pinoquio-v2"
 BOT_ZIP_FILE_NAME = f"{BOT_BASE_DIR_NAME}-main.zip"
+SHARED_CONFIG_URL = "https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{config_mode}.json"
+PROVISION_WORKERS = int(os.getenv("PROVISION_WORKERS", "8").strip() or 8)  # Slots provisionados em paralelo
+PROVISION_SPOOL_MAX_MB = int(os.getenv("PROVISION_SPOOL_MAX_MB", "64").strip() or 64)  # Download em memória até este tamanho, depois em disco
+ARTIFACT_CACHE_ENABLED = os.getenv("ARTIFACT_CACHE", "True").strip().lower() != "false"  # Cache local de pacotes/configs
+SLOT_ARTIFACT_MARKER = ".artifact_sha256"  # Hash do último pacote extraído em cada slot
+
+#==============================================================
+# POOL DE SLOTS DOS BOTS
+# Cada slot é um diretório {BOT_BASE_DIR_NAME}_{ID} com IDs A, B, ..., Z, AA, AB...
+# A quantidade vem de BOT_SLOT_COUNT no configs.env; se não definida, é
+# derivada dos núcleos e da memória disponíveis para o container, nunca
+# abaixo dos 5 slots (A..E) que o pool sempre teve.
+
+BOT_SLOT_ENV_RE = re.compile(r'^BOT_([A-Z]{1,2})$')
+BOT_SLOTS_PER_CORE = 2  # Bots passam a maior parte do tempo esperando a rede
+BOT_SLOT_RAM_MB = int(os.getenv("BOT_SLOT_RAM_MB", "1536").strip() or 1536)  # Memória estimada por navegador
+MIN_DEFAULT_BOT_SLOTS = 5  # Pool original (A..E)
+MAX_BOT_SLOTS = 26 * 27  # A..Z e AA..ZZ
+
+# Cores ANSI usadas para os slots (repetidas ciclicamente)
+BOT_COLOR_PALETTE = [
+    '\033[92m',  # Verde
+    '\033[94m',  # Azul
+    '\033[93m',  # Amarelo
+    '\033[95m',  # Magenta
+    '\033[96m',  # Ciano
+    '\033[36m',  # Ciano escuro
+    '\033[35m',  # Roxo
+    '\033[34m',  # Azul escuro
+    '\033[90m',  # Cinza
+]
+
+def bot_slot_id(index):
+    """Converte um índice (0, 1, ...) no ID do slot (A, B, ..., Z, AA, AB, ...)."""
+    if index < 26:
+        return chr(ord('A') + index)
+    return chr(ord('A') + index // 26 - 1) + chr(ord('A') + index % 26)
+
+def bot_slot_index(slot_id):
+    """Inverso de bot_slot_id. Retorna None se o ID for inválido."""
+    slot_id = str(slot_id).strip().upper()
+    if len(slot_id) == 1 and 'A' <= slot_id <= 'Z':
+        return ord(slot_id) - ord('A')
+    if len(slot_id) == 2 and slot_id.isalpha() and slot_id.isascii():
+        return (ord(slot_id[0]) - ord('A') + 1) * 26 + ord(slot_id[1]) - ord('A')
+    return None
+
+def _host_memory_mb():
+    """Memória total visível para o processo em MB, respeitando o limite do cgroup."""
+    total_mb = None
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    total_mb = int(line.split()[1]) // 1024
+                    break
+    except Exception:
+        pass
+    for cgroup_file in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(cgroup_file, 'r') as f:
+                value = f.read().strip()
+            if value.isdigit():
+                limit_mb = int(value) // (1024 * 1024)
+                if total_mb is None or limit_mb < total_mb:
+                    total_mb = limit_mb
+            break
+        except Exception:
+            continue
+    return total_mb
+
+def default_bot_slot_count():
+    """Quantidade de slots sugerida a partir dos núcleos e da memória do host."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cores = os.cpu_count() or 1
+    by_cpu = max(1, cores * BOT_SLOTS_PER_CORE)
+    memory_mb = _host_memory_mb()
+    by_ram = max(1, memory_mb // BOT_SLOT_RAM_MB) if memory_mb else by_cpu
+    count = max(MIN_DEFAULT_BOT_SLOTS, min(by_cpu, by_ram, MAX_BOT_SLOTS))
+    memory_info = f"{memory_mb} MB -> {by_ram}" if memory_mb else "memória desconhecida"
+    print(f"🧮 BOT_SLOT_COUNT não definido: {count} slots ({cores} núcleo(s) -> {by_cpu}, {memory_info}, mínimo {MIN_DEFAULT_BOT_SLOTS}).")
+    return count
+
+def selected_bot_slots_from_env():
+    """IDs dos slots marcados como BOT_<ID>=True no ambiente, em ordem."""
+    selected = []
+    for key, value in os.environ.items():
+        match = BOT_SLOT_ENV_RE.match(key)
+        if match and str(value).strip().lower() == "true":
+            selected.append(match.group(1))
+    return sorted(selected, key=bot_slot_index)
+
+def resolve_bot_slots():
+    """
+    Monta a lista de slots do pool: BOT_SLOT_COUNT (ou o valor derivado do host),
+    ampliada se necessário para incluir qualquer slot selecionado via BOT_<ID>.
+    """
+    count_env = str(os.getenv("BOT_SLOT_COUNT", "")).strip()
+    try:
+        count = int(count_env) if count_env else default_bot_slot_count()
+    except ValueError:
+        print(f"⚠️ BOT_SLOT_COUNT inválido ('{count_env}'). Usando valor derivado do host.")
+        count = default_bot_slot_count()
+    count = max(1, min(count, MAX_BOT_SLOTS))
+    for slot in selected_bot_slots_from_env():
+        count = max(count, bot_slot_index(slot) + 1)
+    return [bot_slot_id(i) for i in range(count)]
+
+def bot_color(slot_id):
+    """Cor ANSI de um slot."""
+    index = bot_slot_index(slot_id)
+    if index is None:
+        return '\033[0m'
+    return BOT_COLOR_PALETTE[index % len(BOT_COLOR_PALETTE)]
+
+def bot_slot_dir(slot_id):
+    return os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{slot_id}")
+
+# Clonagem de slots: arquivos imutáveis (node_modules, dist...) são
+# compartilhados por hardlink/reflink; só os arquivos que cada slot altera
+# ganham cópia própria. Quem reescreve arquivos compartilhados deve fazê-lo
+# via temporário + os.replace (como extract_zip_incremental), o que cria um
+# novo inode e não afeta os outros slots.
+SLOT_CLONE_MODE = os.getenv("SLOT_CLONE_MODE", "hardlink").strip().lower()  # hardlink, reflink ou copy
+SLOT_PRIVATE_FILES = ("src/accounts.json", "src/config.json")
+SLOT_PRIVATE_DIR_NAMES = ("sessions",)
+_FICLONE = 0x40049409  # ioctl do Linux para reflink (btrfs, xfs...)
+
+def _is_private_slot_path(relative_path):
+    relative_path = relative_path.replace(os.sep, "/")
+    if relative_path in SLOT_PRIVATE_FILES:
+        return True
+    return any(part in SLOT_PRIVATE_DIR_NAMES for part in relative_path.split("/")[:-1])
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+def clone_slot_dir(src_dir, dst_dir, mode=None):
+    """
+    Cria dst_dir como clone de src_dir sem duplicar o conteúdo: hardlink (ou
+    reflink) para arquivos compartilháveis e cópia real para accounts.json,
+    config.json e sessões. Retorna (compartilhados, copiados).
+    """
+    mode = mode or SLOT_CLONE_MODE
+    shared = copied = 0
+    for root, dirs, files in os.walk(src_dir):
+        relative_root = os.path.relpath(root, src_dir)
+        target_root = dst_dir if relative_root == "." else os.path.join(dst_dir, relative_root)
+        os.makedirs(target_root, exist_ok=True)
+        shutil.copystat(root, target_root)
+
+        for name in dirs + files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            if os.path.islink(src):
+                # Symlinks (ex.: sessões montadas) são recriados, nunca seguidos
+                if name in dirs:
+                    dirs.remove(name)
+                os.symlink(os.readlink(src), dst)
+                continue
+            if name in dirs:
+                continue
+
+            relative_path = os.path.normpath(os.path.join(relative_root, name))
+            if mode != "copy" and not _is_private_slot_path(relative_path):
+                try:
+                    if mode == "reflink":
+                        _reflink(src, dst)
+                    else:
+                        os.link(src, dst)
+                    shared += 1
+                    continue
+                except OSError:
+                    pass  # outro sistema de arquivos / sem suporte: copia
+            shutil.copy2(src, dst)
+            copied += 1
+    return shared, copied
+
+#==============================================================
+# METADADOS DAS CONTAS DOS SLOTS
+# accounts.json e config.json de cada slot são lidos uma vez e reaproveitados
+# por alertas, planilha e limpeza de cookies; a entrada só é recarregada quando
+# o mtime/tamanho de um dos arquivos muda.
+
+class SlotAccountInfo(NamedTuple):
+    """Dados da conta de um slot derivados de src/accounts.json e src/config.json."""
+    slot: str
+    email: str
+    session_profile: str
+    check_restrict: object   # workers.doDesktopSearch ("Unknown" se não houver config)
+    bot_account: str         # BOT_ACCOUNT do .env ou derivado do sessionPath
+
+    @property
+    def is_multi_br(self):
+        return self.session_profile.startswith('multi-BR')
+
+    @property
+    def sheet_name(self):
+        return 'REWARDS-BR' if self.is_multi_br else 'REWARDS-US'
+
+    def webhook(self, discord_webhook_url_br, discord_webhook_url_us):
+        return discord_webhook_url_br if self.is_multi_br else discord_webhook_url_us
+
+
+def _file_signature(path):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def _load_slot_account_info(slot, accounts_file, config_file):
+    email = "Unknown"
+    session_profile = "Unknown"
+    check_restrict = "Unknown"
+    bot_account = bot_acc_env
+    try:
+        if os.path.exists(accounts_file):
+            accounts_data = load_json_with_comments(accounts_file)
+            if accounts_data:
+                email = extract_email_from_accounts(accounts_data)
+
+        if os.path.exists(config_file):
+            config_data = load_json_with_comments(config_file)
+            if config_data:
+                session_path = config_data.get('sessionPath', '')
+                if session_path and 'sessions/_' in session_path:
+                    session_profile = session_path.split('sessions/_')[1]
+                check_restrict = config_data.get("workers", {}).get("doDesktopSearch", "Unknown")
+    except Exception as e:
+        print(f"❌ Erro ao obter informações da conta: {str(e)}")
+
+    if not bot_account and session_profile != "Unknown":
+        # Sem BOT_ACCOUNT no .env: usa o perfil da sessão sem os números finais
+        bot_account = session_profile.rstrip('0123456789')
+    return SlotAccountInfo(slot, email, session_profile, check_restrict, bot_account)
+
+
+class SlotAccountCache:
+    """Cache de SlotAccountInfo por slot, invalidado pelo mtime/tamanho dos arquivos."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, slot):
+        src_dir = os.path.join(bot_slot_dir(slot), "src")
+        accounts_file = os.path.join(src_dir, "accounts.json")
+        config_file = os.path.join(src_dir, "config.json")
+        signature = (_file_signature(accounts_file), _file_signature(config_file))
+        with self._lock:
+            entry = self._entries.get(slot)
+        if entry and entry[0] == signature:
+            return entry[1]
+        info = _load_slot_account_info(slot, accounts_file, config_file)
+        with self._lock:
+            self._entries[slot] = (signature, info)
+        return info
+
+    def invalidate(self, slot=None):
+        with self._lock:
+            if slot is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(slot, None)
+
+
+slot_account_cache = SlotAccountCache()
+
+
+def slot_account_info(slot):
+    """SlotAccountInfo de um slot (lido do disco só quando os arquivos mudam)."""
+    return slot_account_cache.get(slot)
 
 #==============================================================
 
@@ -168,7 +486,269 @@ def curl_with_proxy_fallback(url, output, host="127.0.0.1", port=3128, timeout=2
     # If all attempts failed, raise the last error
     raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
 
-def get_sheets_service():
+def _download_proxies(host="127.0.0.1", port=3128, timeout=2):
+    """Proxies do bypass local (se estiver ouvindo) no formato do requests."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            proxy = f"http://{host}:{port}"
+            return {"http": proxy, "https": proxy}
+    except OSError:
+        return None
+
+def download_to_spool(url, max_retries=3, retry_delay=5):
+    """
+    Baixa `url` para um SpooledTemporaryFile (memória até PROVISION_SPOOL_MAX_MB,
+    depois disco), sem passar por um arquivo intermediário nem por curl.
+    Retorna o arquivo posicionado no início; o chamador deve fechá-lo.
+    """
+    last_error = None
+    for attempt in range(max_retries):
+        proxies = _download_proxies()
+        print(f"{'🔗 Usando bypass para download' if proxies else '🌐 Usando conexão direta para'}: {url}")
+        spool = tempfile.SpooledTemporaryFile(max_size=PROVISION_SPOOL_MAX_MB * 1024 * 1024)
+        try:
+            with http_session().get(url, stream=True, timeout=(30, 60), proxies=proxies) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    spool.write(chunk)
+            spool.seek(0)
+            print(f"✅ Successfully downloaded: {url}")
+            return spool
+        except Exception as e:
+            spool.close()
+            last_error = e
+            print(f"⚠️ Attempt {attempt + 1}/{max_retries} failed: {e}")
+            if attempt < max_retries - 1:
+                print(f"Retrying in {retry_delay} seconds...")
+                time.sleep(retry_delay)
+    raise last_error
+
+#==============================================================
+# CACHE DE ARTEFATOS (pacotes dos bots e config.json compartilhado)
+# Cada URL é baixada com GET condicional (ETag/Last-Modified) e guardada por
+# hash sha256 em pinoquio-v2_shared/artifact_cache. Dentro de uma execução,
+# cada URL é consultada no máximo uma vez, mesmo com vários slots em paralelo.
+
+class ArtifactCache:
+    """Cache endereçado por conteúdo: index.json (URL -> metadados) + blobs/<sha256>."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.blobs_dir = os.path.join(directory, "blobs")
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._url_locks = {}
+        self._fetched = {}  # URL -> resultado já obtido nesta execução
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, sha256)
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".index-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _url_lock(self, url):
+        with self._lock:
+            return self._url_locks.setdefault(url, threading.Lock())
+
+    def fetch(self, url, max_retries=3, retry_delay=5):
+        """
+        Retorna (caminho do blob, sha256) do conteúdo atual de `url`,
+        baixando apenas se o servidor indicar que mudou.
+        """
+        with self._url_lock(url):
+            if url in self._fetched:
+                return self._fetched[url]
+            entry = self._index.get(url)
+            if entry and not os.path.exists(self.blob_path(entry["sha256"])):
+                entry = None
+            result = self._fetch_conditional(url, entry, max_retries, retry_delay)
+            self._fetched[url] = result
+            return result
+
+    def _fetch_conditional(self, url, entry, max_retries, retry_delay):
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        last_error = None
+        for attempt in range(max_retries):
+            proxies = _download_proxies()
+            try:
+                with http_session().get(url, headers=headers, stream=True, timeout=(30, 60), proxies=proxies) as response:
+                    if response.status_code == 304 and entry:
+                        print(f"♻️ Sem alterações (cache): {url}")
+                        return self.blob_path(entry["sha256"]), entry["sha256"]
+                    response.raise_for_status()
+
+                    digest = hashlib.sha256()
+                    fd, tmp_path = tempfile.mkstemp(dir=self.blobs_dir, prefix=".download-")
+                    try:
+                        with os.fdopen(fd, "wb") as out:
+                            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                                digest.update(chunk)
+                                out.write(chunk)
+                        sha256 = digest.hexdigest()
+                        os.replace(tmp_path, self.blob_path(sha256))
+                    except BaseException:
+                        if os.path.exists(tmp_path):
+                            os.remove(tmp_path)
+                        raise
+
+                    with self._lock:
+                        previous = self._index.get(url, {}).get("sha256")
+                        self._index[url] = {
+                            "sha256": sha256,
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                            "size": os.path.getsize(self.blob_path(sha256)),
+                            "fetched_at": time.time(),
+                        }
+                        self._save_index()
+                        if previous and previous != sha256:
+                            self._drop_unreferenced(previous)
+                    print(f"✅ Successfully downloaded: {url} ({'sem mudanças de conteúdo' if previous == sha256 else 'novo conteúdo'})")
+                    return self.blob_path(sha256), sha256
+            except Exception as e:
+                last_error = e
+                print(f"⚠️ Attempt {attempt + 1}/{max_retries} failed: {url}: {e}")
+                if attempt < max_retries - 1:
+                    print(f"Retrying in {retry_delay} seconds...")
+                    time.sleep(retry_delay)
+
+        # Sem rede: um blob em cache ainda é melhor que nada
+        if entry:
+            print(f"⚠️ Usando cópia em cache de {url} após falhas no download.")
+            return self.blob_path(entry["sha256"]), entry["sha256"]
+        raise last_error
+
+    def _drop_unreferenced(self, sha256):
+        if any(item.get("sha256") == sha256 for item in self._index.values()):
+            return
+        try:
+            os.remove(self.blob_path(sha256))
+        except OSError:
+            pass
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+def artifact_cache():
+    """Instância do cache de artefatos desta execução (criada no primeiro uso)."""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache(os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared", "artifact_cache"))
+        return _artifact_cache
+
+def _file_crc32(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+def _inside_dir(root, path):
+    return path == root or path.startswith(root + os.sep)
+
+def extract_zip_incremental(zip_source, dest_dir):
+    """
+    Extrai um zip (caminho ou arquivo aberto) em dest_dir pulando arquivos
+    cujo tamanho e CRC já batem com o que está no disco. Cada arquivo é
+    escrito em um temporário e trocado com os.replace, então um arquivo
+    nunca fica pela metade. Retorna (escritos, pulados).
+
+    Nada é escrito fora de dest_dir: symlinks que apontam para fora são
+    recusados, entradas que passam por um symlink criado pelo próprio zip
+    são ignoradas e o diretório de cada arquivo é resolvido (realpath) antes
+    da escrita.
+    """
+    written = skipped = 0
+    dest_root = os.path.realpath(dest_dir)
+    archive_links = set()  # symlinks do zip (criados ou recusados)
+    with zipfile.ZipFile(zip_source) as archive:
+        for info in archive.infolist():
+            # normpath (não realpath): o último componente pode ser um symlink já extraído
+            target = os.path.normpath(os.path.join(dest_root, info.filename))
+            if target == dest_root or not _inside_dir(dest_root, target):
+                print(f"⚠️ Entrada ignorada (fora do destino): {info.filename}")
+                continue
+            parent = os.path.dirname(target)
+            if any(_inside_dir(link, parent) for link in archive_links):
+                print(f"⚠️ Entrada ignorada (passa por symlink do pacote): {info.filename}")
+                continue
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+                if not _inside_dir(dest_root, os.path.realpath(target)):
+                    print(f"⚠️ Entrada ignorada (fora do destino): {info.filename}")
+                continue
+            os.makedirs(parent, exist_ok=True)
+            # Um symlink já existente no caminho pode desviar a escrita para fora
+            if not _inside_dir(dest_root, os.path.realpath(parent)):
+                print(f"⚠️ Entrada ignorada (fora do destino): {info.filename}")
+                continue
+            mode = (info.external_attr >> 16) & 0xFFFF
+
+            if stat.S_ISLNK(mode):
+                link_target = archive.read(info).decode()
+                resolved = os.path.realpath(os.path.join(os.path.realpath(parent), link_target))
+                archive_links.add(target)
+                if not _inside_dir(dest_root, resolved):
+                    print(f"⚠️ Symlink recusado (aponta para fora do destino): {info.filename} -> {link_target}")
+                    continue
+                if os.path.islink(target) and os.readlink(target) == link_target:
+                    skipped += 1
+                    continue
+                tmp_link = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+                os.symlink(link_target, tmp_link)
+                os.replace(tmp_link, target)
+                written += 1
+                continue
+
+            if (
+                os.path.isfile(target) and not os.path.islink(target)
+                and os.path.getsize(target) == info.file_size
+                and _file_crc32(target) == info.CRC
+            ):
+                skipped += 1
+                continue
+
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".extract-")
+            try:
+                with os.fdopen(fd, "wb") as out, archive.open(info) as src:
+                    shutil.copyfileobj(src, out, 1024 * 1024)
+                if mode & 0o777:
+                    os.chmod(tmp_path, mode & 0o777)
+                os.replace(tmp_path, target)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            written += 1
+    return written, skipped
+
+# O cliente do Sheets é criado uma vez por processo e cada aba mantém um
+# índice email -> linha em memória, carregado com uma única leitura da coluna
+# de e-mails e atualizado a cada append.
+SHEETS_INDEX_TTL_SECONDS = float(os.getenv("SHEETS_INDEX_TTL_SECONDS", "1800").strip() or 1800)  # Releitura periódica do índice
+SHEETS_INDEX_MISS_RELOAD_SECONDS = float(os.getenv("SHEETS_INDEX_MISS_RELOAD_SECONDS", "60").strip() or 60)  # Intervalo mínimo entre releituras por e-mail ausente
+
+_sheets_service = None
+_sheets_lock = threading.RLock()  # O cliente (httplib2) não é thread-safe
+_sheet_email_indexes = {}
+
+def _build_sheets_service():
     """Autentica com a Service Account e retorna o serviço da API do Google Sheets."""
     try:
         if os.path.exists(SERVICE_ACCOUNT_FILE):
@@ -189,33 +769,84 @@ def get_sheets_service():
             print("Arquivo serviceaccount.json não encontrado e nenhuma URL fornecida.")
             return None
 
-        service = build('sheets', 'v4', credentials=creds)
+        service = build('sheets', 'v4', credentials=creds, cache_discovery=False)
         return service
     except Exception as e:
         print(f"Erro durante autenticação ou construção do serviço Google Sheets: {type(e).__name__}: {e}")
         return None
 
+def get_sheets_service():
+    """Retorna o serviço da API do Google Sheets, criado uma única vez por processo."""
+    global _sheets_service
+    with _sheets_lock:
+        if _sheets_service is None:
+            _sheets_service = _build_sheets_service()
+        return _sheets_service
+
+class SheetEmailIndex:
+    """Índice email (minúsculo) -> número da linha (base 1) de uma aba."""
+
+    def __init__(self, sheet_name):
+        self.sheet_name = sheet_name
+        self.rows = {}
+        self.loaded_at = None
+
+    def stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > SHEETS_INDEX_TTL_SECONDS
+
+    def recently_loaded(self):
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < SHEETS_INDEX_MISS_RELOAD_SECONDS
+
+    def load(self, service):
+        range_to_read = f'{self.sheet_name}!{EMAIL_COLUMN}:{EMAIL_COLUMN}'
+        result = service.spreadsheets().values().get(
+            spreadsheetId=SPREADSHEET_ID,
+            range=range_to_read
+        ).execute()
+        rows = {}
+        for i, row in enumerate(result.get('values', [])):
+            if row:
+                rows.setdefault(row[0].strip().lower(), i + 1)
+        self.rows = rows
+        self.loaded_at = time.monotonic()
+
+    def add(self, email, row_number):
+        self.rows.setdefault(email.strip().lower(), row_number)
+
+def sheet_email_index(sheet_name):
+    with _sheets_lock:
+        index = _sheet_email_indexes.get(sheet_name)
+        if index is None:
+            index = _sheet_email_indexes[sheet_name] = SheetEmailIndex(sheet_name)
+        return index
+
 def find_row_by_email(service, sheet_name, target_email):
     """
     Encontra o número da linha de um e-mail específico na planilha.
     Retorna o número da linha (base 1) ou None se não encontrado.
     """
     try:
-        range_to_read = f'{sheet_name}!{EMAIL_COLUMN}:{EMAIL_COLUMN}'
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=range_to_read
-        ).execute()
-        values = result.get('values', [])
-        if not values:
-            return None
-        for i, row in enumerate(values):
-            if row and row[0].strip().lower() == target_email.strip().lower():
-                return i + 1
-        return None
+        key = target_email.strip().lower()
+        with _sheets_lock:
+            index = sheet_email_index(sheet_name)
+            if index.stale():
+                index.load(service)
+                return index.rows.get(key)
+            row_number = index.rows.get(key)
+            if row_number is None and not index.recently_loaded():
+                # E-mail novo para o índice: outra execução pode tê-lo adicionado.
+                # Ausências repetidas ('Unknown', contas novas) não releem a coluna a cada chamada.
+                index.load(service)
+                row_number = index.rows.get(key)
+            return row_number
     except Exception:
         return None
 
+def _row_from_range(a1_range):
+    """Número da primeira linha de um intervalo A1 ('ABA!A57:B57' -> 57)."""
+    match = re.search(r'![A-Za-z]*(\d+)', a1_range or "")
+    return int(match.group(1)) if match else None
+
 def append_email_and_points(service, sheet_name, email, points):
     """
     Adiciona um novo e-mail e pontos na próxima linha em branco.
@@ -224,64 +855,115 @@ def append_email_and_points(service, sheet_name, email, points):
     values = [[email, points]]
     body = {'values': values}
     try:
-        service.spreadsheets().values().append(
-            spreadsheetId=SPREADSHEET_ID,
-            range=range_to_append,
-            valueInputOption='RAW',
-            insertDataOption='INSERT_ROWS',
-            body=body
-        ).execute()
+        with _sheets_lock:
+            result = service.spreadsheets().values().append(
+                spreadsheetId=SPREADSHEET_ID,
+                range=range_to_append,
+                valueInputOption='RAW',
+                insertDataOption='INSERT_ROWS',
+                body=body
+            ).execute()
+            row_number = _row_from_range(result.get('updates', {}).get('updatedRange'))
+            if row_number:
+                sheet_email_index(sheet_name).add(email, row_number)
     except Exception:
         pass
 
-def update_points_by_email(email_to_update, new_points, sheet_name):
-    """
-    Atualiza a coluna de pontos para um e-mail específico na planilha.
-    Se o e-mail não existir, adiciona na próxima linha em branco.
-    """
-    service = get_sheets_service()
-    if not service:
-        return
-
-    # Garante que o valor seja numérico
+def _numeric_points(new_points):
+    """Garante que o valor seja numérico."""
     try:
-        numeric_points = int(new_points)
+        return int(new_points)
     except (ValueError, TypeError):
         try:
-            numeric_points = float(new_points)
+            return float(new_points)
         except (ValueError, TypeError):
-            numeric_points = 0  # fallback seguro
+            return 0  # fallback seguro
 
-    row_number = find_row_by_email(service, sheet_name, email_to_update)
+def write_points_batch(sheet_name, points_by_email):
+    """
+    Grava {email: pontos} em uma aba com um único values.batchUpdate para os
+    e-mails já presentes e um único append para os novos. Erros da API são
+    propagados para que o chamador possa tentar de novo.
+    """
+    if not run_lease_is_current():
+        # Fencing: outro host detém a conta; os pontos ficam pendentes no outbox
+        raise RuntimeError("lease da conta perdido")
+    service = get_sheets_service()
+    if not service:
+        raise RuntimeError("Serviço do Google Sheets indisponível")
+
+    with _sheets_lock:
+        index = sheet_email_index(sheet_name)
+        if index.stale():
+            index.load(service)
+        elif any(email.strip().lower() not in index.rows for email in points_by_email):
+            # E-mails novos para o índice: outra execução pode tê-los adicionado
+            index.load(service)
+
+        data, new_rows = [], []
+        for email, points in points_by_email.items():
+            row_number = index.rows.get(email.strip().lower())
+            if row_number:
+                data.append({'range': f'{sheet_name}!{POINTS_COLUMN}{row_number}', 'values': [[points]]})
+            else:
+                new_rows.append([email, points])
 
-    if row_number:
-        range_to_update = f'{sheet_name}!{POINTS_COLUMN}{row_number}'
-        values = [[numeric_points]]
-        body = {'values': values}
-        try:
-            service.spreadsheets().values().update(
+        if data:
+            service.spreadsheets().values().batchUpdate(
+                spreadsheetId=SPREADSHEET_ID,
+                body={'valueInputOption': 'RAW', 'data': data}
+            ).execute()
+        if new_rows:
+            result = service.spreadsheets().values().append(
                 spreadsheetId=SPREADSHEET_ID,
-                range=range_to_update,
+                range=f'{sheet_name}!{EMAIL_COLUMN}:{POINTS_COLUMN}',
                 valueInputOption='RAW',
-                body=body
+                insertDataOption='INSERT_ROWS',
+                body={'values': new_rows}
             ).execute()
-        except Exception:
-            pass
-    else:
-        append_email_and_points(service, sheet_name, email_to_update, numeric_points)
+            first_row = _row_from_range(result.get('updates', {}).get('updatedRange'))
+            if first_row:
+                for offset, (email, _) in enumerate(new_rows):
+                    index.add(email, first_row + offset)
+
+def update_points_by_email(email_to_update, new_points, sheet_name):
+    """
+    Atualiza a coluna de pontos para um e-mail específico na planilha.
+    Se o e-mail não existir, adiciona na próxima linha em branco.
+    """
+    try:
+        write_points_batch(sheet_name, {email_to_update: _numeric_points(new_points)})
+    except Exception:
+        pass
+
+# Write-behind dos pontos: as linhas "Current total"/"Current point count"
+# só registram no outbox o valor mais recente por (aba, e-mail); o worker do
+# outbox grava tudo a cada SHEETS_FLUSH_INTERVAL_SECONDS e no encerramento.
+SHEETS_FLUSH_INTERVAL_SECONDS = float(os.getenv("SHEETS_FLUSH_INTERVAL_SECONDS", "60").strip() or 60)
+
+def queue_points_update(email, points, sheet_name):
+    """Registra os pontos de uma conta para a próxima gravação em lote (não bloqueia)."""
+    record_side_effect(
+        "sheets_points",
+        {"sheet": sheet_name, "email": email, "points": _numeric_points(points)},
+        key=f"points:{sheet_name}:{email.strip().lower()}",
+        latest=True,
+    )
+
+def flush_points_updates(timeout=None):
+    """Grava imediatamente os pontos pendentes (usado no encerramento)."""
+    return drain_outbox(timeout, kinds=["sheets_points"]) == 0
 #==============================================================
 
 # Define o basedir como o diretório atual de execução
 BASEDIR = os.getcwd()
 
+# Pool de slots ativo neste host (ver resolve_bot_slots)
+BOT_SLOTS = resolve_bot_slots()
+
 # Adicionar no início do arquivo, junto com as outras variáveis globais
-bot_pids = {
-    'A': [],
-    'B': [],
-    'C': [],
-    'D': [],
-    'E': []
-}
+bot_pids = {slot: [] for slot in BOT_SLOTS}
+processes = {}  # slot -> Popen do bot em execução (mantido por start_bots)
 is_shutdown_requested = False  # Nova variável global para controlar o estado de desligamento
 
 # Lista global para rastrear bots com contas banidas
@@ -295,289 +977,1642 @@ bing_unreachable_count = 0
 BING_UNREACHABLE_THRESHOLD = 5  # Número de detecções antes de reiniciar o Space
 space_restart_triggered = False  # Flag para evitar múltiplos restarts e flood de mensagens
 
-def clean_account_proxys(account_file):
-    try:
-        # Abre o arquivo e carrega o conteúdo JSON
-        with open(account_file, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-        
-        # Detectar formato: wrapper ou array direto
-        if isinstance(dados, dict) and 'accounts' in dados:
-            # Formato antigo: {'accounts': [...]}
-            accounts_list = dados['accounts']
-        elif isinstance(dados, list):
-            # Formato novo: [...]
-            accounts_list = dados
-        else:
-            print(f"Formato inválido no arquivo {account_file}")
-            return
-        
-        # Modifica o campo 'proxy' para cada item na lista
-        for item in accounts_list:
-            if 'proxy' in item:
-                item['proxy']['url'] = "127.0.0.1"
-                item['proxy']['port'] = 3128
-                item['proxy']['username'] = ""
-                item['proxy']['password'] = ""
-        
-        # Salva o arquivo de volta com as alterações
-        with open(account_file, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=4)
+# Estado de reinício de cada slot (SlotRestartState), mantido por start_bots
+bot_restart_states = {}
 
-        print(f"['{account_file}'] Proxy local ativado para {account_file} com sucesso.")
+#==============================================================
+# DIÁRIO DA EXECUÇÃO (SQLite em modo WAL)
+# Registra transições de estado dos slots, contas concluídas e o estado
+# global (banidos, alertas, contadores) para que uma execução interrompida
+# por crash ou restart do Space retome sem refazer o trabalho já concluído.
 
-    except Exception as e:
-        print(f"Ocorreu um erro: {e}")
+RUN_JOURNAL_PATH = os.getenv("RUN_JOURNAL_PATH", "").strip() or os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared", "run_journal.sqlite3")
 
-def set_socks_proxy(account_file):
-    try:
-        # Abre o arquivo e carrega o conteúdo JSON
-        with open(account_file, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-        
-        # Detectar formato: wrapper ou array direto
-        if isinstance(dados, dict) and 'accounts' in dados:
-            # Formato antigo: {'accounts': [...]}
-            accounts_list = dados['accounts']
-        elif isinstance(dados, list):
-            # Formato novo: [...]
-            accounts_list = dados
-        else:
-            print(f"Formato inválido no arquivo {account_file}")
-            return
-        
-        # Modifica o campo 'proxy' para cada item na lista
-        for item in accounts_list:
-            if 'proxy' in item:
-                item['proxy']['url'] = "127.0.0.1"
-                item['proxy']['port'] = 8099
-                item['proxy']['username'] = ""
-                item['proxy']['password'] = ""
-        
-        # Salva o arquivo de volta com as alterações
-        with open(account_file, 'w', encoding='utf-8') as f:
-            json.dump(dados, f, indent=4)
+# Estados terminais cuja conta não precisa rodar de novo ao retomar
+JOURNAL_FINISHED_STATES = ('completed', 'banned')
 
-        print(f"['{account_file}'] Proxy SOCKS_TO_HTTP ativado para {account_file} com sucesso.")
 
-    except Exception as e:
-        print(f"Ocorreu um erro: {e}")
+class RunJournal:
+    """
+    Diário persistente de uma execução. Uma execução é identificada por
+    run_key; se a última execução com a mesma chave não foi finalizada, ela é
+    retomada em vez de começar do zero.
+    """
 
-# Variável global para DNS customizado, fallback para 8.8.8.8 e 1.1.1.1
-CUSTOM_DNS_SERVERS = [
-    os.getenv("CUSTOM_DNS_SERVER_PRIMARY", "8.8.8.8"),
-    os.getenv("CUSTOM_DNS_SERVER_SECONDARY", "1.1.1.1")
-]
+    def __init__(self, path, run_key):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.run_key = run_key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                run_key TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS slot_events (
+                id INTEGER PRIMARY KEY,
+                run_id INTEGER NOT NULL,
+                slot TEXT NOT NULL,
+                state TEXT NOT NULL,
+                detail TEXT,
+                at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS finished_accounts (
+                run_id INTEGER NOT NULL,
+                email TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                state TEXT NOT NULL,
+                at REAL NOT NULL,
+                PRIMARY KEY (run_id, email)
+            );
+            CREATE TABLE IF NOT EXISTS run_state (
+                run_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (run_id, key)
+            );
+        """)
+        row = self._conn.execute(
+            "SELECT id FROM runs WHERE run_key = ? AND finished_at IS NULL ORDER BY id DESC LIMIT 1",
+            (run_key,),
+        ).fetchone()
+        self.resumed = row is not None
+        if row:
+            self.run_id = row[0]
+        else:
+            self.run_id = self._conn.execute(
+                "INSERT INTO runs (run_key, started_at) VALUES (?, ?)", (run_key, time.time())
+            ).lastrowid
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def record_slot_state(self, slot, state, detail=None):
+        self._execute(
+            "INSERT INTO slot_events (run_id, slot, state, detail, at) VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, slot, state, detail, time.time()),
+        )
 
-def resolve_domain(domain, dns_servers=None):
-    resolver = dns.resolver.Resolver()
-    servers = dns_servers or CUSTOM_DNS_SERVERS
-    last_exception = None
-    for dns_server in servers:
-        try:
-            resolver.nameservers = [dns_server]
-            answer = resolver.resolve(domain, 'A')
-            return answer[0].to_text()
-        except Exception as e:
-            last_exception = e
-            continue
-    raise last_exception or Exception("DNS resolution failed")
+    def record_finished_account(self, email, slot, state):
+        self._execute(
+            "INSERT OR REPLACE INTO finished_accounts (run_id, email, slot, state, at) VALUES (?, ?, ?, ?, ?)",
+            (self.run_id, email, slot, state, time.time()),
+        )
 
-def post_discord_with_custom_dns(webhook_url, data, dns_servers=None):
-    parsed = urlparse(webhook_url)
-    ip = resolve_domain(parsed.hostname, dns_servers or CUSTOM_DNS_SERVERS)
-    url_with_ip = webhook_url.replace(parsed.hostname, ip)
-    headers = {"Host": parsed.hostname, "Content-Type": "application/json"}
-    # Desabilita a verificação SSL (workaround)
-    return requests.post(url_with_ip, headers=headers, json=data, verify=False)
+    def finished_accounts(self):
+        """Retorna {email: estado} das contas já concluídas nesta execução."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email, state FROM finished_accounts WHERE run_id = ?", (self.run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def set_state(self, key, value):
+        self._execute(
+            "INSERT OR REPLACE INTO run_state (run_id, key, value) VALUES (?, ?, ?)",
+            (self.run_id, key, json.dumps(value)),
+        )
 
-def send_discord_redeem_alert(bot_letter, message, discord_webhook_url_br, discord_webhook_url_us):
-    """Envia uma mensagem para o webhook do Discord"""
-    try:
-        # Tentar obter o email da conta do arquivo accounts.json
-        email = "Unknown"
-        session_profile = "Unknown"
-        try:
-            accounts_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "accounts.json")
-            config_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "config.json")
-            
-            # Obter email
-            if os.path.exists(accounts_file):
-                accounts_data = load_json_with_comments(accounts_file)
-                if accounts_data:
-                    email = extract_email_from_accounts(accounts_data)
-            
-            # Obter perfil da sessão e doDailySet
-            check_restrict = "Unknown"
-            if os.path.exists(config_file):
-                config_data = load_json_with_comments(config_file)
-                if config_data:
-                    session_path = config_data.get('sessionPath', '')
-                    if session_path and 'sessions/_' in session_path:
-                        session_profile = session_path.split('sessions/_')[1]
-                    check_restrict = config_data.get("workers", {}).get("doDesktopSearch", "Unknown")
-        except Exception as e:
-            print(f"❌ Erro ao obter informações da conta: {str(e)}")
-        
-        is_multi_br = session_profile.startswith('multi-BR')
-        
-        if is_multi_br:
-            DISCORD_WEBHOOK_URL = discord_webhook_url_br
-            SHEET_NAME = 'REWARDS-BR'
-        else:
-            DISCORD_WEBHOOK_URL = discord_webhook_url_us
-            SHEET_NAME = 'REWARDS-US'
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM run_state WHERE run_id = ? AND key = ?", (self.run_id, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else default
 
-        # Extrair apenas o valor numérico dos pontos da mensagem
-        points = "0"
-        points_int = 0
+    def finish_run(self):
+        self._execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
 
-        if "Current point count:" in message and "Current total:" not in message:
-            # Extrai pontos do "Current point count:"
-            message = message.strip()
-            points_text = message.split("Current point count:")[1].strip()
-            points = ''.join(filter(str.isdigit, points_text))
-            points_int = int(points) if points else 0
-            print(f"📊 CPC Atualizando Planilha: {points_int} para o email: {email}")
-            update_points_by_email(email, points, SHEET_NAME)
-            return
+    def close(self):
+        with self._lock:
+            self._conn.close()
 
-        elif "Current total:" in message and "Current point count:" not in message:
-            # Extrai pontos do "Current total:"
-            message = message.strip()
-            total_text = message.split("Current total:")[1].strip()
-            points = ''.join(filter(str.isdigit, total_text))
-            points_int = int(points) if points else 0
-            print(f"📊 CT: Atualizando Planilha: {points_int} para o email: {email}")
-            update_points_by_email(email, points, SHEET_NAME)
 
+run_journal = None  # RunJournal da execução atual (aberto por open_run_journal)
 
-        # Verificar condições para envio da mensagem        
-        should_send = (is_multi_br and points_int > 6710) or (not is_multi_br and points_int >= 6500)
+def default_run_key():
+    """Chave da execução: conta + modo de configuração + dia (horário de Brasília)."""
+    explicit = os.getenv("RUN_ID", "").strip()
+    if explicit:
+        return explicit
+    today = time.strftime("%Y-%m-%d", time.gmtime(time.time() - 3 * 3600))
+    config_mode = os.getenv("CONFIG_MODE", "DEFAULT_CONFIG").strip()
+    return f"{bot_acc_env}:{config_mode}:{today}"
 
-            
-        # Se doDesktopSearch for False, não envia mensagem
-        if not check_restrict:
-            print("🔕 Conta em Modo Restrição, nenhuma mensagem será enviada.")
-            return
+def open_run_journal(run_key=None, path=None):
+    """
+    Abre (ou retoma) o diário da execução e restaura o estado global salvo:
+    bots banidos, alertas já enviados e o contador de BING.COM UNREACHABLE.
+    """
+    global run_journal, bing_unreachable_count
+    try:
+        run_journal = RunJournal(path or RUN_JOURNAL_PATH, run_key or default_run_key())
+    except sqlite3.Error as e:
+        print(f"⚠️ Não foi possível abrir o diário da execução ({e}). Continuando sem retomada.")
+        run_journal = None
+        return None
 
-        alert_key = f"{session_profile}-{email}"
-        if last_alerts.get(alert_key) == points:
-            print(f"🔁 Alerta duplicado ignorado para {alert_key} ({points} pontos)")
-            return
-        last_alerts[alert_key] = points
+    if run_journal.resumed:
+        banned_bots.update(run_journal.get_state("banned_bots", []))
+        last_alerts.update(run_journal.get_state("last_alerts", {}))
+        last_banned_alerts.update(run_journal.get_state("last_banned_alerts", {}))
+        bing_unreachable_count = run_journal.get_state("bing_unreachable_count", 0)
+        finished = run_journal.finished_accounts()
+        print(f"📓 Retomando execução '{run_journal.run_key}': {len(finished)} conta(s) já concluída(s).")
+    else:
+        print(f"📓 Nova execução '{run_journal.run_key}' registrada em {run_journal.path}")
+    return run_journal
 
-        if should_send:
-            # Formatar a mensagem com o email, perfil e pontos
-            current_time = time.strftime("%d/%m/%Y")
-            flag_emoji = ":flag_br:" if is_multi_br else ":flag_us:"
-            discord_message = f"{flag_emoji} {current_time}: [{session_profile}-{bot_letter}] - {email} - {points} pontos."
-            data = {
-                "content": discord_message
-            }
-            response = post_discord_with_custom_dns(DISCORD_WEBHOOK_URL, data)
-            if response.status_code == 204:
-                print(f"✅ Alerta enviado para o Discord: {email} [{session_profile}-{bot_letter}] - {points} pontos")
-            else:
-                print(f"❌ Erro ao enviar alerta para o Discord: {response.status_code}")
+def journal_state(key, value):
+    """Grava um valor do estado global no diário (se houver diário aberto)."""
+    if run_journal is None:
+        return
+    try:
+        run_journal.set_state(key, value)
+    except sqlite3.Error as e:
+        print(f"⚠️ Erro ao gravar '{key}' no diário: {e}")
+
+def journal_slot_state(slot, state, detail=None):
+    """Registra uma transição de estado de um slot no diário."""
+    if run_journal is None:
+        return
+    try:
+        run_journal.record_slot_state(slot, state, detail)
+        if state in JOURNAL_FINISHED_STATES:
+            email = slot_account_email(slot)
+            if email != 'Unknown':
+                run_journal.record_finished_account(email, slot, state)
+    except sqlite3.Error as e:
+        print(f"⚠️ Erro ao registrar estado do Bot {slot} no diário: {e}")
+
+def slot_account_email(slot):
+    """Email da conta configurada em src/accounts.json de um slot ('Unknown' se não houver)."""
+    return slot_account_info(slot).email
+
+def pending_bot_slots(slots):
+    """
+    Filtra os slots cuja conta já foi concluída nesta execução (segundo o
+    diário), para que uma retomada não refaça trabalho terminado.
+    """
+    if run_journal is None or not run_journal.resumed:
+        return list(slots)
+    finished = run_journal.finished_accounts()
+    pending = []
+    for slot in slots:
+        email = slot_account_email(slot)
+        if email in finished:
+            print(f"⏭️ Bot {slot} ({email}) já concluído nesta execução ({finished[email]}). Pulando.")
         else:
-            print(f"ℹ️ Pontuação atual ({points}) não atingiu o limite para envio de alerta ({6710 if is_multi_br else 6500} pontos)")
-    except Exception as e:
-        print(f"❌ Erro ao enviar alerta para o Discord: {str(e)}")
+            pending.append(slot)
+    return pending
 
-def send_discord_timeout_alert(bot_letter, discord_webhook_url_br, discord_webhook_url_us, last_message="Nenhuma atividade recente"):
-    """Envia uma mensagem para o webhook do Discord quando um bot é encerrado por timeout de inatividade"""
+def finish_run_journal():
+    """Marca a execução atual como finalizada: a próxima abertura começa uma nova."""
+    global run_journal
+    if run_journal is None:
+        return
+    if space_restart_triggered:
+        # O Space vai reiniciar no meio da execução: manter aberta para retomar
+        return
     try:
-        # Obter informações da conta
-        email = "Unknown"
-        session_profile = "Unknown"
-        try:
-            accounts_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "accounts.json")
-            config_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "config.json")
-            
-            # Obter email
-            if os.path.exists(accounts_file):
-                accounts_data = load_json_with_comments(accounts_file)
-                if accounts_data:
-                    email = extract_email_from_accounts(accounts_data)
-            
-            # Obter perfil da sessão
-            if os.path.exists(config_file):
-                config_data = load_json_with_comments(config_file)
-                if config_data:
-                    session_path = config_data.get('sessionPath', '')
-                    if session_path and 'sessions/_' in session_path:
-                        session_profile = session_path.split('sessions/_')[1]
+        run_journal.finish_run()
+        run_journal.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Erro ao finalizar o diário da execução: {e}")
+    run_journal = None
+
+#==============================================================
+# LEASES DE EXECUÇÃO
+# Cada conta só pode rodar em um host por vez. Antes de iniciar, o runner
+# obtém um lease da conta (com TTL) e o renova em segundo plano; cada nova
+# aquisição recebe um token de fencing maior que o anterior, então um host
+# que perdeu o lease (pausa longa, rede caída) percebe antes de gravar.
+#   LEASE_BACKEND=sqlite  -> arquivo SQLite local (um único host)
+#   LEASE_BACKEND=http    -> servidor de leases (lease_server.py) para vários hosts
+#   LEASE_BACKEND=todoist -> só por opção: tarefa no Todoist, sem bloqueio nem fencing
+# Sem LEASE_BACKEND, usa http se LEASE_SERVER_URL estiver definido; senão
+# sqlite, que não impede execuções em hosts diferentes (avisado no início).
+# Se o backend não responder, a conta não roda (LEASE_FAIL_OPEN=1 roda sem lease).
+
+LEASE_SERVER_URL = os.getenv("LEASE_SERVER_URL", "").strip().rstrip("/")
+LEASE_SERVER_TOKEN = os.getenv("LEASE_SERVER_TOKEN", "").strip()
+LEASE_BACKEND = os.getenv("LEASE_BACKEND", "").strip().lower() or ("http" if LEASE_SERVER_URL else "sqlite")
+LEASE_PATH = os.getenv("LEASE_PATH", "").strip() or os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared", "leases.sqlite3")
+LEASE_TTL_SECONDS = float(os.getenv("LEASE_TTL_SECONDS", "300").strip() or 300)
+LEASE_HEARTBEAT_SECONDS = float(os.getenv("LEASE_HEARTBEAT_SECONDS", "60").strip() or 60)
+LEASE_ACQUIRE_ATTEMPTS = int(os.getenv("LEASE_ACQUIRE_ATTEMPTS", "4").strip() or 4)
+LEASE_ACQUIRE_BACKOFF_SECONDS = 2.0  # Espera antes da 2ª tentativa (dobra a cada falha)
+LEASE_FAIL_OPEN = os.getenv("LEASE_FAIL_OPEN", "0").strip().lower() in ("1", "true")
+# Identifica este host: o mesmo Space retoma o próprio lease após um restart
+LEASE_OWNER = os.getenv("LEASE_OWNER", "").strip() or space_repo_id_env or socket.gethostname()
+
+
+class HttpLeaseStore:
+    """Cliente do servidor de leases (lease_server.py), para vários hosts."""
+
+    def __init__(self, url, token=""):
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    def _post(self, name, action, body):
+        response = http_session().post(
+            f"{self.url}/leases/{quote(name, safe='')}/{action}", json=body, headers=self.headers,
+        )
+        if response.status_code not in (200, 409):
+            response.raise_for_status()
+        return response.status_code, response.json()
+
+    def _lease(self, data, sent_at):
+        # O vencimento é recalculado no relógio local (servidor e host podem divergir)
+        return Lease(data["name"], data["owner"], int(data["token"]), sent_at + data["ttl_remaining"])
+
+    def acquire(self, name, owner, ttl):
+        sent_at = time.time()
+        status, data = self._post(name, "acquire", {"owner": owner, "ttl": ttl})
+        if status == 409:
+            raise LeaseHeld(self._lease(data, sent_at))
+        return self._lease(data, sent_at)
+
+    def renew(self, lease, ttl):
+        sent_at = time.time()
+        status, data = self._post(lease.name, "renew", {"token": lease.token, "ttl": ttl})
+        return self._lease(data, sent_at) if status == 200 else None
+
+    def release(self, lease):
+        self._post(lease.name, "release", {"token": lease.token})
+
+    def current(self, name):
+        sent_at = time.time()
+        response = http_session().get(f"{self.url}/leases/{quote(name, safe='')}", headers=self.headers)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return self._lease(response.json(), sent_at)
+
+    def close(self):
+        pass
+
+
+class TodoistLeaseStore:
+    """
+    Marcador antigo: cria a tarefa da conta no Todoist e a conclui no fim.
+    Não bloqueia execuções simultâneas nem tem fencing.
+    """
+
+    def __init__(self):
+        self._leases = {}
+
+    def acquire(self, name, owner, ttl):
+        criar_tarefa(name)
+        lease = self._leases[name] = Lease(name, owner, 0, time.time() + ttl)
+        return lease
+
+    def renew(self, lease, ttl):
+        lease = self._leases[lease.name] = lease._replace(expires_at=time.time() + ttl)
+        return lease
+
+    def release(self, lease):
+        self._leases.pop(lease.name, None)
+        concluir_tarefa(lease.name)
+
+    def current(self, name):
+        return self._leases.get(name)
+
+    def close(self):
+        pass
+
+
+def make_lease_store(backend=None):
+    backend = backend or LEASE_BACKEND
+    if backend == "http":
+        if not LEASE_SERVER_URL:
+            raise ValueError("LEASE_BACKEND=http exige LEASE_SERVER_URL")
+        return HttpLeaseStore(LEASE_SERVER_URL, LEASE_SERVER_TOKEN)
+    if backend == "todoist":
+        return TodoistLeaseStore()
+    if backend in ("sqlite", "file"):
+        return SqliteLeaseStore(LEASE_PATH)
+    raise ValueError(f"LEASE_BACKEND desconhecido: {backend}")
+
+
+class LeaseKeeper:
+    """Renova um lease em segundo plano até ser liberado ou perdido."""
+
+    def __init__(self, store, lease, ttl):
+        self.store = store
+        self.lease = lease
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(min(LEASE_HEARTBEAT_SECONDS, self.ttl / 3)):
+            try:
+                renewed = self.store.renew(self.lease, self.ttl)
+            except Exception as e:
+                # Falha transitória: tenta de novo no próximo ciclo enquanto o lease vale
+                if time.time() < self.lease.expires_at:
+                    print(f"⚠️ Falha ao renovar o lease '{self.lease.name}': {e}")
+                    continue
+                renewed = None
+            if renewed is None:
+                print(f"❌ Lease '{self.lease.name}' perdido (token {self.lease.token}). Outro host pode estar rodando esta conta.")
+                self.lost.set()
+                return
+            self.lease = renewed
+
+    def valid(self):
+        return not self.lost.is_set() and time.time() < self.lease.expires_at
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+run_lease_keeper = None
+
+
+def acquire_run_lease(name, backend=None):
+    """
+    Obtém o lease da conta para esta execução e inicia o heartbeat. Retorna
+    False se outro host está com ele ou se o backend não respondeu após
+    LEASE_ACQUIRE_ATTEMPTS tentativas (com LEASE_FAIL_OPEN=1, roda sem lease).
+    """
+    global run_lease_keeper
+    backend = backend or LEASE_BACKEND
+    if backend in ("sqlite", "file"):
+        print("⚠️⚠️ Leases em SQLite local: só impedem execuções duplicadas NESTE host. "
+              "Para vários hosts/Spaces, configure LEASE_SERVER_URL (lease_server.py).")
+    elif backend == "todoist":
+        print("⚠️⚠️ LEASE_BACKEND=todoist: apenas marca a tarefa, não impede execuções simultâneas.")
+    delay = LEASE_ACQUIRE_BACKOFF_SECONDS
+    for attempt in range(1, max(1, LEASE_ACQUIRE_ATTEMPTS) + 1):
+        try:
+            store = make_lease_store(backend)
+            lease = store.acquire(name, LEASE_OWNER, LEASE_TTL_SECONDS)
+            break
+        except LeaseHeld as e:
+            remaining = max(0, int(e.holder.expires_at - time.time()))
+            print(f"🔒 Conta '{name}' já em execução em {e.holder.owner} (lease expira em {remaining}s).")
+            return False
+        except Exception as e:
+            print(f"⚠️ Backend de leases indisponível ({e}). Tentativa {attempt}/{LEASE_ACQUIRE_ATTEMPTS}.")
+            if attempt < LEASE_ACQUIRE_ATTEMPTS:
+                time.sleep(delay)
+                delay *= 2
+    else:
+        if LEASE_FAIL_OPEN:
+            print("⚠️⚠️ LEASE_FAIL_OPEN=1: continuando SEM lease (sem proteção contra execução duplicada).")
+            return True
+        print(f"❌ Não foi possível obter o lease da conta '{name}'. A conta não será executada.")
+        return False
+    print(f"🔑 Lease '{name}' obtido por {LEASE_OWNER} (token {lease.token}, backend {backend or LEASE_BACKEND}).")
+    run_lease_keeper = LeaseKeeper(store, lease, LEASE_TTL_SECONDS)
+    return True
+
+
+def run_lease_lost():
+    """Verificação local (sem rede): True se o heartbeat perdeu o lease desta execução."""
+    keeper = run_lease_keeper
+    return keeper is not None and not keeper.valid()
+
+
+def run_lease_is_current(verify=False):
+    """
+    Fencing: True se esta execução ainda detém o lease (ou se não há lease).
+    Por padrão usa só o estado mantido pelo heartbeat (sem rede); verify=True
+    confirma o token no backend (usado antes do upload final) e trata falha
+    de comunicação como lease perdido.
+    """
+    keeper = run_lease_keeper
+    if keeper is None:
+        return True
+    if not keeper.valid():
+        return False
+    if not verify:
+        return True
+    try:
+        holder = keeper.store.current(keeper.lease.name)
+    except Exception as e:
+        print(f"⚠️ Não foi possível confirmar o lease '{keeper.lease.name}': {e}")
+        return False
+    return holder is not None and holder.token == keeper.lease.token
+
+
+def release_run_lease():
+    """Libera o lease no fim da execução (mantido se o Space vai reiniciar para retomar)."""
+    global run_lease_keeper
+    keeper = run_lease_keeper
+    if keeper is None:
+        return
+    run_lease_keeper = None
+    keeper.stop()
+    if space_restart_triggered:
+        return
+    try:
+        if not keeper.lost.is_set():
+            keeper.store.release(keeper.lease)
+    except Exception as e:
+        print(f"⚠️ Erro ao liberar o lease '{keeper.lease.name}': {e}")
+    keeper.store.close()
+
+#==============================================================
+# LOGS DOS BOTS
+# Cada slot guarda as últimas linhas em memória (deque de tamanho fixo) e
+# grava toda a saída em um spool em disco com rotação comprimida (gzip) e
+# limite de tamanho, de forma que o uso de memória/disco fica limitado em
+# execuções longas e os alertas podem anexar o contexto real do erro.
+
+BOT_LOG_RING_LINES = int(os.getenv("BOT_LOG_RING_LINES", "200").strip() or 200)  # Linhas mantidas em memória por slot
+BOT_LOG_SPOOL_DIR = os.getenv("BOT_LOG_SPOOL_DIR", "").strip() or os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared", "logs")
+BOT_LOG_SPOOL_MAX_MB = float(os.getenv("BOT_LOG_SPOOL_MAX_MB", "5").strip() or 5)  # Tamanho do log ativo antes de rotacionar
+BOT_LOG_SPOOL_KEEP = int(os.getenv("BOT_LOG_SPOOL_KEEP", "3").strip() or 3)  # Arquivos .gz mantidos por slot
+BOT_LOG_ALERT_CONTEXT_LINES = 15  # Linhas anexadas aos alertas de timeout/max restart
+SUPERVISOR_STDOUT_FLUSH_SECONDS = 1.0  # Flush periódico do stdout (em vez de um por linha)
+DISCORD_MESSAGE_LIMIT = 2000
+
+
+class BotLogSpool:
+    """
+    Spool em disco da saída de um slot: bot_<slot>.log, rotacionado para
+    bot_<slot>.log.1.gz ... .N.gz quando passa de BOT_LOG_SPOOL_MAX_MB.
+    """
+
+    def __init__(self, slot, directory=None, max_bytes=None, keep=None):
+        self.directory = directory or BOT_LOG_SPOOL_DIR
+        self.path = os.path.join(self.directory, f"bot_{slot}.log")
+        self.max_bytes = max_bytes or int(BOT_LOG_SPOOL_MAX_MB * 1024 * 1024)
+        self.keep = BOT_LOG_SPOOL_KEEP if keep is None else keep
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path, "ab", buffering=65536)
+        self._size = self._file.tell()
+
+    def write(self, line):
+        try:
+            if self._file is None:
+                self._open()
+            data = line.encode("utf-8", errors="replace") + b"\n"
+            self._file.write(data)
+            self._size += len(data)
+            if self._size >= self.max_bytes:
+                self.rotate()
+        except OSError as e:
+            print(f"⚠️ Erro ao gravar log em {self.path}: {e}")
+            self.close()
+
+    def rotate(self):
+        self.close()
+        for index in range(self.keep, 1, -1):
+            older = f"{self.path}.{index - 1}.gz"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index}.gz")
+        if self.keep > 0:
+            tmp_path = f"{self.path}.1.gz.tmp"
+            with open(self.path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=1) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp_path, f"{self.path}.1.gz")
+        os.remove(self.path)
+
+    def flush(self):
+        if self._file is not None:
+            try:
+                self._file.flush()
+            except OSError:
+                pass
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+            self._size = 0
+
+def format_log_context(lines, header, limit=DISCORD_MESSAGE_LIMIT):
+    """
+    Monta um bloco de código com as últimas linhas de log que caibam em
+    `limit` caracteres junto com `header` (as mais recentes têm prioridade).
+    """
+    if not lines:
+        return ""
+    fence = "`" * 3
+    budget = limit - len(header) - len(fence) * 2 - 3
+    selected = []
+    for line in reversed(list(lines)[-BOT_LOG_ALERT_CONTEXT_LINES:]):
+        line = line.replace(fence, "'" * 3)
+        if len(line) + 1 > budget:
+            break
+        selected.append(line)
+        budget -= len(line) + 1
+    if not selected:
+        return ""
+    return f"\n{fence}\n" + "\n".join(reversed(selected)) + f"\n{fence}"
+
+#==============================================================
+# AJUSTES DE CONFIGURAÇÃO DOS SLOTS
+# accounts.json e config.json são modificados em memória e gravados uma
+# única vez por arquivo (temporário + os.replace), sem sed nem regravações.
+
+LOCAL_PROXY_PORT = 3128        # Proxy local usado em GEN_COOKIE_CONFIG/DEFAULT_CONFIG_US
+SOCKS_TO_HTTP_PORT = 8099      # Ponte SOCKS -> HTTP quando SOCKS_PROXY está ativo
+
+
+def write_file_atomic(path, data, encoding="utf-8"):
+    """Grava o conteúdo em um temporário no mesmo diretório e o move por cima do destino."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            f.write(data)
+        # mkstemp cria com 0600: mantém as permissões do arquivo substituído
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _apply_account_proxy(dados, port):
+    """
+    Aponta o proxy de todas as contas para 127.0.0.1:port (em memória).
+    Retorna False se o formato do accounts.json não for reconhecido.
+    """
+    # Detectar formato: wrapper ou array direto
+    if isinstance(dados, dict) and 'accounts' in dados:
+        # Formato antigo: {'accounts': [...]}
+        accounts_list = dados['accounts']
+    elif isinstance(dados, list):
+        # Formato novo: [...]
+        accounts_list = dados
+    else:
+        return False
+
+    for item in accounts_list:
+        if 'proxy' in item:
+            item['proxy']['url'] = "127.0.0.1"
+            item['proxy']['port'] = port
+            item['proxy']['username'] = ""
+            item['proxy']['password'] = ""
+    return True
+
+
+def _rewrite_account_proxy(account_file, port):
+    with open(account_file, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    if not _apply_account_proxy(dados, port):
+        raise ValueError(f"Formato inválido no arquivo {account_file}")
+    write_file_atomic(account_file, json.dumps(dados, indent=4))
+
+
+def clean_account_proxys(account_file):
+    try:
+        _rewrite_account_proxy(account_file, LOCAL_PROXY_PORT)
+        print(f"['{account_file}'] Proxy local ativado para {account_file} com sucesso.")
+    except Exception as e:
+        print(f"Ocorreu um erro: {e}")
+
+def set_socks_proxy(account_file):
+    try:
+        _rewrite_account_proxy(account_file, SOCKS_TO_HTTP_PORT)
+        print(f"['{account_file}'] Proxy SOCKS_TO_HTTP ativado para {account_file} com sucesso.")
+    except Exception as e:
+        print(f"Ocorreu um erro: {e}")
+
+
+def account_proxy_port(CONFIG_MODE):
+    """Porta do proxy local que o accounts.json do slot deve usar (None = manter a do pacote)."""
+    port = None
+    if CONFIG_MODE in ("GEN_COOKIE_CONFIG", "DEFAULT_CONFIG_US"):
+        port = LOCAL_PROXY_PORT
+    if SOCKS_PROXY == True:
+        # O SOCKS_TO_HTTP prevalece, como quando os dois ajustes eram aplicados em sequência
+        port = SOCKS_TO_HTTP_PORT
+    return port
+
+
+def patch_slot_config(bot_dir, BOT_ACCOUNT, CONFIG_MODE, config_text=None):
+    """
+    Aplica os ajustes do slot em memória: proxy das contas no accounts.json e
+    troca de _IDCLUSTER por _<BOT_ACCOUNT> no config.json (se config_text for
+    informado). Cada arquivo é gravado no máximo uma vez, atomicamente.
+    Erros são propagados para que o slot seja marcado como falho.
+    """
+    port = account_proxy_port(CONFIG_MODE)
+    if port is not None:
+        _rewrite_account_proxy(os.path.join(bot_dir, "src", "accounts.json"), port)
+    if config_text is not None:
+        write_file_atomic(
+            os.path.join(bot_dir, "src", "config.json"),
+            config_text.replace("_IDCLUSTER", f"_{BOT_ACCOUNT}"),
+        )
+
+#==============================================================
+# SESSÃO HTTP COMPARTILHADA
+# Todas as chamadas externas (Discord, Todoist, ipinfo, downloads) passam por
+# uma única requests.Session: conexões TCP/TLS são reaproveitadas, cada host
+# tem um limite de conexões simultâneas e toda requisição tem timeout.
+
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "10").strip() or 10)
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "30").strip() or 30)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3").strip() or 3)
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5").strip() or 0.5)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10").strip() or 10)  # Conexões por host (padrão)
+
+
+class HttpPolicy(NamedTuple):
+    """Limites e política de repetição aplicados a um host."""
+    max_connections: int          # conexões simultâneas por host (as demais threads aguardam)
+    retry_methods: frozenset      # métodos que podem ser repetidos após resposta de erro
+    retry_statuses: frozenset     # status que disparam nova tentativa (Retry-After é respeitado)
+    custom_dns: bool = False      # conecta no IP resolvido pelos CUSTOM_DNS_SERVERS
+
+
+HTTP_POLICIES = {
+    # Webhooks: só falhas de conexão são repetidas aqui; o 429 (Retry-After) fica
+    # com a fila de notificações, que espera por webhook sem travar os demais.
+    # O DNS do ambiente pode bloquear o Discord, então o IP vem do DNS customizado.
+    "discord": HttpPolicy(4, frozenset({"POST"}), frozenset(), custom_dns=True),
+    # Todoist: leituras e comandos da Sync API (com uuid) são seguros para repetir
+    "todoist": HttpPolicy(2, frozenset({"GET", "POST"}), frozenset({429, 500, 502, 503, 504})),
+    "default": HttpPolicy(HTTP_POOL_MAXSIZE, Retry.DEFAULT_ALLOWED_METHODS, frozenset({429, 500, 502, 503, 504})),
+}
+
+HTTP_HOST_POLICIES = {
+    "https://discord.com/": "discord",
+    "https://discordapp.com/": "discord",
+    "https://api.todoist.com/": "todoist",
+}
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que aplica o timeout padrão quando a chamada não informa um."""
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout or (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS)
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class PinnedHTTPSConnection(HTTPSConnection):
+    """
+    Conexão HTTPS que abre o socket no IP resolvido pelo DNS customizado,
+    mantendo o hostname real para SNI e validação do certificado.
+    """
+    dns_servers = None
+
+    def _new_conn(self):
+        if self._tunnel_host:
+            # Via proxy o CONNECT já leva o hostname; o proxy resolve
+            return super()._new_conn()
+        ip = resolve_domain(self.host, self.dns_servers)
+        try:
+            return urllib3_connection.create_connection(
+                (ip, self.port),
+                self.timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options,
+            )
+        except socket.timeout as e:
+            raise urllib3.exceptions.ConnectTimeoutError(
+                self, f"Connection to {self.host} ({ip}) timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise urllib3.exceptions.NewConnectionError(
+                self, f"Failed to establish a new connection to {self.host} ({ip}): {e}"
+            ) from e
+
+
+class PinnedDNSAdapter(TimeoutHTTPAdapter):
+    """
+    Adapter cujo pool HTTPS é indexado pelo hostname (keep-alive reaproveitado
+    entre posts) e cujas conexões novas vão para o IP do DNS customizado.
+    """
+
+    def __init__(self, *args, dns_servers=None, **kwargs):
+        self.dns_servers = tuple(dns_servers) if dns_servers else None
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        connection_cls = type("PinnedHTTPSConnection", (PinnedHTTPSConnection,), {"dns_servers": self.dns_servers})
+        pool_cls = type("PinnedHTTPSConnectionPool", (HTTPSConnectionPool,), {"ConnectionCls": connection_cls})
+        self.poolmanager.pool_classes_by_scheme = {**self.poolmanager.pool_classes_by_scheme, "https": pool_cls}
+
+
+def http_adapter(policy_name, dns_servers=None):
+    policy = HTTP_POLICIES[policy_name]
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,  # falha de conexão: a requisição não chegou ao servidor
+        read=0,
+        status=HTTP_MAX_RETRIES,
+        allowed_methods=policy.retry_methods,
+        status_forcelist=policy.retry_statuses,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        # Sem status repetíveis, um 429 com Retry-After também não pode dormir aqui
+        respect_retry_after_header=bool(policy.retry_statuses),
+        raise_on_status=False,
+    )
+    adapter_kwargs = dict(
+        pool_connections=4,
+        pool_maxsize=policy.max_connections,
+        pool_block=True,
+        max_retries=retry,
+    )
+    if policy.custom_dns:
+        return PinnedDNSAdapter(dns_servers=dns_servers, **adapter_kwargs)
+    return TimeoutHTTPAdapter(**adapter_kwargs)
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def http_session():
+    """Retorna a requests.Session compartilhada (criada na primeira chamada)."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                session = requests.Session()
+                session.mount("http://", http_adapter("default"))
+                session.mount("https://", http_adapter("default"))
+                for prefix, policy_name in HTTP_HOST_POLICIES.items():
+                    session.mount(prefix, http_adapter(policy_name))
+                    _http_mounts[prefix] = (policy_name, None)
+                _http_session = session
+    return _http_session
+
+
+_http_mounts = {}
+
+
+def mount_http_policy(prefix, policy_name, dns_servers=None):
+    """Associa um prefixo de URL (ex.: outro host de webhook) à política de um host."""
+    session = http_session()
+    mount = (policy_name, tuple(dns_servers) if dns_servers else None)
+    with _http_session_lock:
+        if _http_mounts.get(prefix) != mount:
+            _http_mounts[prefix] = mount
+            session.mount(prefix, http_adapter(policy_name, dns_servers))
+
+# Variável global para DNS customizado, fallback para 8.8.8.8 e 1.1.1.1
+CUSTOM_DNS_SERVERS = [
+    os.getenv("CUSTOM_DNS_SERVER_PRIMARY", "8.8.8.8"),
+    os.getenv("CUSTOM_DNS_SERVER_SECONDARY", "1.1.1.1")
+]
+
+DNS_QUERY_TIMEOUT_SECONDS = float(os.getenv("DNS_QUERY_TIMEOUT_SECONDS", "3").strip() or 3)
+DNS_CACHE_MIN_TTL_SECONDS = float(os.getenv("DNS_CACHE_MIN_TTL_SECONDS", "30").strip() or 30)
+DNS_CACHE_MAX_TTL_SECONDS = float(os.getenv("DNS_CACHE_MAX_TTL_SECONDS", "3600").strip() or 3600)
+DNS_PREFETCH_RATIO = float(os.getenv("DNS_PREFETCH_RATIO", "0.8").strip() or 0.8)  # Fração do TTL após a qual renova em segundo plano
+
+
+class DnsCacheEntry(NamedTuple):
+    ip: str
+    resolved_at: float
+    expires_at: float
+
+
+class DnsCache:
+    """
+    Cache de resolução DNS do processo. Respeita o TTL dos registros,
+    consulta todos os servidores configurados em paralelo (vale a primeira
+    resposta) e renova em segundo plano entradas perto de expirar. Se todos
+    os servidores falharem, devolve o último IP conhecido.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="dns")
+            return self._pool
+
+    def _domain_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _query(domain, dns_server):
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = [dns_server]
+        resolver.lifetime = DNS_QUERY_TIMEOUT_SECONDS
+        answer = resolver.resolve(domain, 'A')
+        return answer[0].to_text(), answer.rrset.ttl
+
+    def _race(self, domain, servers):
+        """Consulta todos os servidores ao mesmo tempo e retorna a primeira resposta válida."""
+        pool = self._executor()
+        pending = {pool.submit(self._query, domain, server) for server in servers}
+        last_exception = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_exception = e
+        raise last_exception or Exception("DNS resolution failed")
+
+    def _refresh(self, key):
+        """Resolve e grava a entrada. O chamador deve segurar o lock do domínio."""
+        domain, servers = key
+        ip, ttl = self._race(domain, servers)
+        now = time.monotonic()
+        ttl = min(max(ttl, DNS_CACHE_MIN_TTL_SECONDS), DNS_CACHE_MAX_TTL_SECONDS)
+        entry = DnsCacheEntry(ip, now, now + ttl)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def _prefetch(self, key):
+        try:
+            with self._domain_lock(key):
+                self._refresh(key)
+        except Exception as e:
+            print(f"⚠️ Falha ao renovar DNS de {key[0]} em segundo plano: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def resolve(self, domain, servers):
+        key = (domain, tuple(servers))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and now < entry.expires_at:
+            prefetch_at = entry.resolved_at + (entry.expires_at - entry.resolved_at) * DNS_PREFETCH_RATIO
+            if now >= prefetch_at:
+                with self._lock:
+                    start_prefetch = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start_prefetch:
+                    threading.Thread(target=self._prefetch, args=(key,), daemon=True).start()
+            return entry.ip
+
+        with self._domain_lock(key):
+            # Outra thread pode ter resolvido enquanto esperávamos o lock
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and time.monotonic() < entry.expires_at:
+                return entry.ip
+            try:
+                return self._refresh(key).ip
+            except Exception:
+                if entry:
+                    print(f"⚠️ DNS indisponível para {domain}. Usando último IP conhecido {entry.ip}.")
+                    return entry.ip
+                raise
+
+
+dns_cache = DnsCache()
+
+
+def resolve_domain(domain, dns_servers=None):
+    return dns_cache.resolve(domain, dns_servers or CUSTOM_DNS_SERVERS)
+
+def post_discord_with_custom_dns(webhook_url, data, dns_servers=None):
+    """
+    Posta no webhook conectando no IP do DNS customizado, com SNI e
+    certificado validados para o hostname real e conexão reaproveitada.
+    """
+    parsed = urlparse(webhook_url)
+    mount_http_policy(f"{parsed.scheme}://{parsed.netloc}/", "discord", dns_servers)
+    return http_session().post(webhook_url, json=data)
+
+#==============================================================
+# SAÍDA DURÁVEL (OUTBOX)
+# Todo efeito externo (post no Discord, pontos na planilha, tarefas do
+# Todoist) é gravado primeiro em um SQLite local com uma chave de
+# idempotência e só depois entregue por um worker em segundo plano. Quem
+# chama nunca espera a rede, e o que não foi entregue antes de um crash ou
+# restart do Space é reenviado pela próxima execução.
+
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "").strip() or os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared", "outbox.sqlite3")
+OUTBOX_DRAIN_INTERVAL_SECONDS = float(os.getenv("OUTBOX_DRAIN_INTERVAL_SECONDS", "15").strip() or 15)
+OUTBOX_RETRY_BASE_SECONDS = 5.0
+OUTBOX_RETRY_MAX_SECONDS = 600.0
+OUTBOX_KEEP_DELIVERED_DAYS = 7
+
+
+class OutboxEntry(NamedTuple):
+    id: int
+    kind: str
+    key: str
+    payload: dict
+    revision: int
+    attempts: int
+    next_attempt_at: float = 0.0
+
+
+class OutboxPermanentError(Exception):
+    """Erro que não melhora com nova tentativa (a entrada é descartada)."""
+
+
+class Outbox:
+    """Fila persistente de efeitos externos (SQLite em modo WAL)."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                kind TEXT NOT NULL,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                revision INTEGER NOT NULL DEFAULT 1,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                delivered_at REAL,
+                dead_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS outbox_due ON outbox (kind, delivered_at, dead_at, next_attempt_at);
+        """)
+        self._execute(
+            "DELETE FROM outbox WHERE delivered_at IS NOT NULL AND delivered_at < ?",
+            (time.time() - OUTBOX_KEEP_DELIVERED_DAYS * 86400,),
+        )
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def add(self, kind, payload, key=None):
+        """Registra um efeito novo. Retorna o id, ou None se a chave já foi registrada."""
+        now = time.time()
+        cursor = self._execute(
+            "INSERT OR IGNORE INTO outbox (kind, idempotency_key, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)",
+            (kind, key or uuid.uuid4().hex, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def put_latest(self, kind, key, payload):
+        """
+        Registra o valor mais recente de uma chave: substitui o pendente ou
+        reabre a entrada já entregue se o valor mudou.
+        """
+        now = time.time()
+        self._execute(
+            """
+            INSERT INTO outbox (kind, idempotency_key, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(idempotency_key) DO UPDATE SET
+                payload = excluded.payload,
+                revision = outbox.revision + 1,
+                attempts = 0,
+                next_attempt_at = excluded.next_attempt_at,
+                last_error = NULL,
+                delivered_at = NULL,
+                dead_at = NULL
+            WHERE outbox.payload != excluded.payload OR outbox.delivered_at IS NULL
+            """,
+            (kind, key, json.dumps(payload, ensure_ascii=False), now, now),
+        )
+
+    def due(self, kind, now=None, limit=500):
+        """Entradas pendentes de um tipo, em ordem de registro (now=None ignora o backoff)."""
+        sql = "SELECT id, kind, idempotency_key, payload, revision, attempts, next_attempt_at FROM outbox WHERE kind = ? AND delivered_at IS NULL AND dead_at IS NULL"
+        params = [kind]
+        if now is not None:
+            sql += " AND next_attempt_at <= ?"
+            params.append(now)
+        sql += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [OutboxEntry(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5], row[6]) for row in rows]
+
+    def pending_count(self, kinds=None):
+        sql = "SELECT COUNT(*) FROM outbox WHERE delivered_at IS NULL AND dead_at IS NULL"
+        params = ()
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params = tuple(kinds)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    # As marcações só valem para a revisão entregue: um valor mais novo
+    # gravado por put_latest durante a entrega continua pendente.
+    def mark_delivered(self, entries):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET delivered_at = ?, last_error = NULL WHERE id = ? AND revision = ?",
+                [(now, entry.id, entry.revision) for entry in entries],
+            )
+
+    def mark_failed(self, entries, error):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE id = ? AND revision = ?",
+                [
+                    (now + min(OUTBOX_RETRY_MAX_SECONDS, OUTBOX_RETRY_BASE_SECONDS * (2 ** entry.attempts)), str(error)[:500], entry.id, entry.revision)
+                    for entry in entries
+                ],
+            )
+
+    def mark_dead(self, entries, error):
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET dead_at = ?, last_error = ? WHERE id = ? AND revision = ?",
+                [(now, str(error)[:500], entry.id, entry.revision) for entry in entries],
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def outbox():
+    """Outbox do processo (aberto na primeira chamada)."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox(OUTBOX_PATH)
+    return _outbox
+
+
+def _drain_sheets_points(entries):
+    """Uma gravação em lote por aba com o valor mais recente de cada e-mail."""
+    by_sheet = {}
+    for entry in entries:
+        by_sheet.setdefault(entry.payload["sheet"], []).append(entry)
+    for sheet_name, sheet_entries in by_sheet.items():
+        points_by_email = {entry.payload["email"]: entry.payload["points"] for entry in sheet_entries}
+        try:
+            write_points_batch(sheet_name, points_by_email)
         except Exception as e:
-            print(f"❌ Erro ao obter informações da conta: {str(e)}")
+            print(f"⚠️ Falha ao gravar pontos na planilha {sheet_name}: {e}. Nova tentativa mais tarde.")
+            outbox().mark_failed(sheet_entries, e)
+            continue
+        outbox().mark_delivered(sheet_entries)
+        print(f"📊 Planilha {sheet_name}: {len(points_by_email)} conta(s) atualizada(s) em lote.")
+
+
+def _drain_todoist(entries):
+    """Ações do Todoist em lote e em ordem; para na primeira falha para não inverter criar/concluir."""
+    for entry, status in todoist_client.apply(entries):
+        if isinstance(status, OutboxPermanentError):
+            print(f"❌ Ação do Todoist descartada ({entry.payload.get('action')} '{entry.payload.get('name')}'): {status}")
+            outbox().mark_dead([entry], status)
+        elif isinstance(status, Exception):
+            # Fica em backoff e segura as entradas seguintes (entrega ordenada)
+            print(f"⚠️ Falha no Todoist ({entry.payload.get('action')} '{entry.payload.get('name')}'): {status}. Nova tentativa mais tarde.")
+            outbox().mark_failed([entry], status)
+        else:
+            outbox().mark_delivered([entry])
+
+
+class OutboxHandler(NamedTuple):
+    deliver: object    # função que recebe a lista de OutboxEntry
+    interval: object   # função -> intervalo mínimo (s) entre entregas do tipo
+    ordered: bool      # entrega estritamente na ordem de registro
+
+
+# Mensagens do Discord são entregues pela fila de notificações.
+OUTBOX_HANDLERS = {
+    "sheets_points": OutboxHandler(_drain_sheets_points, lambda: SHEETS_FLUSH_INTERVAL_SECONDS, False),
+    "todoist": OutboxHandler(_drain_todoist, lambda: 0.0, True),
+}
+
+
+class OutboxDrainer:
+    """Worker que entrega periodicamente as entradas pendentes do outbox."""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._last_drain = {}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="outbox-drain", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(OUTBOX_DRAIN_INTERVAL_SECONDS)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"⚠️ Erro ao esvaziar o outbox: {e}")
+
+    def drain(self, kinds=None, force=False):
+        """
+        Entrega o que estiver vencido (force=True ignora intervalos e backoff).
+        Retorna False se nada pôde sair por falta do lease da conta.
+        """
+        if not run_lease_is_current():
+            # Fencing: sem o lease da conta, nada sai daqui (fica para a próxima execução)
+            return False
+        with self._drain_lock:
+            for kind in kinds or OUTBOX_HANDLERS:
+                handler = OUTBOX_HANDLERS[kind]
+                now = time.time()
+                # A primeira janela conta a partir do primeiro ciclo (agrupa desde o início)
+                if not force and now - self._last_drain.setdefault(kind, now) < handler.interval():
+                    continue
+                self._last_drain[kind] = now
+                if handler.ordered:
+                    # Uma entrada em backoff segura as seguintes (ex.: concluir só depois de criar)
+                    entries = outbox().due(kind)
+                    if not force:
+                        waiting = next((i for i, entry in enumerate(entries) if entry.next_attempt_at > now), len(entries))
+                        entries = entries[:waiting]
+                else:
+                    entries = outbox().due(kind, None if force else now)
+                if entries:
+                    handler.deliver(entries)
+        return True
+
+
+outbox_drainer = OutboxDrainer()
+
+
+def record_side_effect(kind, payload, key=None, latest=False):
+    """
+    Grava um efeito externo no outbox e acorda o worker. Com latest=True a
+    chave guarda só o valor mais recente (ex.: pontos de uma conta).
+    """
+    if latest:
+        outbox().put_latest(kind, key, payload)
+    else:
+        outbox().add(kind, payload, key)
+    outbox_drainer.wake()
+
+
+def start_outbox():
+    """Inicia a entrega em segundo plano e reenvia o que ficou pendente de execuções anteriores."""
+    pending = outbox().pending_count()
+    if pending:
+        print(f"📤 {pending} efeito(s) pendente(s) no outbox serão reenviados.")
+    outbox_drainer.wake()
+    notification_queue.start()
+
+
+def drain_outbox(timeout=None, kinds=None):
+    """
+    Tenta entregar tudo o que está pendente (usado no encerramento). Retorna
+    quantas entradas continuam pendentes; elas ficam para a próxima execução.
+    """
+    deadline = time.monotonic() + (NOTIFY_FLUSH_TIMEOUT_SECONDS if timeout is None else timeout)
+    kinds = list(kinds or OUTBOX_HANDLERS)
+    while True:
+        drained = outbox_drainer.drain(kinds, force=True)
+        remaining = outbox().pending_count(kinds)
+        if not drained:
+            print(f"🔒 Lease da conta perdido: {remaining} efeito(s) mantidos no outbox.")
+            return remaining
+        if not remaining or time.monotonic() >= deadline:
+            if remaining:
+                print(f"💾 {remaining} efeito(s) continuam no outbox para a próxima execução.")
+            return remaining
+        time.sleep(min(2.0, max(0.0, deadline - time.monotonic())))
+
+#==============================================================
+# FILA DE NOTIFICAÇÕES DO DISCORD
+# Um único worker entrega as mensagens: as que chegam para o mesmo webhook
+# dentro de uma janela curta viram um só post e limites de taxa (429 e
+# cabeçalhos X-RateLimit) são respeitados. Cada mensagem é registrada no
+# outbox antes de entrar na fila; o que não for entregue é reenviado na
+# próxima execução.
+
+NOTIFY_QUEUE_MAX = int(os.getenv("NOTIFY_QUEUE_MAX", "1000").strip() or 1000)
+NOTIFY_COALESCE_SECONDS = float(os.getenv("NOTIFY_COALESCE_SECONDS", "1.5").strip() or 1.5)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "5").strip() or 5)
+NOTIFY_RETRY_BASE_SECONDS = 2.0
+NOTIFY_FLUSH_TIMEOUT_SECONDS = float(os.getenv("NOTIFY_FLUSH_TIMEOUT_SECONDS", "30").strip() or 30)
+
+
+class PendingNotification(NamedTuple):
+    content: str
+    attempts: int
+    queued_at: float
+    outbox_id: Optional[int] = None
+
+
+def _discord_retry_after(response):
+    """Segundos até o webhook aceitar novos posts, segundo a resposta do Discord."""
+    if response.status_code == 429:
+        header = response.headers.get("Retry-After")
+        try:
+            return float(header) if header else float(response.json().get("retry_after", 1))
+        except (ValueError, AttributeError):
+            return 1.0
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return float(response.headers.get("X-RateLimit-Reset-After", 0))
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+class NotificationQueue:
+    """Fila limitada de mensagens do Discord com um worker de entrega."""
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=NOTIFY_QUEUE_MAX)
+        self._pending = {}      # webhook -> deque de PendingNotification
+        self._ready_at = {}     # webhook -> time.monotonic() em que pode voltar a postar
+        self._outstanding = 0   # mensagens aceitas e ainda não entregues/adiadas
+        self._held = set()      # ids do outbox que estão na memória da fila
+        self._next_poll = 0.0   # próxima releitura do outbox (entradas adiadas ou que não couberam)
+        self._flushing = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="discord-notify", daemon=True)
+        self._load_pending(startup=True)
+        self._thread.start()
+
+    def enqueue(self, webhook_url, content, key=None):
+        """
+        Registra a mensagem no outbox e a agenda. key identifica o evento (o
+        padrão é um envio novo a cada chamada); um evento já registrado não é
+        reenviado. Retorna False se a mensagem não foi aceita agora (evento
+        repetido, ou fila cheia: fica no outbox para depois).
+        """
+        if not webhook_url:
+            print("⚠️ URL do webhook do Discord não configurada. Mensagem não enviada.")
+            return False
+        self.start()
+        key = f"discord:{key}" if key else f"discord:{uuid.uuid4().hex}"
+        # Registro e marcação como "em memória" juntos: a releitura periódica não duplica a mensagem
+        with self._condition:
+            try:
+                outbox_id = outbox().add("discord", {"webhook": webhook_url, "content": content}, key)
+                if outbox_id is None:
+                    print("🔁 Evento já registrado para este webhook. Ignorado.")
+                    return False
+            except sqlite3.Error as e:
+                print(f"⚠️ Outbox indisponível ({e}). Mensagem enviada sem persistência.")
+                outbox_id = None
+            self._outstanding += 1
+            if outbox_id:
+                self._held.add(outbox_id)
+        try:
+            self._queue.put_nowait((webhook_url, PendingNotification(content, 0, time.monotonic(), outbox_id)))
+            return True
+        except queue.Full:
+            print("⚠️ Fila de notificações cheia. Mensagem mantida no outbox para reenvio posterior.")
+            self._settle(1, [outbox_id])
+            return False
+
+    def flush(self, timeout=None):
+        """
+        Entrega tudo sem esperar a janela de agrupamento. O que ainda estiver
+        pendente ao fim do timeout fica no outbox. Retorna True se esvaziou.
+        """
+        if self._thread is None:
+            return True
+        timeout = NOTIFY_FLUSH_TIMEOUT_SECONDS if timeout is None else timeout
+        with self._condition:
+            self._flushing = True
+        self._queue.put((None, None))  # acorda o worker
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._outstanding > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._flushing = False
+            drained = self._outstanding == 0
+        if not drained:
+            self._queue.put((None, "defer"))
+            with self._condition:
+                self._condition.wait_for(lambda: self._outstanding == 0, timeout=5)
+        return drained
+
+    def _settle(self, count, outbox_ids=()):
+        with self._condition:
+            self._outstanding -= count
+            self._held.difference_update(outbox_ids)
+            self._condition.notify_all()
+
+    @staticmethod
+    def _outbox_entries(items):
+        return [OutboxEntry(item.outbox_id, "discord", "", {}, 1, item.attempts) for item in items if item.outbox_id]
+
+    def _defer(self, items, error):
+        """Desiste por ora: as mensagens continuam pendentes no outbox."""
+        try:
+            outbox().mark_failed(self._outbox_entries(items), error)
+        except sqlite3.Error as e:
+            print(f"❌ Não foi possível registrar {len(items)} notificação(ões) adiadas: {e}")
+        self._settle(len(items), [item.outbox_id for item in items])
+
+    def _complete(self, items, delivered=True, error=None):
+        try:
+            if delivered:
+                outbox().mark_delivered(self._outbox_entries(items))
+            else:
+                outbox().mark_dead(self._outbox_entries(items), error)
+        except sqlite3.Error as e:
+            print(f"⚠️ Não foi possível atualizar o outbox: {e}")
+        self._settle(len(items), [item.outbox_id for item in items])
+
+    def _load_pending(self, startup=False):
+        """
+        Reagenda as mensagens pendentes no outbox que não estão na memória:
+        na inicialização, as de execuções anteriores; depois, periodicamente,
+        as adiadas (respeitando o backoff) ou que não couberam na fila.
+        """
+        try:
+            entries = outbox().due("discord", None if startup else time.time(), limit=NOTIFY_QUEUE_MAX)
+        except sqlite3.Error as e:
+            print(f"⚠️ Não foi possível ler notificações pendentes: {e}")
+            return
+        now = time.monotonic()
+        with self._condition:
+            entries = [entry for entry in entries if entry.id not in self._held]
+            for entry in entries:
+                self._pending.setdefault(entry.payload["webhook"], deque()).append(
+                    PendingNotification(entry.payload["content"], 0, now, entry.id)
+                )
+                self._held.add(entry.id)
+                self._outstanding += 1
+        if entries:
+            origin = "de execuções anteriores" if startup else "pendentes no outbox"
+            print(f"📨 {len(entries)} notificação(ões) {origin} reagendadas.")
+
+    def _next_wakeup(self, now):
+        wakeups = [self._next_poll]
+        for webhook, items in self._pending.items():
+            if items:
+                window_end = now if self._flushing else items[0].queued_at + NOTIFY_COALESCE_SECONDS
+                wakeups.append(max(self._ready_at.get(webhook, 0.0), window_end))
+        return max(0.0, min(wakeups) - now)
+
+    def _run(self):
+        self._next_poll = time.monotonic() + OUTBOX_DRAIN_INTERVAL_SECONDS
+        while True:
+            try:
+                webhook, item = self._queue.get(timeout=self._next_wakeup(time.monotonic()))
+                while True:
+                    if webhook is not None:
+                        self._pending.setdefault(webhook, deque()).append(item)
+                    elif item == "defer":
+                        for items in self._pending.values():
+                            if items:
+                                self._defer(list(items), "entrega adiada no encerramento")
+                                items.clear()
+                    webhook, item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self._next_poll = now + OUTBOX_DRAIN_INTERVAL_SECONDS
+                self._load_pending()
+            for webhook, items in self._pending.items():
+                if not items or now < self._ready_at.get(webhook, 0.0):
+                    continue
+                if self._flushing or now >= items[0].queued_at + NOTIFY_COALESCE_SECONDS or self._batch_full(items):
+                    self._deliver(webhook, items)
+
+    @staticmethod
+    def _batch_full(items):
+        return sum(len(item.content) + 1 for item in items) > DISCORD_MESSAGE_LIMIT
+
+    def _deliver(self, webhook, items):
+        # Monta o maior lote que cabe em uma mensagem do Discord
+        batch = [items.popleft()]
+        length = len(batch[0].content)
+        while items and length + 1 + len(items[0].content) <= DISCORD_MESSAGE_LIMIT:
+            length += 1 + len(items[0].content)
+            batch.append(items.popleft())
+        content = "\n".join(item.content for item in batch)[:DISCORD_MESSAGE_LIMIT]
+
+        if run_lease_lost():
+            # Fencing: outro host detém a conta; as mensagens ficam no outbox
+            self._defer(batch, "lease da conta perdido")
+            return
+
+        try:
+            response = post_discord_with_custom_dns(webhook, {"content": content})
+            status = response.status_code
+        except Exception as e:
+            response, status = None, None
+            print(f"❌ Falha ao entregar {len(batch)} notificação(ões) ao Discord: {e}")
+
+        now = time.monotonic()
+        if response is not None:
+            retry_after = _discord_retry_after(response)
+            if status == 429:
+                # Retry-After zerado ou ilegível: ainda assim esperar, senão o lote volta em loop
+                retry_after = max(retry_after, NOTIFY_RETRY_BASE_SECONDS)
+            if retry_after:
+                self._ready_at[webhook] = now + retry_after
+            if status == 429:
+                print(f"⏳ Discord limitou o webhook. Novo envio em {retry_after:.1f}s.")
+                items.extendleft(reversed(batch))
+                return
+            if 200 <= status < 300:
+                print(f"✅ {len(batch)} notificação(ões) entregue(s) ao Discord.")
+                self._complete(batch)
+                return
+            print(f"❌ Discord recusou {len(batch)} notificação(ões): {status}")
+            if 400 <= status < 500:
+                # Erro do pedido (webhook removido, conteúdo inválido): repetir não adianta
+                self._complete(batch, delivered=False, error=f"HTTP {status}")
+                return
+
+        attempts = batch[0].attempts + 1
+        if attempts >= NOTIFY_MAX_ATTEMPTS:
+            print(f"💾 {len(batch)} notificação(ões) mantidas no outbox após {attempts} tentativas.")
+            self._defer(batch, f"{attempts} tentativas sem sucesso")
+            return
+        self._ready_at[webhook] = now + NOTIFY_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        items.extendleft(reversed([item._replace(attempts=attempts) for item in batch]))
+
+
+notification_queue = NotificationQueue()
+
+
+def notify_discord(webhook_url, content, key=None):
+    """
+    Agenda uma mensagem para o webhook (entrega assíncrona pela fila de
+    notificações). key opcional identifica o evento para não enviá-lo duas vezes.
+    """
+    return notification_queue.enqueue(webhook_url, content, key)
+
+
+def flush_notifications(timeout=None):
+    """Aguarda a entrega das notificações pendentes (o restante fica no outbox)."""
+    return notification_queue.flush(timeout)
+
+def send_discord_redeem_alert(bot_letter, message, discord_webhook_url_br, discord_webhook_url_us):
+    """Envia uma mensagem para o webhook do Discord"""
+    try:
+        # Dados da conta do slot (cache invalidado pelo mtime dos arquivos)
+        account = slot_account_info(bot_letter)
+        email = account.email
+        session_profile = account.session_profile
+        check_restrict = account.check_restrict
+        
+        is_multi_br = account.is_multi_br
+        DISCORD_WEBHOOK_URL = account.webhook(discord_webhook_url_br, discord_webhook_url_us)
+        SHEET_NAME = account.sheet_name
+
+        # Extrair apenas o valor numérico dos pontos da mensagem
+        points = "0"
+        points_int = 0
+
+        if "Current point count:" in message and "Current total:" not in message:
+            # Extrai pontos do "Current point count:"
+            message = message.strip()
+            points_text = message.split("Current point count:")[1].strip()
+            points = ''.join(filter(str.isdigit, points_text))
+            points_int = int(points) if points else 0
+            print(f"📊 CPC Atualizando Planilha: {points_int} para o email: {email}")
+            queue_points_update(email, points, SHEET_NAME)
+            return
+
+        elif "Current total:" in message and "Current point count:" not in message:
+            # Extrai pontos do "Current total:"
+            message = message.strip()
+            total_text = message.split("Current total:")[1].strip()
+            points = ''.join(filter(str.isdigit, total_text))
+            points_int = int(points) if points else 0
+            print(f"📊 CT: Atualizando Planilha: {points_int} para o email: {email}")
+            queue_points_update(email, points, SHEET_NAME)
+
+
+        # Verificar condições para envio da mensagem        
+        should_send = (is_multi_br and points_int > 6710) or (not is_multi_br and points_int >= 6500)
+
+            
+        # Se doDesktopSearch for False, não envia mensagem
+        if not check_restrict:
+            print("🔕 Conta em Modo Restrição, nenhuma mensagem será enviada.")
+            return
+
+        alert_key = f"{session_profile}-{email}"
+        if last_alerts.get(alert_key) == points:
+            print(f"🔁 Alerta duplicado ignorado para {alert_key} ({points} pontos)")
+            return
+        last_alerts[alert_key] = points
+        journal_state("last_alerts", dict(last_alerts))
+
+        if should_send:
+            # Formatar a mensagem com o email, perfil e pontos
+            current_time = time.strftime("%d/%m/%Y")
+            flag_emoji = ":flag_br:" if is_multi_br else ":flag_us:"
+            discord_message = f"{flag_emoji} {current_time}: [{session_profile}-{bot_letter}] - {email} - {points} pontos."
+            if notify_discord(DISCORD_WEBHOOK_URL, discord_message):
+                print(f"📨 Alerta enfileirado para o Discord: {email} [{session_profile}-{bot_letter}] - {points} pontos")
+        else:
+            print(f"ℹ️ Pontuação atual ({points}) não atingiu o limite para envio de alerta ({6710 if is_multi_br else 6500} pontos)")
+    except Exception as e:
+        print(f"❌ Erro ao enviar alerta para o Discord: {str(e)}")
+
+def send_discord_timeout_alert(bot_letter, discord_webhook_url_br, discord_webhook_url_us, last_message="Nenhuma atividade recente", context_lines=None):
+    """Envia uma mensagem para o webhook do Discord quando um bot é encerrado por timeout de inatividade"""
+    try:
+        # Dados da conta do slot (cache invalidado pelo mtime dos arquivos)
+        account = slot_account_info(bot_letter)
+        email = account.email
+        session_profile = account.session_profile
         
         # Determinar webhook baseado no perfil
-        is_multi_br = session_profile.startswith('multi-BR')
-        DISCORD_WEBHOOK_URL = discord_webhook_url_br if is_multi_br else discord_webhook_url_us
+        is_multi_br = account.is_multi_br
+        DISCORD_WEBHOOK_URL = account.webhook(discord_webhook_url_br, discord_webhook_url_us)
         
         # Formatar mensagem para Discord com última atividade
         current_timestamp = time.strftime("%d/%m/%Y %H:%M:%S")
         flag_emoji = ":flag_br:" if is_multi_br else ":flag_us:"
         discord_message = f"⏰ {flag_emoji} {current_timestamp}: [{session_profile}-{bot_letter}] - {email} - ENCERRADO por inatividade (30+ min sem ações)\n📝 Última atividade: {last_message}"
+        discord_message += format_log_context(context_lines, discord_message)
         
         # Enviar mensagem
-        data = {"content": discord_message}
-        response = post_discord_with_custom_dns(DISCORD_WEBHOOK_URL, data)
-        if response.status_code == 204:
-            print(f"✅ Notificação de timeout enviada para Discord: {email} [{session_profile}-{bot_letter}]")
+        if notify_discord(DISCORD_WEBHOOK_URL, discord_message):
+            print(f"📨 Notificação de timeout enfileirada para Discord: {email} [{session_profile}-{bot_letter}]")
             return True
-        else:
-            print(f"❌ Erro ao enviar notificação de timeout: {response.status_code}")
-            return False
+        return False
             
     except Exception as e:
         print(f"❌ Erro ao enviar notificação de timeout para Discord: {str(e)}")
         return False
 
-def send_discord_max_restart_alert(bot_letter, discord_webhook_url_br, discord_webhook_url_us, max_restarts, last_error="Erro não especificado"):
+def send_discord_max_restart_alert(bot_letter, discord_webhook_url_br, discord_webhook_url_us, max_restarts, last_error="Erro não especificado", context_lines=None):
     """Envia uma mensagem para o webhook do Discord quando um bot atinge o número máximo de restarts"""
     try:
-        # Obter informações da conta
-        email = "Unknown"
-        session_profile = "Unknown"
-        try:
-            accounts_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "accounts.json")
-            config_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "config.json")
-            
-            # Obter email
-            if os.path.exists(accounts_file):
-                accounts_data = load_json_with_comments(accounts_file)
-                if accounts_data:
-                    email = extract_email_from_accounts(accounts_data)
-            
-            # Obter perfil da sessão
-            if os.path.exists(config_file):
-                config_data = load_json_with_comments(config_file)
-                if config_data:
-                    session_path = config_data.get('sessionPath', '')
-                    if session_path and 'sessions/_' in session_path:
-                        session_profile = session_path.split('sessions/_')[1]
-        except Exception as e:
-            print(f"❌ Erro ao obter informações da conta: {str(e)}")
+        # Dados da conta do slot (cache invalidado pelo mtime dos arquivos)
+        account = slot_account_info(bot_letter)
+        email = account.email
+        session_profile = account.session_profile
         
         # Determinar webhook baseado no perfil
-        is_multi_br = session_profile.startswith('multi-BR')
-        DISCORD_WEBHOOK_URL = discord_webhook_url_br if is_multi_br else discord_webhook_url_us
+        is_multi_br = account.is_multi_br
+        DISCORD_WEBHOOK_URL = account.webhook(discord_webhook_url_br, discord_webhook_url_us)
         
         # Formatar mensagem para Discord
         current_timestamp = time.strftime("%d/%m/%Y %H:%M:%S")
         flag_emoji = ":flag_br:" if is_multi_br else ":flag_us:"
         discord_message = f"🔄❌ {flag_emoji} {current_timestamp}: [{session_profile}-{bot_letter}] - {email} - ENCERRADO após {max_restarts} restarts\n📝 Último erro: {last_error}"
+        discord_message += format_log_context(context_lines, discord_message)
         
         # Enviar mensagem
-        data = {"content": discord_message}
-        response = post_discord_with_custom_dns(DISCORD_WEBHOOK_URL, data)
-        if response.status_code == 204:
-            print(f"✅ Notificação de max restart enviada para Discord: {email} [{session_profile}-{bot_letter}]")
+        if notify_discord(DISCORD_WEBHOOK_URL, discord_message):
+            print(f"📨 Notificação de max restart enfileirada para Discord: {email} [{session_profile}-{bot_letter}]")
             return True
-        else:
-            print(f"❌ Erro ao enviar notificação de max restart: {response.status_code}")
-            return False
+        return False
             
     except Exception as e:
         print(f"❌ Erro ao enviar notificação de max restart para Discord: {str(e)}")
@@ -586,45 +2621,23 @@ def send_discord_max_restart_alert(bot_letter, discord_webhook_url_br, discord_w
 def delete_bot_cookies(bot_letter):
     """Deleta os arquivos de cookies de um bot específico baseado no email da conta"""
     try:
-        config_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "config.json")
-        accounts_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "accounts.json")
-        
-        if not os.path.exists(config_file):
+        src_dir = os.path.join(bot_slot_dir(bot_letter), "src")
+        if not os.path.exists(os.path.join(src_dir, "config.json")):
             print(f"❌ Arquivo config.json não encontrado para Bot {bot_letter}")
             return False
         
-        if not os.path.exists(accounts_file):
+        if not os.path.exists(os.path.join(src_dir, "accounts.json")):
             print(f"❌ Arquivo accounts.json não encontrado para Bot {bot_letter}")
             return False
         
-        config_data = load_json_with_comments(config_file)
-        if not config_data:
-            print(f"❌ Não foi possível carregar config.json do Bot {bot_letter}")
-            return False
-        
-        # Obter o email da conta
-        accounts_data = load_json_with_comments(accounts_file)
-        if not accounts_data:
-            print(f"❌ Não foi possível carregar accounts.json do Bot {bot_letter}")
-            return False
-        
-        email = extract_email_from_accounts(accounts_data)
+        account = slot_account_info(bot_letter)
+        email = account.email
         if email == 'Unknown' or not email:
             print(f"❌ Não foi possível identificar o email da conta para Bot {bot_letter}")
             return False
         
-        # Obter BOT_ACCOUNT do .env ou extrair do sessionPath
-        bot_account = bot_acc_env  # Usa a variável global BOT_ACCOUNT do .env
-        
-        if not bot_account:
-            session_path = config_data.get('sessionPath', '')
-            if session_path and 'sessions/_' in session_path:
-                session_profile = session_path.split('sessions/_')[1]
-                # Tentar extrair do session_profile (remover números finais)
-                match = re.match(r'^(.*?)\d*$', session_profile)
-                if match:
-                    bot_account = match.group(1).rstrip('0123456789')
-        
+        # BOT_ACCOUNT do .env ou extraído do sessionPath
+        bot_account = account.bot_account
         if not bot_account:
             print(f"❌ Não foi possível identificar o BOT_ACCOUNT para Bot {bot_letter}")
             return False
@@ -666,28 +2679,10 @@ def send_discord_suspension_alert(bot_letter, discord_webhook_url_br, discord_we
     global banned_bots, last_banned_alerts
     
     try:
-        # Tentar obter o email da conta do arquivo accounts.json
-        email = "Unknown"
-        session_profile = "Unknown"
-        try:
-            accounts_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "accounts.json")
-            config_file = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_letter}", "src", "config.json")
-            
-            # Obter email
-            if os.path.exists(accounts_file):
-                accounts_data = load_json_with_comments(accounts_file)
-                if accounts_data:
-                    email = extract_email_from_accounts(accounts_data)
-            
-            # Obter perfil da sessão e doDesktopSearch
-            if os.path.exists(config_file):
-                config_data = load_json_with_comments(config_file)
-                if config_data:
-                    session_path = config_data.get('sessionPath', '')
-                    if session_path and 'sessions/_' in session_path:
-                        session_profile = session_path.split('sessions/_')[1]
-        except Exception as e:
-            print(f"❌ Erro ao obter informações da conta: {str(e)}")
+        # Dados da conta do slot (cache invalidado pelo mtime dos arquivos)
+        account = slot_account_info(bot_letter)
+        email = account.email
+        session_profile = account.session_profile
         
         # Criar chave única para evitar duplicação
         alert_key = f"{session_profile}-{bot_letter}-{email}"
@@ -702,27 +2697,19 @@ def send_discord_suspension_alert(bot_letter, discord_webhook_url_br, discord_we
         
         # Adicionar o bot à lista de banidos
         banned_bots.add(bot_letter)
+        journal_state("banned_bots", sorted(banned_bots))
+        journal_state("last_banned_alerts", dict(last_banned_alerts))
         print(f"🚫 Bot {bot_letter} adicionado à lista de contas banidas. Não será reiniciado automaticamente.")
         
         # Formatar a mensagem com o email e perfil
         current_time = time.strftime("%d/%m/%Y")
-        is_multi_br = session_profile.startswith('multi-BR')
+        is_multi_br = account.is_multi_br
         flag_emoji = ":flag_br:" if is_multi_br else ":flag_us:"
         discord_message = f"⚠️ {flag_emoji} {current_time}: [{session_profile}-{bot_letter}] - {email} - CONTA BANIDA!!"
-        
-        if is_multi_br:
-            DISCORD_WEBHOOK_URL = discord_webhook_url_br
-        else:
-            DISCORD_WEBHOOK_URL = discord_webhook_url_us
+        DISCORD_WEBHOOK_URL = account.webhook(discord_webhook_url_br, discord_webhook_url_us)
 
-        data = {
-            "content": discord_message
-        }
-        response = post_discord_with_custom_dns(DISCORD_WEBHOOK_URL, data)
-        if response.status_code == 204:
-            print(f"✅ Alerta de suspensão enviado para o Discord: {email} [{session_profile}-{bot_letter}]")
-        else:
-            print(f"❌ Erro ao enviar alerta de suspensão para o Discord: {response.status_code}")
+        if notify_discord(DISCORD_WEBHOOK_URL, discord_message):
+            print(f"📨 Alerta de suspensão enfileirado para o Discord: {email} [{session_profile}-{bot_letter}]")
     except Exception as e:
         print(f"❌ Erro ao enviar alerta de suspensão para o Discord: {str(e)}")
 
@@ -730,7 +2717,7 @@ def check_location():
     ipinfo_url = "https://ipinfo.io"
 
     try:
-        response = requests.get(ipinfo_url)
+        response = http_session().get(ipinfo_url)
         data = response.json()
 
         country = data.get('country')
@@ -785,337 +2772,110 @@ def get_current_ip():
         print(f"❌ Erro ao verificar IP: {e}")
         return None
 
-def setup_ricronus_and_directories(BOT_DIRECTORY):
+def setup_ricronus_and_directories(BOT_DIRECTORY, slots=None):
     """Configura o ricronus e cria os diretórios necessários"""
     curl_with_proxy_fallback(f"{BOT_DIRECTORY}r_rewards.conf", f"{BASEDIR}/ricronus.conf")
-    for letter in ["A", "B", "C", "D", "E"]:
+    for letter in slots or BOT_SLOTS:
         sessions_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{letter}", "dist", "browser", "sessions")
         os.makedirs(sessions_dir, exist_ok=True)
         print(f"✅ Diretório criado: {sessions_dir}")
 
-def download_and_extract_bot_A(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE):
-    bot_id = "A"
-    bot_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_id}")
-    print(f"\n--- Iniciando configuração para Bot {bot_id} ---")
-    print(f"Diretório alvo: {bot_dir}")
-
-    original_cwd = os.getcwd()
-    try:
-        if not os.path.isdir(bot_dir):
-            print(f"⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
-            return
-
-        os.chdir(bot_dir)
-        print(f"Diretório de trabalho alterado para: {os.getcwd()}")
-
-        zip_file_name = BOT_ZIP_FILE_NAME
-        download_url = f"{BOT_DIRECTORY}{BOT_ACCOUNT}_{bot_id}.zip"
-
-        print(f"Baixando {download_url} para {zip_file_name}...")
-        curl_with_proxy_fallback(download_url, zip_file_name)
-
-        print(f"Extraindo {zip_file_name}...")
-        subprocess.run(f"unzip -o {zip_file_name}", shell=True, check=True)
-
-        print(f"Removendo {zip_file_name}...")
-        subprocess.run(f"rm -f {zip_file_name}", shell=True, check=True)
-
-        if CONFIG_MODE == "GEN_COOKIE_CONFIG":
-            print("Aplicando proxy local para geração de cookies...")
-            clean_account_proxys("src/accounts.json")
-        
-        if CONFIG_MODE == "DEFAULT_CONFIG_US":
-            print("Aplicando proxy local para configuração padrão dos EUA...")
-            clean_account_proxys("src/accounts.json")
-
-        if SOCKS_PROXY == True:
-            print("Ativando proxy SOCKS_TO_HTTP para accounts.json...")
-            set_socks_proxy("src/accounts.json")
-
-        if CONFIG_MODE != "ZIP":
-            config_json_url = f"https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{CONFIG_MODE}.json"
-            print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
-            curl_with_proxy_fallback(config_json_url, "src/config.json")
-            print(f"Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
-            subprocess.run(f"sed -i 's/_IDCLUSTER/_{BOT_ACCOUNT}/g' src/config.json", shell=True, check=True)
-        else:
-            print("Modo ZIP: Pulando download e modificação do config.json.")
-
-        #print("Executando npm run build...")
-        #subprocess.run("npm run build", shell=True, check=True)
-        print(f"--- ✅ Bot {bot_id} configurado com sucesso ---")
-
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ ERRO: Falha em um subproceso para Bot {bot_id} no diretório {os.getcwd()}: {e}")
-    except FileNotFoundError as e:
-        print(f"⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
-    except Exception as e:
-        print(f"⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
-    finally:
-        os.chdir(original_cwd)
-        print(f"Diretório de trabalho restaurado para: {os.getcwd()}")
-
-def download_and_extract_bot_B(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE):
-    bot_id = "B"
-    bot_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_id}")
-    print(f"\n--- Iniciando configuração para Bot {bot_id} ---")
-    print(f"Diretório alvo: {bot_dir}")
-
-    original_cwd = os.getcwd()
-    try:
-        if not os.path.isdir(bot_dir):
-            print(f"⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
-            return
-
-        os.chdir(bot_dir)
-        print(f"Diretório de trabalho alterado para: {os.getcwd()}")
-
-        zip_file_name = BOT_ZIP_FILE_NAME
-        download_url = f"{BOT_DIRECTORY}{BOT_ACCOUNT}_{bot_id}.zip"
-
-        print(f"Baixando {download_url} para {zip_file_name}...")
-        curl_with_proxy_fallback(download_url, zip_file_name)
-
-        print(f"Extraindo {zip_file_name}...")
-        subprocess.run(f"unzip -o {zip_file_name}", shell=True, check=True)
-
-        print(f"Removendo {zip_file_name}...")
-        subprocess.run(f"rm -f {zip_file_name}", shell=True, check=True)
-
-        if CONFIG_MODE == "GEN_COOKIE_CONFIG":
-            print("Aplicando proxy local para geração de cookies...")
-            clean_account_proxys("src/accounts.json")
-        
-        if CONFIG_MODE == "DEFAULT_CONFIG_US":
-            print("Aplicando proxy local para configuração padrão dos EUA...")
-            clean_account_proxys("src/accounts.json")
-
-        if SOCKS_PROXY == True:
-            print("Ativando proxy SOCKS_TO_HTTP para accounts.json...")
-            set_socks_proxy("src/accounts.json")
-
-        if CONFIG_MODE != "ZIP":
-            config_json_url = f"https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{CONFIG_MODE}.json"
-            print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
-            curl_with_proxy_fallback(config_json_url, "src/config.json")
-            print(f"Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
-            subprocess.run(f"sed -i 's/_IDCLUSTER/_{BOT_ACCOUNT}/g' src/config.json", shell=True, check=True)
-        else:
-            print("Modo ZIP: Pulando download e modificação do config.json.")
-
-        #print("Executando npm run build...")
-        #subprocess.run("npm run build", shell=True, check=True)
-        print(f"--- ✅ Bot {bot_id} configurado com sucesso ---")
-
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ ERRO: Falha em um subproceso para Bot {bot_id} no diretório {os.getcwd()}: {e}")
-    except FileNotFoundError as e:
-        print(f"⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
-    except Exception as e:
-        print(f"⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
-    finally:
-        os.chdir(original_cwd)
-        print(f"Diretório de trabalho restaurado para: {os.getcwd()}")
-
-def download_and_extract_bot_C(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE):
-    bot_id = "C"
-    bot_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_id}")
-    print(f"\n--- Iniciando configuração para Bot {bot_id} ---")
-    print(f"Diretório alvo: {bot_dir}")
-
-    original_cwd = os.getcwd()
-    try:
-        if not os.path.isdir(bot_dir):
-            print(f"⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
-            return
-
-        os.chdir(bot_dir)
-        print(f"Diretório de trabalho alterado para: {os.getcwd()}")
-
-        zip_file_name = BOT_ZIP_FILE_NAME
-        download_url = f"{BOT_DIRECTORY}{BOT_ACCOUNT}_{bot_id}.zip"
-
-        print(f"Baixando {download_url} para {zip_file_name}...")
-        curl_with_proxy_fallback(download_url, zip_file_name)
-
-        print(f"Extraindo {zip_file_name}...")
-        subprocess.run(f"unzip -o {zip_file_name}", shell=True, check=True)
-
-        print(f"Removendo {zip_file_name}...")
-        subprocess.run(f"rm -f {zip_file_name}", shell=True, check=True)
-
-        if CONFIG_MODE == "GEN_COOKIE_CONFIG":
-            print("Aplicando proxy local para geração de cookies...")
-            clean_account_proxys("src/accounts.json")
-        
-        if CONFIG_MODE == "DEFAULT_CONFIG_US":
-            print("Aplicando proxy local para configuração padrão dos EUA...")
-            clean_account_proxys("src/accounts.json")
-
-        if SOCKS_PROXY == True:
-            print("Ativando proxy SOCKS_TO_HTTP para accounts.json...")
-            set_socks_proxy("src/accounts.json")
-
-        if CONFIG_MODE != "ZIP":
-            config_json_url = f"https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{CONFIG_MODE}.json"
-            print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
-            curl_with_proxy_fallback(config_json_url, "src/config.json")
-            print(f"Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
-            subprocess.run(f"sed -i 's/_IDCLUSTER/_{BOT_ACCOUNT}/g' src/config.json", shell=True, check=True)
-        else:
-            print("Modo ZIP: Pulando download e modificação do config.json.")
-
-        #print("Executando npm run build...")
-        #subprocess.run("npm run build", shell=True, check=True)
-        print(f"--- ✅ Bot {bot_id} configurado com sucesso ---")
-
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ ERRO: Falha em um subproceso para Bot {bot_id} no diretório {os.getcwd()}: {e}")
-    except FileNotFoundError as e:
-        print(f"⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
-    except Exception as e:
-        print(f"⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
-    finally:
-        os.chdir(original_cwd)
-        print(f"Diretório de trabalho restaurado para: {os.getcwd()}")
-
-def download_and_extract_bot_D(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE):
-    bot_id = "D"
-    bot_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_id}")
-    print(f"\n--- Iniciando configuração para Bot {bot_id} ---")
-    print(f"Diretório alvo: {bot_dir}")
+def download_and_extract_bot(bot_id, BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE, shared_config_path=None):
+    """
+    Baixa, extrai e configura o pacote do bot de um slot usando apenas
+    caminhos explícitos (sem os.chdir), para poder rodar em paralelo.
+    Retorna True se o slot ficou pronto.
+    """
+    bot_dir = bot_slot_dir(bot_id)
+    prefix = f"[Bot {bot_id}]"
+    print(f"{prefix} --- Iniciando configuração em {bot_dir} ---")
 
-    original_cwd = os.getcwd()
     try:
         if not os.path.isdir(bot_dir):
-            print(f"⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
-            return
-
-        os.chdir(bot_dir)
-        print(f"Diretório de trabalho alterado para: {os.getcwd()}")
+            print(f"{prefix} ⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
+            return False
 
-        zip_file_name = BOT_ZIP_FILE_NAME
+        accounts_path = os.path.join(bot_dir, "src", "accounts.json")
         download_url = f"{BOT_DIRECTORY}{BOT_ACCOUNT}_{bot_id}.zip"
 
-        print(f"Baixando {download_url} para {zip_file_name}...")
-        curl_with_proxy_fallback(download_url, zip_file_name)
-
-        print(f"Extraindo {zip_file_name}...")
-        subprocess.run(f"unzip -o {zip_file_name}", shell=True, check=True)
-
-        print(f"Removendo {zip_file_name}...")
-        subprocess.run(f"rm -f {zip_file_name}", shell=True, check=True)
-
-        if CONFIG_MODE == "GEN_COOKIE_CONFIG":
-            print("Aplicando proxy local para geração de cookies...")
-            clean_account_proxys("src/accounts.json")
-        
-        if CONFIG_MODE == "DEFAULT_CONFIG_US":
-            print("Aplicando proxy local para configuração padrão dos EUA...")
-            clean_account_proxys("src/accounts.json")
-
-        if SOCKS_PROXY == True:
-            print("Ativando proxy SOCKS_TO_HTTP para accounts.json...")
-            set_socks_proxy("src/accounts.json")
-
-        if CONFIG_MODE != "ZIP":
-            config_json_url = f"https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{CONFIG_MODE}.json"
-            print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
-            curl_with_proxy_fallback(config_json_url, "src/config.json")
-            print(f"Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
-            subprocess.run(f"sed -i 's/_IDCLUSTER/_{BOT_ACCOUNT}/g' src/config.json", shell=True, check=True)
+        print(f"{prefix} Baixando {download_url}...")
+        if ARTIFACT_CACHE_ENABLED:
+            archive_path, archive_sha = artifact_cache().fetch(download_url)
+            # O marcador inclui o modo/proxy: os ajustes do accounts.json dependem deles
+            marker_value = f"{archive_sha} {CONFIG_MODE} socks={SOCKS_PROXY}"
+            marker_path = os.path.join(bot_dir, SLOT_ARTIFACT_MARKER)
+            try:
+                with open(marker_path, encoding="utf-8") as f:
+                    unchanged = f.read().strip() == marker_value
+            except OSError:
+                unchanged = False
+            if unchanged and os.path.exists(accounts_path):
+                print(f"{prefix} Pacote inalterado ({archive_sha[:12]}). Extração pulada.")
+            else:
+                print(f"{prefix} Extraindo pacote...")
+                written, skipped = extract_zip_incremental(archive_path, bot_dir)
+                print(f"{prefix} {written} arquivo(s) atualizados, {skipped} já estavam iguais.")
         else:
-            print("Modo ZIP: Pulando download e modificação do config.json.")
-
-        #print("Executando npm run build...")
-        #subprocess.run("npm run build", shell=True, check=True)
-        print(f"--- ✅ Bot {bot_id} configurado com sucesso ---")
-
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ ERRO: Falha em um subproceso para Bot {bot_id} no diretório {os.getcwd()}: {e}")
-    except FileNotFoundError as e:
-        print(f"⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
-    except Exception as e:
-        print(f"⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
-    finally:
-        os.chdir(original_cwd)
-        print(f"Diretório de trabalho restaurado para: {os.getcwd()}")
-
-def download_and_extract_bot_E(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE):
-    bot_id = "E"
-    bot_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_{bot_id}")
-    print(f"\n--- Iniciando configuração para Bot {bot_id} ---")
-    print(f"Diretório alvo: {bot_dir}")
-
-    original_cwd = os.getcwd()
-    try:
-        if not os.path.isdir(bot_dir):
-            print(f"⚠️ ERRO: Diretório {bot_dir} não encontrado. Pulando Bot {bot_id}.")
-            return
-
-        os.chdir(bot_dir)
-        print(f"Diretório de trabalho alterado para: {os.getcwd()}")
-
-        zip_file_name = BOT_ZIP_FILE_NAME
-        download_url = f"{BOT_DIRECTORY}{BOT_ACCOUNT}_{bot_id}.zip"
-
-        print(f"Baixando {download_url} para {zip_file_name}...")
-        curl_with_proxy_fallback(download_url, zip_file_name)
-
-        print(f"Extraindo {zip_file_name}...")
-        subprocess.run(f"unzip -o {zip_file_name}", shell=True, check=True)
-
-        print(f"Removendo {zip_file_name}...")
-        subprocess.run(f"rm -f {zip_file_name}", shell=True, check=True)
-
-        if CONFIG_MODE == "GEN_COOKIE_CONFIG":
-            print("Aplicando proxy local para geração de cookies...")
-            clean_account_proxys("src/accounts.json")
-        
-        if CONFIG_MODE == "DEFAULT_CONFIG_US":
-            print("Aplicando proxy local para configuração padrão dos EUA...")
-            clean_account_proxys("src/accounts.json")
-
-        if SOCKS_PROXY == True:
-            print("Ativando proxy SOCKS_TO_HTTP para accounts.json...")
-            set_socks_proxy("src/accounts.json")
+            with download_to_spool(download_url) as archive:
+                print(f"{prefix} Extraindo pacote...")
+                written, skipped = extract_zip_incremental(archive, bot_dir)
+            print(f"{prefix} {written} arquivo(s) atualizados, {skipped} já estavam iguais.")
 
+        config_text = None
         if CONFIG_MODE != "ZIP":
-            config_json_url = f"https://drive.kingvegeta.workers.dev/1:/Files/rewanced/_{CONFIG_MODE}.json"
-            print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
-            curl_with_proxy_fallback(config_json_url, "src/config.json")
-            print(f"Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
-            subprocess.run(f"sed -i 's/_IDCLUSTER/_{BOT_ACCOUNT}/g' src/config.json", shell=True, check=True)
+            if shared_config_path:
+                # config.json compartilhado: baixado uma única vez para todos os slots
+                with open(shared_config_path, encoding="utf-8") as f:
+                    config_text = f.read()
+            else:
+                config_json_url = SHARED_CONFIG_URL.format(config_mode=CONFIG_MODE)
+                print(f"{prefix} Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
+                with download_to_spool(config_json_url) as spool:
+                    config_text = spool.read().decode("utf-8")
         else:
-            print("Modo ZIP: Pulando download e modificação do config.json.")
-
-        #print("Executando npm run build...")
-        #subprocess.run("npm run build", shell=True, check=True)
-        print(f"--- ✅ Bot {bot_id} configurado com sucesso ---")
+            print(f"{prefix} Modo ZIP: Pulando download e modificação do config.json.")
+
+        port = account_proxy_port(CONFIG_MODE)
+        if port is not None:
+            print(f"{prefix} Aplicando proxy local 127.0.0.1:{port} no accounts.json...")
+        if config_text is not None:
+            print(f"{prefix} Atualizando IDCLUSTER em src/config.json para _{BOT_ACCOUNT}...")
+        patch_slot_config(bot_dir, BOT_ACCOUNT, CONFIG_MODE, config_text)
+        # Já deixa os metadados da conta em cache para alertas e planilha
+        account = slot_account_info(bot_id)
+        print(f"{prefix} Conta: {account.email} [{account.session_profile}]")
+
+        if ARTIFACT_CACHE_ENABLED:
+            # Escrita atômica: o marcador pode estar compartilhado por hardlink com outro slot
+            write_file_atomic(os.path.join(bot_dir, SLOT_ARTIFACT_MARKER), marker_value)
+
+        print(f"{prefix} --- ✅ Bot {bot_id} configurado com sucesso ---")
+        return True
 
     except subprocess.CalledProcessError as e:
-        print(f"⚠️ ERRO: Falha em um subproceso para Bot {bot_id} no diretório {os.getcwd()}: {e}")
+        print(f"{prefix} ⚠️ ERRO: Falha em um subproceso para Bot {bot_id}: {e}")
+    except zipfile.BadZipFile as e:
+        print(f"{prefix} ⚠️ ERRO: Pacote do Bot {bot_id} inválido: {e}")
     except FileNotFoundError as e:
-        print(f"⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
+        print(f"{prefix} ⚠️ ERRO: Arquivo ou diretório não encontrado para Bot {bot_id}: {e}")
     except Exception as e:
-        print(f"⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
-    finally:
-        os.chdir(original_cwd)
-        print(f"Diretório de trabalho restaurado para: {os.getcwd()}")
+        print(f"{prefix} ⚠️ ERRO inesperado durante a configuração do Bot {bot_id}: {e}")
+    return False
 
-def mount_rewards_drive():
+def mount_rewards_drive(slots=None):
     """Monta o drive de recompensas e lista as sessões"""
+    slots = slots or BOT_SLOTS
     subprocess.run("sleep 2", shell=True)
-    for letter in ['A', 'B', 'C', 'D', 'E']:
+    for letter in slots:
         subprocess.run(f"umount -l \"{BASEDIR}/{BOT_BASE_DIR_NAME}_{letter}/dist/browser/sessions\"", shell=True)
     
     time.sleep(3)
 
     # Inicialmente monta todos
-    for letter in ['A', 'B', 'C', 'D', 'E']:
+    for letter in slots:
         subprocess.run(f"nohup ricronus --config {BASEDIR}/ricronus.conf mount rewards:Rewards \"{BASEDIR}/{BOT_BASE_DIR_NAME}_{letter}/dist/browser/sessions\" &> /dev/null 2>&1 &", shell=True)
     
-    mount_points = [f"{BASEDIR}/{BOT_BASE_DIR_NAME}_{letter}/dist/browser/sessions" for letter in ['A', 'B', 'C', 'D', 'E']]
+    mount_points = [f"{BASEDIR}/{BOT_BASE_DIR_NAME}_{letter}/dist/browser/sessions" for letter in slots]
     max_attempts = 3
     retry_delay = 3  # segundos
     
@@ -1146,7 +2906,7 @@ def mount_rewards_drive():
     else:
         print("❌ Algumas montagens falharam após várias tentativas.")
     
-def copy_rewards_drive(BOT_ACCOUNT):
+def copy_rewards_drive(BOT_ACCOUNT, slots=None):
     target = f"{BASEDIR}/{BOT_BASE_DIR_NAME}_shared/sessions/_{BOT_ACCOUNT}"
 
     print(f"🚀 Iniciando cópia de rewards:Rewards/_\"{BOT_ACCOUNT}\" para {target}...")
@@ -1167,7 +2927,7 @@ def copy_rewards_drive(BOT_ACCOUNT):
         else:
             print(f"⚠️ Erro ao copiar rewards:Rewards para {target}: {e}\nSaída: {e.output}\nErro: {e.stderr}")
 
-    for letter in ['A', 'B', 'C', 'D', 'E']:
+    for letter in slots or BOT_SLOTS:
         symlink_path = f"{BASEDIR}/{BOT_BASE_DIR_NAME}_{letter}/dist/browser/sessions/_{BOT_ACCOUNT}"
         os.makedirs(os.path.dirname(symlink_path), exist_ok=True)
         
@@ -1192,19 +2952,52 @@ def upload_rewards_drive(BOT_ACCOUNT):
     )
     print(f"Upload concluido.")
 
+def download_shared_config(CONFIG_MODE):
+    """Baixa o config.json do modo atual uma única vez (é o mesmo para todos os slots)."""
+    config_json_url = SHARED_CONFIG_URL.format(config_mode=CONFIG_MODE)
+    print(f"Baixando config.json ({CONFIG_MODE}) de {config_json_url}...")
+    try:
+        if ARTIFACT_CACHE_ENABLED:
+            shared_config_path, _ = artifact_cache().fetch(config_json_url)
+            return shared_config_path
+        shared_dir = os.path.join(BASEDIR, f"{BOT_BASE_DIR_NAME}_shared")
+        os.makedirs(shared_dir, exist_ok=True)
+        shared_config_path = os.path.join(shared_dir, f"_{CONFIG_MODE}.json")
+        curl_with_proxy_fallback(config_json_url, shared_config_path)
+        return shared_config_path
+    except Exception as e:
+        print(f"⚠️ Falha ao baixar config.json compartilhado ({e}). Cada slot tentará baixar o seu.")
+        return None
+
 def execute_tasks_for_selected_bots(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE, *selected_bots):
+    """
+    Provisiona todos os slots selecionados em paralelo. Artefatos comuns
+    (config.json do modo) são baixados uma única vez. Retorna {slot: sucesso}.
+    """
     if CONFIG_MODE == "ZIP":
         print(f"📦 Modo CONFIG ZIP detectado!")
-    if "A" in selected_bots:
-        download_and_extract_bot_A(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE)
-    if "B" in selected_bots:
-        download_and_extract_bot_B(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE)
-    if "C" in selected_bots:
-        download_and_extract_bot_C(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE)
-    if "D" in selected_bots:
-        download_and_extract_bot_D(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE)
-    if "E" in selected_bots:
-        download_and_extract_bot_E(BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE)
+    selected_bots = list(dict.fromkeys(selected_bots))  # remove duplicados mantendo a ordem
+    if not selected_bots:
+        return {}
+
+    shared_config_path = download_shared_config(CONFIG_MODE) if CONFIG_MODE != "ZIP" else None
+
+    started_at = time.monotonic()
+    workers = max(1, min(PROVISION_WORKERS, len(selected_bots)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provision") as pool:
+        futures = {
+            bot_id: pool.submit(download_and_extract_bot, bot_id, BOT_DIRECTORY, BOT_ACCOUNT, CONFIG_MODE, shared_config_path)
+            for bot_id in selected_bots
+        }
+        results = {bot_id: future.result() for bot_id, future in futures.items()}
+
+    failed = [bot_id for bot_id, ok in results.items() if not ok]
+    elapsed = time.monotonic() - started_at
+    if failed:
+        print(f"⚠️ Provisionamento concluído em {elapsed:.1f}s com falha nos bots: {', '.join(failed)}")
+    else:
+        print(f"✅ {len(results)} bot(s) provisionados em {elapsed:.1f}s.")
+    return results
 
 def run_command(command, prefix="", timeout=3600):
     """
@@ -1276,18 +3069,457 @@ def run_command(command, prefix="", timeout=3600):
             pass
         return False
 
+#==============================================================
+# PRESSÃO DO HOST (usada pelo controle de admissão de bots)
+
+def host_available_memory_mb():
+    """MemAvailable do /proc/meminfo em MB (None se indisponível)."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) // 1024
+    except Exception:
+        pass
+    return None
+
+def host_pressure_reason():
+    """
+    Retorna uma descrição da pressão atual do host (memória ou carga) que
+    impede a admissão de um novo bot, ou None se há folga.
+    """
+    available_mb = host_available_memory_mb()
+    required_mb = BOT_SLOT_RAM_MB + ADMISSION_MIN_FREE_MB
+    if available_mb is not None and available_mb < required_mb:
+        return f"memória livre {available_mb} MB < {required_mb} MB"
+    try:
+        load_1min = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cores = os.cpu_count() or 1
+    if load_1min > ADMISSION_MAX_LOAD_PER_CORE * cores:
+        return f"load average {load_1min:.2f} > {ADMISSION_MAX_LOAD_PER_CORE * cores:.2f}"
+    return None
+
+#==============================================================
+# ÁRVORES DE PROCESSOS DOS BOTS
+# Cada bot é iniciado em sua própria sessão/grupo de processos
+# (start_new_session=True). O encerramento percorre /proc para achar toda a
+# árvore de descendentes (o Playwright abre os navegadores em grupos próprios),
+# sinaliza cada grupo com SIGTERM e escala para SIGKILL após um prazo, tudo
+# a partir do Python, sem pkill nem subprocessos de shell e sem tocar em
+# navegadores de outros slots.
+
+def _read_proc_stat(pid):
+    """Retorna (ppid, pgid, sid, state, starttime) de um PID ou None se não existir."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read().decode(errors="replace")
+    except OSError:
+        return None
+    # O campo comm pode conter espaços/parênteses: o restante começa após o último ')'
+    fields = data[data.rfind(')') + 2:].split()
+    try:
+        return int(fields[1]), int(fields[2]), int(fields[3]), fields[0], int(fields[19])
+    except (IndexError, ValueError):
+        return None
+
+def _proc_snapshot():
+    """Lê a tabela de processos: {pid: (ppid, pgid, sid, state, starttime)}."""
+    snapshot = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return snapshot
+    for entry in entries:
+        if entry.isdigit():
+            stat = _read_proc_stat(int(entry))
+            if stat is not None:
+                snapshot[int(entry)] = stat
+    return snapshot
+
+def process_tree(root_pids, snapshot=None):
+    """
+    Retorna {pid: starttime} de todos os processos vivos pertencentes às árvores
+    dos PIDs informados: descendentes (via ppid) e processos que ficaram órfãos
+    mas continuam na sessão criada para o bot.
+    """
+    snapshot = snapshot if snapshot is not None else _proc_snapshot()
+    roots = {pid for pid in root_pids if pid}
+    children = {}
+    for pid, (ppid, _, _, _, _) in snapshot.items():
+        children.setdefault(ppid, []).append(pid)
+
+    tree = set()
+    pending = [pid for pid in roots if pid in snapshot]
+    pending += [pid for pid, (_, _, sid, _, _) in snapshot.items() if sid in roots]
+    while pending:
+        pid = pending.pop()
+        if pid in tree:
+            continue
+        tree.add(pid)
+        pending.extend(children.get(pid, ()))
+
+    own_pid = os.getpid()
+    return {
+        pid: snapshot[pid][4]
+        for pid in tree
+        if pid != own_pid and snapshot[pid][3] != 'Z'
+    }
+
+def bot_dir_pids(slots=None, snapshot=None):
+    """PIDs cujo diretório de trabalho está dentro da pasta de algum slot (restos de execuções anteriores)."""
+    snapshot = snapshot if snapshot is not None else _proc_snapshot()
+    slot_dirs = tuple(os.path.realpath(bot_slot_dir(slot)) for slot in (slots or BOT_SLOTS))
+    own_pid = os.getpid()
+    pids = []
+    for pid in snapshot:
+        if pid == own_pid:
+            continue
+        try:
+            cwd = os.readlink(f"/proc/{pid}/cwd")
+        except OSError:
+            continue
+        if any(cwd == slot_dir or cwd.startswith(slot_dir + os.sep) for slot_dir in slot_dirs):
+            pids.append(pid)
+    return pids
+
+def _alive_in_tree(tree):
+    """Filtra {pid: starttime} mantendo apenas os que ainda vivem (mesmo starttime, não zumbi)."""
+    alive = {}
+    for pid, starttime in tree.items():
+        stat = _read_proc_stat(pid)
+        if stat is not None and stat[4] == starttime and stat[3] != 'Z':
+            alive[pid] = starttime
+    return alive
+
+def signal_process_tree(tree, sig):
+    """
+    Envia `sig` a cada grupo de processos da árvore ({pid: starttime}) e aos
+    PIDs individualmente, ignorando PIDs reaproveitados. Nunca sinaliza o
+    próprio grupo do supervisor.
+    """
+    own_pgid = os.getpgrp()
+    alive = _alive_in_tree(tree)
+    groups = set()
+    for pid in alive:
+        try:
+            groups.add(os.getpgid(pid))
+        except OSError:
+            pass
+    groups.discard(own_pgid)
+    for pgid in groups:
+        try:
+            os.killpg(pgid, sig)
+        except OSError:
+            pass
+    for pid in alive:
+        try:
+            os.kill(pid, sig)
+        except OSError:
+            pass
+    return alive
+
+def terminate_process_trees(root_pids, grace=5, poll_interval=0.1):
+    """
+    Encerra em paralelo as árvores de todos os PIDs informados: SIGTERM em
+    todas de uma vez, espera até `grace` segundos e envia SIGKILL ao que restar.
+    Retorna a quantidade de processos que precisou de SIGKILL.
+    """
+    tree = signal_process_tree(process_tree(root_pids), signal.SIGTERM)
+    deadline = time.monotonic() + grace
+    while tree and time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        tree = _alive_in_tree(tree)
+    if tree:
+        signal_process_tree(tree, signal.SIGKILL)
+    return len(tree)
+
+#==============================================================
+# CLASSIFICAÇÃO DA SAÍDA DOS BOTS
+# Todos os marcadores procurados em cada linha são compilados em uma única
+# expressão regular, de forma que cada linha é percorrida uma única vez.
+
+# Padrões de erro críticos que causam o fechamento do bot (ordem = prioridade)
+CRITICAL_ERROR_PATTERNS = [
+    "Error: EIO: i/o error, close",
+    "[MAIN-ERROR] Error running desktop bot: undefined",
+    "ECONNRESET",
+    "ERR_UNHANDLED_REJECTION",
+    "ENOTCONN:",
+    "Navigation timeout of",
+    "[LOGIN] An error occurred: TimeoutError",
+    "Error running desktop bot",
+    "Too Many Requests",
+    "Terminating bot due to",
+    "Email field not present",
+    #"[LOGIN] Email field not found",
+    "Error: SyntaxError"
+]
+
+POINTS_MARKERS = ["Current total:", "Current point count:"]
+SUSPENDED_MARKER = "Account has been suspended!"
+BROWSER_READY_MARKER = "Created browser with User-Agent"  # Fim da fase de abertura do navegador
+BING_UNREACHABLE_MARKER = "BING.COM UNREACHABLE"
+COOKIE_ERROR_MARKERS = {
+    "Invalid cookie fields": "cookies inválidos",
+    "net::ERR_TUNNEL_CONNECTION_FAILED": "erro de conexão tunnel",
+}
+
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+_CRITICAL_PRIORITY = {pattern: index for index, pattern in enumerate(CRITICAL_ERROR_PATTERNS)}
+
+# Alternativas mais longas primeiro para que um marcador não "engula" outro
+_OUTPUT_MARKERS = sorted(
+    set(CRITICAL_ERROR_PATTERNS) | set(POINTS_MARKERS) | {SUSPENDED_MARKER, BROWSER_READY_MARKER} | set(COOKIE_ERROR_MARKERS),
+    key=len,
+    reverse=True,
+)
+BOT_OUTPUT_RE = re.compile(
+    "(?P<marker>" + "|".join(re.escape(marker) for marker in _OUTPUT_MARKERS) + ")"
+    + "|(?P<bing>(?i:" + re.escape(BING_UNREACHABLE_MARKER) + "))"
+    + r"|\[(?i:PID):\s*(?P<pid>\d+)\]"
+)
+
+
+class BotOutputEvent(NamedTuple):
+    """Resultado da classificação de uma linha de saída de um bot."""
+    text: str                          # linha sem espaços nas pontas e sem códigos ANSI
+    critical_error: Optional[str]      # padrão crítico encontrado (o de maior prioridade)
+    points_marker: Optional[str]       # "Current total:" ou "Current point count:"
+    points: Optional[int]              # pontos extraídos após o marcador
+    suspended: bool
+    browser_ready: bool
+    bing_unreachable: bool
+    cookie_error: Optional[str]        # descrição do erro que exige deleção de cookies
+    pid: Optional[int]
+
+
+def classify_bot_output(line):
+    """
+    Classifica uma linha de saída de um bot em uma única passada pelo regex
+    combinado, retornando um BotOutputEvent.
+    """
+    text = line.strip()
+    if '\x1b' in text:
+        text = ANSI_ESCAPE_RE.sub('', text)
+
+    critical_error = None
+    points_marker = None
+    points = None
+    suspended = False
+    browser_ready = False
+    bing_unreachable = False
+    cookie_error = None
+    pid = None
+
+    for match in BOT_OUTPUT_RE.finditer(text):
+        marker = match.group('marker')
+        if marker is None:
+            if match.group('bing') is not None:
+                bing_unreachable = True
+            elif pid is None:
+                pid = int(match.group('pid'))
+            continue
+        if marker in _CRITICAL_PRIORITY:
+            if critical_error is None or _CRITICAL_PRIORITY[marker] < _CRITICAL_PRIORITY[critical_error]:
+                critical_error = marker
+        elif marker in COOKIE_ERROR_MARKERS:
+            cookie_error = cookie_error or COOKIE_ERROR_MARKERS[marker]
+        elif marker == SUSPENDED_MARKER:
+            suspended = True
+        elif marker == BROWSER_READY_MARKER:
+            browser_ready = True
+        elif points_marker is None:
+            points_marker = marker
+            digits = ''.join(filter(str.isdigit, text[match.end():]))
+            points = int(digits) if digits else None
+
+    return BotOutputEvent(text, critical_error, points_marker, points, suspended, browser_ready, bing_unreachable, cookie_error, pid)
+
+#==============================================================
+# POLÍTICA DE REINÍCIO DOS BOTS
+# Toda falha de um slot (erro crítico, código de saída, inatividade) passa
+# pela mesma máquina de estados. Cada classe de erro tem seu próprio backoff
+# exponencial e circuit breaker: um slot limitado por "Too Many Requests"
+# espera muito mais que um ECONNRESET isolado.
+
+class RestartPolicy(NamedTuple):
+    base_delay: float            # atraso da primeira falha (dobra a cada falha seguida)
+    max_delay: float             # teto do backoff
+    breaker_threshold: int       # falhas seguidas que abrem o circuito
+    breaker_cooldown: float      # espera mínima com o circuito aberto
+    max_restarts: Optional[int]  # limite próprio da classe (None = BOT_MAX_RESTARTS)
+
+RESTART_POLICIES = {
+    'connection': RestartPolicy(BOT_RESTART_BACKOFF_BASE_SECONDS, BOT_RESTART_BACKOFF_MAX_SECONDS, 4, 300, None),
+    'rate_limit': RestartPolicy(BOT_RESTART_BACKOFF_BASE_SECONDS * 6, BOT_RESTART_BACKOFF_MAX_SECONDS * 2, 2, 900, None),
+    'login_timeout': RestartPolicy(BOT_RESTART_BACKOFF_BASE_SECONDS * 2, BOT_RESTART_BACKOFF_MAX_SECONDS, 3, 600, None),
+    'crash': RestartPolicy(BOT_RESTART_BACKOFF_BASE_SECONDS, BOT_RESTART_BACKOFF_MAX_SECONDS, 4, 120, None),
+    'inactivity': RestartPolicy(BOT_RESTART_BACKOFF_BASE_SECONDS, BOT_RESTART_BACKOFF_MAX_SECONDS, 1, 0, 1),
+}
+
+# Classe de cada padrão crítico (padrões ausentes caem em 'crash')
+ERROR_CLASS_BY_PATTERN = {
+    "Error: EIO: i/o error, close": 'connection',
+    "ECONNRESET": 'connection',
+    "ENOTCONN:": 'connection',
+    "ERR_UNHANDLED_REJECTION": 'connection',
+    "Too Many Requests": 'rate_limit',
+    "[LOGIN] An error occurred: TimeoutError": 'login_timeout',
+    "Navigation timeout of": 'login_timeout',
+    "Email field not present": 'login_timeout',
+}
+
+def restart_error_class(critical_error):
+    """Classe de erro (chave de RESTART_POLICIES) de um padrão crítico."""
+    return ERROR_CLASS_BY_PATTERN.get(critical_error, 'crash')
+
+
+class RestartDecision(NamedTuple):
+    delay: Optional[float]  # segundos até o reinício (None = desistir)
+    error_class: str
+    attempt: int            # reinícios já feitos no slot, incluindo este
+    limit: int              # limite que se aplica a esta classe
+    streak: int             # falhas seguidas desta classe
+    breaker_open: bool
+
+
+class SlotRestartState:
+    """
+    Máquina de estados de reinício de um slot:
+    idle -> running -> backoff -> running ... -> completed/failed/banned/inactive_timeout.
+
+    Só a primeira falha de uma execução agenda reinício: falhas relatadas
+    enquanto o slot já está em backoff são ignoradas (evita início duplicado).
+    """
+
+    TERMINAL_STATES = ('completed', 'failed', 'banned', 'inactive_timeout')
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.state = 'idle'
+        self.restarts = 0            # reinícios que contam para BOT_MAX_RESTARTS
+        self.class_restarts = {}     # reinícios por classe
+        self.streaks = {}            # falhas seguidas por classe (circuit breaker)
+        self.started_at = None
+        self.last_error = None
+
+    def mark_running(self):
+        self.state = 'running'
+        self.started_at = time.monotonic()
+
+    def counters(self):
+        """Contadores persistidos no diário da execução."""
+        return {'restarts': self.restarts, 'class_restarts': dict(self.class_restarts)}
+
+    def restore_counters(self, counters):
+        self.restarts = counters.get('restarts', 0)
+        self.class_restarts = dict(counters.get('class_restarts', {}))
+
+    def mark_terminal(self, state):
+        self.state = state
+
+    def record_failure(self, error_class, detail=None):
+        """
+        Registra uma falha e decide o próximo passo. Retorna None se a falha
+        deve ser ignorada (slot já em backoff ou encerrado).
+        """
+        if self.state != 'running':
+            return None
+        policy = RESTART_POLICIES.get(error_class, RESTART_POLICIES['crash'])
+        self.last_error = detail or error_class
+
+        # Uma execução longa o bastante prova que o slot se recuperou
+        if self.started_at is not None and time.monotonic() - self.started_at >= BOT_RESTART_STABLE_SECONDS:
+            self.streaks.clear()
+        streak = self.streaks.get(error_class, 0) + 1
+        self.streaks[error_class] = streak
+
+        if policy.max_restarts is None:
+            attempt, limit = self.restarts + 1, BOT_MAX_RESTARTS
+        else:
+            attempt, limit = self.class_restarts.get(error_class, 0) + 1, policy.max_restarts
+        if attempt > limit:
+            return RestartDecision(None, error_class, attempt - 1, limit, streak, False)
+
+        if policy.max_restarts is None:
+            self.restarts += 1
+        self.class_restarts[error_class] = self.class_restarts.get(error_class, 0) + 1
+
+        delay = min(policy.max_delay, policy.base_delay * 2 ** (streak - 1))
+        breaker_open = streak >= policy.breaker_threshold and policy.breaker_cooldown > 0
+        if breaker_open:
+            delay = max(delay, policy.breaker_cooldown)
+        delay *= random.uniform(1 - BOT_RESTART_JITTER, 1 + BOT_RESTART_JITTER)
+
+        self.state = 'backoff'
+        return RestartDecision(delay, error_class, attempt, limit, streak, breaker_open)
+
+
+class DeadlineHeap:
+    """
+    Heap de deadlines (time.monotonic) usada pelo loop do supervisor para
+    inícios, reinícios, inatividade e relatórios de status. O loop dorme até
+    o próximo deadline em vez de fazer polling.
+
+    Timers "não essenciais" (status, inatividade) não mantêm o loop vivo:
+    has_essential() só considera os que representam trabalho pendente.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._essential = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, delay, callback, *args, essential=True):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), callback, args, essential))
+        if essential:
+            self._essential += 1
+
+    def has_essential(self):
+        return self._essential > 0
+
+    def next_timeout(self):
+        """Segundos até o próximo deadline (None se a heap estiver vazia)."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.monotonic())
+
+    def pop_due(self):
+        """Remove e retorna (callback, args) de todos os timers vencidos."""
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, callback, args, essential = heapq.heappop(self._heap)
+            if essential:
+                self._essential -= 1
+            due.append((callback, args))
+        return due
+
 def start_bots(discord_webhook_url_br, discord_webhook_url_us, *bots_to_run):
     """
-    Executa BOTs específicos com delay progressivo entre eles.
+    Executa BOTs específicos, admitindo um de cada vez conforme a folga do host.
     Exemplo de uso: start_bots('A', 'B', 'D') para executar apenas os bots A, B e D.
     Se nenhum bot for especificado, executa os bots A e B por padrão.
+
+    Todos os bots são supervisionados por um único loop de eventos (selectors):
+    a leitura dos pipes é não-bloqueante e inícios, reinícios e encerramentos
+    são agendados como timers no próprio loop, sem uma thread por bot.
     Args:
         discord_webhook_url_br: URL do webhook do Discord para BR.
         discord_webhook_url_us: URL do webhook do Discord para US.
         *bots_to_run: Lista de letras dos bots a serem executados.
     """
-    global is_shutdown_requested, banned_bots  # Declarar uso da variável global
-    
+    global is_shutdown_requested, banned_bots, processes  # Declarar uso da variável global
+
     # Shutdown flag
     is_shutdown_requested = False
     if not bots_to_run:
@@ -1295,7 +3527,7 @@ def start_bots(discord_webhook_url_br, discord_webhook_url_us, *bots_to_run):
 
     # Converte para maiúsculas para garantir consistência
     bots_to_run = [bot.upper() for bot in bots_to_run]
-    
+
     # Verificar status de bots banidos
     if banned_bots:
         banned_in_request = [bot for bot in bots_to_run if bot in banned_bots]
@@ -1306,41 +3538,28 @@ def start_bots(discord_webhook_url_br, discord_webhook_url_us, *bots_to_run):
             if not bots_to_run:
                 print("❌ Todos os bots solicitados estão banidos. Nenhum bot será iniciado.")
                 return
-        
+
         all_banned = ", ".join(sorted(banned_bots))
         print(f"🚫 Bots atualmente banidos: {all_banned}")
     else:
         print("✅ Nenhum bot está atualmente banido.")
-    
+
     if bots_to_run:
         active_bots = ", ".join(bots_to_run)
         print(f"🚀 Bots que serão iniciados: {active_bots}")
-    
-    # Dicionário com os comandos para cada bot
-    commands = {
-        'A': f"cd {BASEDIR}/{BOT_BASE_DIR_NAME}_A && TZ=America/Sao_Paulo npm run start",
-        'B': f"cd {BASEDIR}/{BOT_BASE_DIR_NAME}_B && TZ=America/Sao_Paulo npm run start",
-        'C': f"cd {BASEDIR}/{BOT_BASE_DIR_NAME}_C && TZ=America/Sao_Paulo npm run start",
-        'D': f"cd {BASEDIR}/{BOT_BASE_DIR_NAME}_D && TZ=America/Sao_Paulo npm run start",
-        'E': f"cd {BASEDIR}/{BOT_BASE_DIR_NAME}_E && TZ=America/Sao_Paulo npm run start",
-    }
-    
+
     # Cores ANSI para cada bot
-    bot_colors = {
-        'A': '\033[92m',  # Verde
-        'B': '\033[94m',  # Azul
-        'C': '\033[93m',  # Amarelo
-        'D': '\033[95m',  # Magenta
-        'E': '\033[96m',  # Ciano
+    bot_colors = {slot: bot_color(slot) for slot in bots_to_run}
+    bot_colors.update({
         'Sistema': '\033[97m',  # Branco
         'Erro': '\033[91m',  # Vermelho para erros
         'Aviso': '\033[33m',  # Laranja para avisos
         'Sucesso': '\033[32m'  # Verde escuro para sucesso
-    }
-    
+    })
+
     # Código ANSI para resetar a cor
     reset_color = '\033[0m'
-    
+
     # Função para imprimir com cor
     def print_colored(bot, message, is_error=False, is_warning=False, is_success=False):
         if is_error:
@@ -1351,687 +3570,684 @@ def start_bots(discord_webhook_url_br, discord_webhook_url_us, *bots_to_run):
             color = bot_colors.get('Sucesso', reset_color)
         else:
             color = bot_colors.get(bot, reset_color)
-        # Usar sys.stdout.write para garantir que vá para o logger redirecionado
-        # e flush para tentar forçar a escrita imediata.
+        # Usar sys.stdout.write para garantir que vá para o logger redirecionado.
+        # Linhas dos bots não forçam flush (feito em lote por flush_output);
+        # mensagens do sistema continuam imediatas.
         sys.stdout.write(f"{color}[{bot}]: {message}{reset_color}\n")
-        sys.stdout.flush()
-    
-    # Lista para armazenar os processos
+        if bot == 'Sistema':
+            sys.stdout.flush()
+
+    # Processos vivos dos bots (global: kill_all_bots encerra pelos Popen, não por PIDs antigos)
     processes = {}
-    
-    # Contador de reinicializações para cada bot
-    restart_counts = {bot: 0 for bot in bots_to_run}
-    max_restarts = 8  # Número máximo de erros críticos antes de parar de reiniciar
-    
+
+    # Máquina de estados de reinício de cada bot (backoff e circuit breakers por classe de erro)
+    restart_states = {bot: SlotRestartState(bot) for bot in bots_to_run}
+    bot_restart_states.update(restart_states)
+    # Ao retomar uma execução, os reinícios já gastos continuam contando
+    if run_journal is not None:
+        for bot, counters in run_journal.get_state("restart_counts", {}).items():
+            if bot in restart_states:
+                restart_states[bot].restore_counters(counters)
+
     # Controle de estado dos bots (novo)
     bot_states = {bot: 'running' for bot in bots_to_run}  # 'running', 'completed', 'failed', 'banned', 'inactive_timeout'
-    
-    # Contador de reinicializações por timeout de inatividade para cada bot
-    timeout_restart_counts = {bot: 0 for bot in bots_to_run}
-    max_timeout_restarts = 1  # Número máximo de tentativas de reinício após timeout por inatividade
-    
-    # Controle de tempo de última atividade para cada bot
-    bot_last_activity = {bot: time.time() for bot in bots_to_run}
-    
+
+    # Controle de tempo de última atividade para cada bot (time.monotonic)
+    bot_last_activity = {bot: time.monotonic() for bot in bots_to_run}
+
+    # Últimas linhas de cada bot (memória limitada) e spool em disco com rotação
+    bot_log_rings = {bot: deque(maxlen=BOT_LOG_RING_LINES) for bot in bots_to_run}
+    bot_log_spools = {bot: BotLogSpool(bot) for bot in bots_to_run}
+
     # Controle da última mensagem de atividade para cada bot
     bot_last_message = {bot: "Bot iniciado" for bot in bots_to_run}
-    
+
+    # Último erro crítico detectado por bot (usado nos alertas de max restart)
+    bot_last_critical_error = {bot: None for bot in bots_to_run}
+
     # Timeout de inatividade (30 minutos = 1800 segundos)
-    INACTIVITY_TIMEOUT = 30 * 60  # 30 minutos
-    
-    # Padrões de erro críticos que causam o fechamento do bot
-    critical_error_patterns = [
-        "Error: EIO: i/o error, close",
-        "[MAIN-ERROR] Error running desktop bot: undefined",
-        "ECONNRESET",
-        "ERR_UNHANDLED_REJECTION",
-        "ENOTCONN:",
-        "Navigation timeout of",
-        "[LOGIN] An error occurred: TimeoutError",
-        "Error running desktop bot",
-        "Too Many Requests",
-        "Terminating bot due to",
-        "Email field not present",
-        #"[LOGIN] Email field not found",
-        "Error: SyntaxError"
-    ]
-    
-    # Função para iniciar um bot com delay
-    def start_delayed_bot(bot_letter, position, is_restart=False):
+    INACTIVITY_TIMEOUT = BOT_INACTIVITY_TIMEOUT_SECONDS
+
+    # ---------------------------------------------------------------
+    # Infraestrutura do loop único: selector para os pipes, heap de timers
+    # e um pool pequeno para efeitos colaterais bloqueantes (Discord, etc.)
+    # ---------------------------------------------------------------
+    selector = selectors.DefaultSelector()
+    timers = DeadlineHeap()
+    output_buffers = {}  # bot_letter -> bytes parciais ainda sem '\n'
+    exiting = {}  # bot_letter -> processo cujo pipe fechou, aguardando código de saída
+    retired = set()  # PIDs encerrados pelo supervisor (saída não gera novo reinício)
+    process_started_at = {}  # PID -> time.monotonic() do início
+    pending_starts = set()  # bots com início/reinício agendado no loop
+    admission_queue = deque()  # bots prontos para iniciar, aguardando admissão
+    admission_state = {
+        'last_admit': 0.0,      # time.monotonic() do último início
+        'starting': None,       # (bot_letter, processo, início) ainda abrindo o navegador
+        'paused_reason': None,  # motivo da pausa atual (para logar só mudanças)
+        'recheck_armed': False, # já existe um timer de reavaliação na heap
+    }
+    io_pool = ThreadPoolExecutor(max_workers=SUPERVISOR_IO_WORKERS, thread_name_prefix="rwds-io")
+
+    def schedule(delay, callback, *args, essential=True):
+        timers.schedule(delay, callback, *args, essential=essential)
+
+    def run_in_background(func, *args):
+        """Executa chamadas de rede fora do loop para não atrasar a leitura dos pipes."""
+        def _guarded():
+            try:
+                func(*args)
+            except Exception as e:
+                print_colored('Sistema', f"Erro em tarefa de segundo plano {getattr(func, '__name__', func)}: {str(e)}", is_error=True)
+        io_pool.submit(_guarded)
+
+    def run_due_timers():
+        for callback, args in timers.pop_due():
+            try:
+                callback(*args)
+            except Exception as e:
+                print_colored('Sistema', f"Erro ao executar timer {getattr(callback, '__name__', callback)}: {str(e)}", is_error=True)
+
+    def detach_output(process):
+        """Remove o pipe do processo do selector e o fecha."""
+        try:
+            selector.unregister(process.stdout)
+        except (KeyError, ValueError):
+            pass
+        try:
+            process.stdout.close()
+        except Exception:
+            pass
+
+    def kill_if_alive(bot_letter, process, tree):
+        # Escala para SIGKILL o que restou da árvore capturada no SIGTERM
+        if signal_process_tree(tree, signal.SIGKILL):
+            print_colored('Sistema', f"Bot {bot_letter} não respondeu ao SIGTERM. Forçando encerramento...", is_warning=True)
+        process.poll()
+
+    def retire_process(bot_letter, process, grace=10):
+        """
+        Encerra a árvore de processos de um bot sem bloquear o loop: SIGTERM
+        agora nos grupos do bot e SIGKILL agendado após `grace` segundos para
+        o que ainda estiver vivo.
+        """
+        retired.add(process.pid)
+        detach_output(process)
+        exiting.pop(bot_letter, None)
+        output_buffers.pop(bot_letter, None)
+        with processes_lock:
+            if processes.get(bot_letter) is process:
+                del processes[bot_letter]
+                # PIDs desta instância não valem mais (podem ser reaproveitados pelo sistema)
+                bot_pids[bot_letter] = []
+        try:
+            tree = signal_process_tree(process_tree([process.pid]), signal.SIGTERM)
+            if tree:
+                schedule(grace, kill_if_alive, bot_letter, process, tree)
+        except Exception as e:
+            print_colored('Sistema', f"Erro ao encerrar Bot {bot_letter}: {str(e)}", is_error=True)
+
+    # Função para iniciar um bot (sempre chamada a partir do loop)
+    def start_bot(bot_letter, is_restart=False):
         try:
             # Verificar se o bot está na lista de banidos antes de iniciar
             if bot_letter in banned_bots:
                 print_colored('Sistema', f"Bot {bot_letter} está na lista de contas banidas. Não será iniciado.", is_error=True)
-                return False
-            
-            # Se for uma reinicialização, não aplicar o delay inicial
-            if not is_restart:
-                # Delay progressivo: 0 seg para o primeiro, BOT_START_DELAY_SECONDS para o segundo, etc.
-                delay = position * BOT_START_DELAY_SECONDS  # Delay configurável multiplicado pela posição
-
-                if delay > 0:
-                    print_colored('Sistema', f"Bot {bot_letter} iniciará em {delay} segundos...")
-                    time.sleep(delay)
-            
+                return None
+
             # Mensagem diferente para reinicialização
             if is_restart:
                 print_colored('Sistema', f"Reiniciando Bot {bot_letter} após erro crítico...", is_warning=True)
             else:
                 print_colored('Sistema', f"Iniciando Bot {bot_letter} agora...")
-            
+
             # Verificações de pré-requisitos
             bot_dir = f"{BASEDIR}/{BOT_BASE_DIR_NAME}_{bot_letter}"
             if not os.path.exists(bot_dir):
                 print_colored('Sistema', f"Diretório do Bot {bot_letter} não encontrado: {bot_dir}", is_error=True)
-                return False
-                
+                return None
+
             if not os.path.exists(f"{bot_dir}/package.json"):
                 print_colored('Sistema', f"package.json não encontrado para Bot {bot_letter}", is_error=True)
-                return False
-                
+                return None
+
             if not os.path.exists(f"{bot_dir}/dist"):
                 print_colored('Sistema', f"Diretório dist não encontrado para Bot {bot_letter}. A compilação pode ter falhado.", is_error=True)
-                return False
-            
+                return None
+
             # Comando para executar o bot
             command = f"""
-            cd {bot_dir} && 
+            cd {bot_dir} &&
             echo "Verificando ambiente do Bot {bot_letter}..." &&
             echo "Node version: $(node -v)" &&
             echo "NPM version: $(npm -v)" &&
             echo "Iniciando execução do Bot {bot_letter}..." &&
             TZ=America/Sao_Paulo npm run start 2>&1
             """
-            
-            # Iniciar o processo
+
+            # Iniciar o processo (pipe binário, lido de forma não-bloqueante pelo loop)
             process = subprocess.Popen(
                 command,
                 shell=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                start_new_session=True,  # grupo próprio: encerramento não afeta outros slots
             )
-            
+            os.set_blocking(process.stdout.fileno(), False)
+            selector.register(process.stdout, selectors.EVENT_READ, bot_letter)
+            output_buffers[bot_letter] = b""
+
             with processes_lock:
                 processes[bot_letter] = process
-            
-            # Função para monitorar a saída do processo
-            def monitor_output(process, bot_letter):
-                try:
-                    no_output_counter = 0
-                    start_time = time.time()
-                    last_critical_error = None  # Armazenar o último erro crítico detectado
-                    
-                    # Registrar o PID do processo principal
-                    if process.pid:
-                        if bot_letter in bot_pids:
-                            bot_pids[bot_letter].append(process.pid)
-                            print_colored('Sistema', f"PID principal {process.pid} registrado para Bot {bot_letter}", is_success=True)
-                    
-                    # Ler a saída linha por linha
-                    for line in iter(process.stdout.readline, ''):
-                        if line.strip():  # Ignorar linhas vazias
-                            # Atualizar timestamp da última atividade
-                            bot_last_activity[bot_letter] = time.time()
-                            
-                            # Capturar e limpar a última mensagem para armazenar
-                            cleaned_line = line.strip()
-                            # Remover códigos de cores ANSI e caracteres especiais
-                            cleaned_line = re.sub(r'\x1b\[[0-9;]*m', '', cleaned_line)
-                            # Limitar o tamanho da mensagem para evitar overflow no Discord
-                            if len(cleaned_line) > 100:
-                                cleaned_line = cleaned_line[:97] + "..."
-                            bot_last_message[bot_letter] = cleaned_line
-                            
-                            # Extrair PIDs da saída
-                            if "[PID:" in line or "PID:" in line or "pid:" in line:
-                                try:
-                                    # Extrair o PID usando expressão regular
-                                    pid_match = re.search(r'PID:?\s*(\d+)', line, re.IGNORECASE)
-                                    if pid_match:
-                                        pid = int(pid_match.group(1))
-                                        if pid not in bot_pids[bot_letter]:
-                                            bot_pids[bot_letter].append(pid)
-                                            print_colored('Sistema', f"PID {pid} registrado para Bot {bot_letter}", is_success=True)
-                                except:
-                                    pass
-                            
-                            # Na função monitor_output, dentro do loop que processa a saída do bot:
-                            # Verificar se a linha contém informações sobre pontos e adicionar emotes se necessário
-                            for key in ["Current total:", "Current point count:"]:
-                                if key in line:
-                                    try:
-                                        total_text = line.split(key)[1].strip()
-                                        total_points = int(''.join(filter(str.isdigit, total_text)))
-                                        if total_points > 1:
-                                            original_line = line.strip()
-                                            line = f"🚨🚨🚨 {original_line} 🚨🚨🚨"
-                                            threading.Thread(target=send_discord_redeem_alert, args=(bot_letter, original_line, discord_webhook_url_br, discord_webhook_url_us)).start()
-                                    except (ValueError, IndexError):
-                                        pass
-                                    break  # Garante que só processa uma vez por linha
-                            if "Account has been suspended!" in line:
-                                bot_states[bot_letter] = 'banned'  # Marcar como banido
-                                threading.Thread(target=send_discord_suspension_alert, args=(bot_letter, discord_webhook_url_br, discord_webhook_url_us)).start()
-                            
-                            # Verificar BING.COM UNREACHABLE e reiniciar Space após 5 detecções
-                            if "BING.COM UNREACHABLE" in line.upper():
-                                global bing_unreachable_count, space_restart_triggered
-                                bing_unreachable_count += 1
-                                print_colored('Sistema', f"⚠️ BING.COM UNREACHABLE detectado ({bing_unreachable_count}/{BING_UNREACHABLE_THRESHOLD})", is_warning=True)
-                                
-                                # Só executa restart uma única vez
-                                if bing_unreachable_count >= BING_UNREACHABLE_THRESHOLD and not space_restart_triggered:
-                                    space_restart_triggered = True  # Marcar que restart foi acionado
-                                    print_colored('Sistema', f"🔄 Limite de {BING_UNREACHABLE_THRESHOLD} detecções de BING.COM UNREACHABLE atingido. Reiniciando Space...", is_error=True)
-                                    
-                                    # Sinalizar shutdown para evitar reinícios de bots
-                                    global is_shutdown_requested
-                                    is_shutdown_requested = True
-                                    
-                                    # Enviar notificação para Discord antes de reiniciar (apenas uma vez)
-                                    if discord_webhook_log_env:
-                                        threading.Thread(
-                                            target=send_discord_log_message,
-                                            args=(bot_acc_env, f"🔄 Space sendo reiniciado após {BING_UNREACHABLE_THRESHOLD}x BING.COM UNREACHABLE", discord_webhook_log_env)
-                                        ).start()
-                                    
-                                    # Matar todos os bots antes de reiniciar o Space
-                                    print_colored('Sistema', "🛑 Encerrando todos os bots antes de reiniciar o Space...", is_warning=True)
-                                    
-                                    # Matar processos de forma assíncrona para não bloquear
-                                    def kill_bots_before_restart():
-                                        try:
-                                            # Matar processos de navegadores e bots
-                                            subprocess.run(f"pkill -9 -f '{BOT_BASE_DIR_NAME}_[A-E]' 2>/dev/null", shell=True)
-                                            subprocess.run(f"pkill -9 -f 'node.*{BOT_BASE_DIR_NAME}'", shell=True)
-                                            subprocess.run("pkill -9 -f 'firefox'", shell=True, check=False)
-                                            subprocess.run("pkill -9 -f 'chromium'", shell=True, check=False)
-                                            subprocess.run("pkill -9 -f 'chrome'", shell=True, check=False)
-                                            subprocess.run("pkill -9 -f 'thorium-browser'", shell=True, check=False)
-                                            print_colored('Sistema', "✅ Bots encerrados antes do restart do Space.", is_success=True)
-                                        except Exception as e:
-                                            print_colored('Sistema', f"⚠️ Erro ao encerrar bots: {str(e)}", is_warning=True)
-                                    
-                                    threading.Thread(target=kill_bots_before_restart, daemon=True).start()
-                                    
-                                    # Chamar restart_space se as credenciais estiverem configuradas
-                                    if hf_token_env and space_repo_id_env:
-                                        # Executar em thread separada para não bloquear
-                                        def restart_space_thread():
-                                            try:
-                                                time.sleep(2)  # Aguardar bots serem encerrados
-                                                restart_space(hf_token_env, space_repo_id_env, factory_reboot=True)
-                                            except Exception as e:
-                                                print_colored('Sistema', f"❌ Erro ao reiniciar Space: {str(e)}", is_error=True)
-                                        
-                                        threading.Thread(target=restart_space_thread, daemon=True).start()
-                                    else:
-                                        print_colored('Sistema', "❌ HF_TOKEN ou SPACE_REPO_ID não configurados. Não foi possível reiniciar o Space.", is_error=True)
-                            
-                            # Verificar erros que requerem deleção de cookies
-                            if "Invalid cookie fields" in line or "net::ERR_TUNNEL_CONNECTION_FAILED" in line:
-                                error_type = "cookies inválidos" if "Invalid cookie fields" in line else "erro de conexão tunnel"
-                                print_colored('Sistema', f"Erro de {error_type} detectado no Bot {bot_letter}. Deletando cookies...", is_warning=True)
-                                if delete_bot_cookies(bot_letter):
-                                    print_colored('Sistema', f"Cookies do Bot {bot_letter} deletados com sucesso.", is_success=True)
-                                else:
-                                    print_colored('Sistema', f"Falha ao deletar cookies do Bot {bot_letter}.", is_error=True)
-                            
-                            print_colored(bot_letter, line.strip())
-                            no_output_counter = 0
-                            
-                            # Verificar se a linha contém algum dos padrões de erro crítico
-                            critical_error_found = None
-                            for pattern in critical_error_patterns:
-                                if pattern in line:
-                                    critical_error_found = pattern
-                                    last_critical_error = line.strip()  # Capturar a linha completa do erro
-                                    break
-                            
-                            if critical_error_found:
-                                print_colored('Sistema', f"Detectado erro crítico no Bot {bot_letter}: {critical_error_found}", is_error=True)
-                                
-                                # Se o Space está sendo reiniciado, não fazer nada (evitar flood)
-                                if space_restart_triggered:
-                                    print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
-                                    return
-                                
-                                # Verificar se o bot está na lista de banidos
-                                if bot_letter in banned_bots:
-                                    print_colored('Sistema', f"Bot {bot_letter} está na lista de contas banidas. Não será reiniciado.", is_error=True)
-                                    return
-                                
-                                # Verificar se não está em processo de desligamento antes de tentar reiniciar
-                                if not is_shutdown_requested:
-                                    if restart_counts[bot_letter] < max_restarts:
-                                        time.sleep(10)
-                                        
-                                        # Verificar novamente após o sleep se o Space foi acionado para restart
-                                        if space_restart_triggered:
-                                            print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
-                                            return
-                                        
-                                        restart_counts[bot_letter] += 1
-                                        print_colored('Sistema', f"Tentativa de reinicialização {restart_counts[bot_letter]}/{max_restarts} para Bot {bot_letter}", is_warning=True)
-                                        
-                                        # Enviar mensagem para Discord com detalhes do erro (só se não estiver reiniciando Space)
-                                        if not space_restart_triggered:
-                                            DISCORD_WEBHOOK_LOG = discord_webhook_log_env
-                                            BOT_ACC = bot_acc_env
-                                            # Limpar a mensagem de erro antes de enviar
-                                            cleaned_error = clean_error_message(last_critical_error)
-                                            error_message = f"Reiniciando Bot {bot_letter} após erro crítico: {cleaned_error}"
-                                            send_discord_log_message(BOT_ACC, error_message, DISCORD_WEBHOOK_LOG)
-                                        
-                                        # Encerrar o processo atual
-                                        process.terminate()
-                                        try:
-                                            process.wait(timeout=10)
-                                        except subprocess.TimeoutExpired:
-                                            process.kill()
-                                        
-                                        # Remover o processo antigo do dicionário
-                                        with processes_lock:
-                                            if bot_letter in processes:
-                                                del processes[bot_letter]
-                                        
-                                        # Só reiniciar bot se Space não estiver reiniciando
-                                        if space_restart_triggered:
-                                            print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
-                                            return
-                                        
-                                        # Iniciar uma nova thread para reiniciar o bot após um breve delay
-                                        def restart_bot_wrapper():
-                                            time.sleep(10)
-                                            # Verificar mais uma vez antes de reiniciar
-                                            if space_restart_triggered:
-                                                print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
-                                                return
-                                            new_process = start_delayed_bot(bot_letter, position, is_restart=True)
-                                            if new_process:
-                                                # Adicionar o novo processo ao dicionário global
-                                                with processes_lock:
-                                                    processes[bot_letter] = new_process
-                                                print_colored('Sistema', f"Bot {bot_letter} reiniciado com sucesso.", is_success=True)
-                                            else:
-                                                print_colored('Sistema', f"Falha ao reiniciar Bot {bot_letter}.", is_error=True)
-                                        
-                                        restart_thread = threading.Thread(target=restart_bot_wrapper)
-                                        restart_thread.daemon = False  # Não daemon para não morrer com o programa principal
-                                        restart_thread.start()
-                                        return
-                                    else:
-                                        print_colored('Sistema', f"Número máximo de reinicializações ({max_restarts}) atingido para Bot {bot_letter}. Não será reiniciado.", is_error=True)
-                                        bot_states[bot_letter] = 'failed'  # Marcar como falhou definitivamente
-                                        # Enviar notificação para Discord sobre max restarts atingido
-                                        last_err = last_critical_error if last_critical_error else "Erro crítico não especificado"
-                                        threading.Thread(target=send_discord_max_restart_alert, args=(bot_letter, discord_webhook_url_br, discord_webhook_url_us, max_restarts, last_err)).start()
-                                else:
-                                    print_colored('Sistema', f"Desligamento solicitado. Bot {bot_letter} não será reiniciado.", is_warning=True)
-
-                        else:
-                            no_output_counter += 1
-                            
-                            # Verificar timeout de inatividade quando não há saída
-                            current_time = time.time()
-                            time_since_last_activity = current_time - bot_last_activity[bot_letter]
-                            
-                            if time_since_last_activity > INACTIVITY_TIMEOUT:
-                                print_colored('Sistema', f"Bot {bot_letter} ficou inativo por {int(time_since_last_activity/60)} minutos. Encerrando por timeout de inatividade.", is_warning=True)
-                                
-                                # Verificar se já tentou reiniciar por timeout
-                                if timeout_restart_counts[bot_letter] < max_timeout_restarts:
-                                    # Ainda pode tentar reiniciar
-                                    timeout_restart_counts[bot_letter] += 1
-                                    print_colored('Sistema', f"Bot {bot_letter} inativo - tentando reiniciar ({timeout_restart_counts[bot_letter]}/{max_timeout_restarts})...", is_warning=True)
-                                    
-                                    # Enviar mensagem para Discord sobre reinício por inatividade
-                                    last_msg = bot_last_message.get(bot_letter, "Nenhuma atividade recente")
-                                    
-                                    # Encerrar o processo atual
-                                    try:
-                                        process.terminate()
-                                        time.sleep(5)
-                                        if process.poll() is None:
-                                            process.kill()
-                                    except Exception as e:
-                                        print_colored('Sistema', f"Erro ao encerrar Bot {bot_letter}: {str(e)}", is_error=True)
-                                    
-                                    # Remover o processo antigo do dicionário
-                                    with processes_lock:
-                                        if bot_letter in processes:
-                                            del processes[bot_letter]
-                                    
-                                    # Resetar o timestamp de última atividade
-                                    bot_last_activity[bot_letter] = time.time()
-                                    bot_last_message[bot_letter] = "Bot reiniciado após timeout de inatividade"
-                                    
-                                    # Iniciar uma nova thread para reiniciar o bot
-                                    def restart_bot_timeout_wrapper():
-                                        time.sleep(10)
-                                        new_process = start_delayed_bot(bot_letter, 0, is_restart=True)
-                                        if new_process:
-                                            with processes_lock:
-                                                processes[bot_letter] = new_process
-                                            bot_states[bot_letter] = 'running'
-                                            print_colored('Sistema', f"Bot {bot_letter} reiniciado com sucesso após timeout de inatividade.", is_success=True)
-                                        else:
-                                            print_colored('Sistema', f"Falha ao reiniciar Bot {bot_letter} após timeout.", is_error=True)
-                                            bot_states[bot_letter] = 'inactive_timeout'
-                                    
-                                    restart_thread = threading.Thread(target=restart_bot_timeout_wrapper)
-                                    restart_thread.daemon = False
-                                    restart_thread.start()
-                                    return
-                                else:
-                                    # Já tentou reiniciar, agora encerra definitivamente
-                                    print_colored('Sistema', f"Bot {bot_letter} já foi reiniciado {max_timeout_restarts}x por inatividade. Encerrando definitivamente.", is_warning=True)
-                                    
-                                    # Marcar como encerrado por inatividade
-                                    bot_states[bot_letter] = 'inactive_timeout'
-                                    
-                                    # Enviar mensagem para Discord sobre o encerramento por inatividade
-                                    last_msg = bot_last_message.get(bot_letter, "Nenhuma atividade recente")
-                                    threading.Thread(target=send_discord_timeout_alert, args=(bot_letter, discord_webhook_url_br, discord_webhook_url_us, last_msg)).start()
-                                    
-                                    # Encerrar o processo
-                                    try:
-                                        process.terminate()
-                                        time.sleep(5)
-                                        if process.poll() is None:
-                                            process.kill()
-                                        print_colored('Sistema', f"Bot {bot_letter} encerrado definitivamente por timeout de inatividade.", is_warning=True)
-                                    except Exception as e:
-                                        print_colored('Sistema', f"Erro ao encerrar Bot {bot_letter}: {str(e)}", is_error=True)
-                                    
-                                    return  # Encerrar o monitoramento deste bot
-                            
-                        # Verificar se o processo está sem saída por muito tempo
-                        if no_output_counter > 100:
-                            if process.poll() is not None:
-                                break
-                            
-                            # Verificar se passou muito tempo sem saída (5 minutos)
-                            if time.time() - start_time > 300:
-                                print_colored(bot_letter, "Sem saída por 5 minutos, verificando status...", is_warning=True)
-                                try:
-                                    os.kill(process.pid, 0)  # Verifica se o processo existe
-                                    print_colored(bot_letter, "Processo ainda está em execução, continuando...", is_warning=True)
-                                except OSError:
-                                    print_colored(bot_letter, "Processo não está mais respondendo", is_error=True)
-                                    break
-                                
-                                no_output_counter = 0
-                                start_time = time.time()
-                    
-                    # Verificar o código de saída quando o processo terminar
-                    exit_code = process.wait()
-                    if exit_code == 0:
-                        print_colored('Sistema', f"Bot {bot_letter} concluído com sucesso.", is_success=True)
-                        bot_states[bot_letter] = 'completed'  # Marcar como concluído com sucesso
-                        
-                        # Verificar quais bots ainda estão em execução
-                        running_bots = [b for b, p in processes.items() if p.poll() is None and b != bot_letter]
-                        if running_bots:
-                            running_bots_str = ", ".join(running_bots)
-                            print_colored('Sistema', f"Bots {running_bots_str} ainda em execução.", is_warning=True)
-                        else:
-                            print_colored('Sistema', "Todos os bots concluíram a execução.", is_success=True)
-                    else:
-                        print_colored('Sistema', f"Bot {bot_letter} encerrou com código {exit_code}.", is_error=True)
-                        
-                        # Verificar quais bots ainda estão em execução
-                        running_bots = [b for b, p in processes.items() if p.poll() is None and b != bot_letter]
-                        if running_bots:
-                            running_bots_str = ", ".join(running_bots)
-                            print_colored('Sistema', f"Bots {running_bots_str} ainda em execução.", is_warning=True)
-                        
-                        # Tentar reiniciar se o bot encerrou com erro
-                        if restart_counts[bot_letter] < max_restarts:
-                            # Verificar se o bot está na lista de banidos antes de reiniciar
-                            if bot_letter in banned_bots:
-                                print_colored('Sistema', f"Bot {bot_letter} está na lista de contas banidas. Não será reiniciado.", is_error=True)
-                                bot_states[bot_letter] = 'banned'
-                                return
-                            
-                            restart_counts[bot_letter] += 1
-                            print_colored('Sistema', f"Tentativa de reinicialização {restart_counts[bot_letter]}/{max_restarts} para Bot {bot_letter} devido a código de saída {exit_code}", is_warning=True)
-                            
-                            # Remover o processo antigo do dicionário
-                            with processes_lock:
-                                if bot_letter in processes:
-                                    del processes[bot_letter]
-                            
-                            # Iniciar uma nova thread para reiniciar o bot após um breve delay
-                            def restart_bot_wrapper():
-                                time.sleep(10)
-                                new_process = start_delayed_bot(bot_letter, position, is_restart=True)
-                                if new_process:
-                                    # Adicionar o novo processo ao dicionário global
-                                    with processes_lock:
-                                        processes[bot_letter] = new_process
-                                    print_colored('Sistema', f"Bot {bot_letter} reiniciado com sucesso após código de saída {exit_code}.", is_success=True)
-                                else:
-                                    print_colored('Sistema', f"Falha ao reiniciar Bot {bot_letter} após código de saída {exit_code}.", is_error=True)
-                            
-                            restart_thread = threading.Thread(target=restart_bot_wrapper)
-                            restart_thread.daemon = False  # Não daemon para não morrer com o programa principal
-                            restart_thread.start()
-                        elif restart_counts[bot_letter] >= max_restarts:
-                            # Só enviar notificação se ainda não foi marcado como 'failed' (evita duplicação)
-                            if bot_states.get(bot_letter) != 'failed':
-                                print_colored('Sistema', f"Número máximo de reinicializações ({max_restarts}) atingido para Bot {bot_letter}. Não será reiniciado.", is_error=True)
-                                bot_states[bot_letter] = 'failed'  # Marcar como falhou definitivamente
-                                # Enviar notificação para Discord sobre max restarts atingido
-                                last_err = f"Código de saída: {exit_code}"
-                                threading.Thread(target=send_discord_max_restart_alert, args=(bot_letter, discord_webhook_url_br, discord_webhook_url_us, max_restarts, last_err)).start()
-                        
-                except Exception as e:
-                    print_colored('Sistema', f"Erro ao monitorar Bot {bot_letter}: {str(e)}", is_error=True)
-            
-            # Iniciar thread para monitorar a saída
-            monitor_thread = threading.Thread(target=monitor_output, args=(process, bot_letter))
-            monitor_thread.daemon = True
-            monitor_thread.start()
-            
-            # Verificar se o processo iniciou corretamente
-            time.sleep(5)
-            if process.poll() is not None:
-                print_colored('Sistema', f"Bot {bot_letter} encerrou prematuramente com código {process.returncode}", is_error=True)
-                # Remover do dicionário de processos se falhou
-                with processes_lock:
-                    if bot_letter in processes:
-                        del processes[bot_letter]
-                return None
-                
-            return process  # Retornar o processo em vez de True
-            
+
+            # Registrar o PID do processo principal
+            if process.pid:
+                bot_pids.setdefault(bot_letter, []).append(process.pid)
+                print_colored('Sistema', f"PID principal {process.pid} registrado para Bot {bot_letter}", is_success=True)
+
+            # Armar o deadline de inatividade deste processo
+            process_started_at[process.pid] = time.monotonic()
+            bot_last_activity[bot_letter] = time.monotonic()
+            schedule(INACTIVITY_TIMEOUT, check_inactivity, bot_letter, process, essential=False)
+            return process
+
         except Exception as e:
             print_colored('Sistema', f"Erro ao iniciar Bot {bot_letter}: {str(e)}", is_error=True)
             return None
-    
-    # Resto da função permanece igual
-    threads = []
-    for i, bot_letter in enumerate(bots_to_run):
-        if bot_letter in commands:
-            def start_initial_bot(bot_letter, position):
-                new_process = start_delayed_bot(bot_letter, position, is_restart=False)
-                if new_process:
-                    print_colored('Sistema', f"Bot {bot_letter} iniciado com sucesso.", is_success=True)
-                else:
-                    print_colored('Sistema', f"Falha ao iniciar Bot {bot_letter}.", is_error=True)
-            
-            bot_thread = threading.Thread(target=start_initial_bot, args=(bot_letter, i))
-            bot_thread.daemon = False  # Não daemon para não morrer com o programa principal
-            bot_thread.start()
-            threads.append(bot_thread)
+
+    def scheduled_start(bot_letter, is_restart, success_message, failure_message, failure_state=None):
+        # O delay terminou: o bot entra na fila de admissão
+        admission_queue.append((bot_letter, is_restart, success_message, failure_message, failure_state))
+
+    def admission_block_reason():
+        """Motivo pelo qual o próximo bot ainda não pode iniciar (None = pode)."""
+        if time.monotonic() - admission_state['last_admit'] < ADMISSION_MIN_GAP_SECONDS:
+            return "intervalo mínimo entre inícios"
+        starting = admission_state['starting']
+        if starting:
+            starting_bot, starting_process, started_at = starting
+            still_starting = (
+                starting_process.poll() is None
+                and processes.get(starting_bot) is starting_process
+                and time.monotonic() - started_at < ADMISSION_STARTUP_TIMEOUT_SECONDS
+            )
+            if still_starting:
+                return f"Bot {starting_bot} ainda abrindo o navegador"
+            admission_state['starting'] = None
+        # Sem nenhum bot ativo não há quem liberar recursos: admite mesmo sob pressão
+        if not any(p.poll() is None for p in processes.values()):
+            return None
+        return host_pressure_reason()
+
+    def admission_recheck():
+        admission_state['recheck_armed'] = False
+
+    def admit_pending_bots():
+        if not admission_queue:
+            return
+        reason = admission_block_reason()
+        if reason:
+            # Acordar o loop para reavaliar (métricas do host não geram eventos)
+            if not admission_state['recheck_armed']:
+                admission_state['recheck_armed'] = True
+                schedule(ADMISSION_RECHECK_SECONDS, admission_recheck, essential=False)
+            # Só anuncia pausas causadas pelo host, não a espera normal entre inícios
+            if reason != admission_state['paused_reason'] and not reason.startswith(("intervalo", "Bot ")):
+                print_colored('Sistema', f"⏸️ Admissão de bots pausada: {reason}. Aguardando: {', '.join(b for b, *_ in admission_queue)}", is_warning=True)
+                admission_state['paused_reason'] = reason
+            return
+        if admission_state['paused_reason']:
+            print_colored('Sistema', "▶️ Admissão de bots retomada.", is_success=True)
+            admission_state['paused_reason'] = None
+        admit_bot(*admission_queue.popleft())
+
+    def admit_bot(bot_letter, is_restart, success_message, failure_message, failure_state=None):
+        pending_starts.discard(bot_letter)
+        # Verificar mais uma vez antes de (re)iniciar
+        if space_restart_triggered:
+            print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
+            return
+        if is_shutdown_requested:
+            print_colored('Sistema', f"Desligamento solicitado. Bot {bot_letter} não será iniciado.", is_warning=True)
+            return
+        if bot_letter in processes:
+            # Evita iniciar duas instâncias do mesmo bot
+            print_colored('Sistema', f"Bot {bot_letter} já está em execução. Início duplicado ignorado.", is_warning=True)
+            return
+        new_process = start_bot(bot_letter, is_restart=is_restart)
+        admission_state['last_admit'] = time.monotonic()
+        if new_process:
+            admission_state['starting'] = (bot_letter, new_process, time.monotonic())
+            restart_states[bot_letter].mark_running()
+            journal_slot_state(bot_letter, 'running', 'restart' if is_restart else 'start')
+            if is_restart:
+                bot_states[bot_letter] = 'running'
+            print_colored('Sistema', success_message, is_success=True)
+        else:
+            print_colored('Sistema', failure_message, is_error=True)
+            if failure_state:
+                finish_bot(bot_letter, failure_state)
+
+    def schedule_start(bot_letter, delay, is_restart, success_message, failure_message, failure_state=None):
+        if bot_letter in pending_starts:
+            print_colored('Sistema', f"Bot {bot_letter} já possui um início agendado.", is_warning=True)
+            return
+        pending_starts.add(bot_letter)
+        schedule(delay, scheduled_start, bot_letter, is_restart, success_message, failure_message, failure_state)
+
+    def trigger_space_restart():
+        global is_shutdown_requested, space_restart_triggered
+        space_restart_triggered = True  # Marcar que restart foi acionado
+        # O Space reiniciado parte de uma rede nova: a retomada começa a contagem do zero
+        journal_state("bing_unreachable_count", 0)
+        print_colored('Sistema', f"🔄 Limite de {BING_UNREACHABLE_THRESHOLD} detecções de BING.COM UNREACHABLE atingido. Reiniciando Space...", is_error=True)
+
+        # Sinalizar shutdown para evitar reinícios de bots
+        is_shutdown_requested = True
+
+        # Enviar notificação para Discord antes de reiniciar (apenas uma vez)
+        if discord_webhook_log_env:
+            run_in_background(send_discord_log_message, bot_acc_env, f"🔄 Space sendo reiniciado após {BING_UNREACHABLE_THRESHOLD}x BING.COM UNREACHABLE", discord_webhook_log_env)
+
+        # Matar todos os bots antes de reiniciar o Space
+        print_colored('Sistema', "🛑 Encerrando todos os bots antes de reiniciar o Space...", is_warning=True)
+
+        # Matar processos de forma assíncrona para não bloquear.
+        # Só processos vivos (Popen) e o que roda nas pastas dos slots; nunca PIDs antigos
+        live_processes = list(processes.values())
+
+        def kill_bots_before_restart():
+            try:
+                root_pids = [process.pid for process in live_processes if process.poll() is None]
+                root_pids += bot_dir_pids()
+                # Encerrar as árvores de todos os bots (navegadores incluídos) em paralelo
+                terminate_process_trees(root_pids, grace=1.5)
+                print_colored('Sistema', "✅ Bots encerrados antes do restart do Space.", is_success=True)
+            except Exception as e:
+                print_colored('Sistema', f"⚠️ Erro ao encerrar bots: {str(e)}", is_warning=True)
+
+        run_in_background(kill_bots_before_restart)
+
+        # Chamar restart_space se as credenciais estiverem configuradas
+        if hf_token_env and space_repo_id_env:
+            # Aguardar bots serem encerrados antes de reiniciar
+            schedule(2, run_in_background, restart_space, hf_token_env, space_repo_id_env, True)
+        else:
+            print_colored('Sistema', "❌ HF_TOKEN ou SPACE_REPO_ID não configurados. Não foi possível reiniciar o Space.", is_error=True)
+
+    def finish_bot(bot_letter, state):
+        bot_states[bot_letter] = state
+        restart_states[bot_letter].mark_terminal(state)
+        journal_slot_state(bot_letter, state)
+
+    def request_restart(bot_letter, process, error_class, detail, reason=""):
+        """
+        Ponto único de reinício (erro crítico, código de saída, inatividade):
+        consulta a máquina de estados do slot e agenda encerramento + reinício
+        com o backoff da classe de erro.
+        """
+        # Se o Space está sendo reiniciado, não fazer nada (evitar flood)
+        if space_restart_triggered:
+            print_colored('Sistema', f"Space está reiniciando. Bot {bot_letter} não será reiniciado.", is_warning=True)
+            detach_output(process)
+            return
+
+        # Verificar se o bot está na lista de banidos
+        if bot_letter in banned_bots:
+            print_colored('Sistema', f"Bot {bot_letter} está na lista de contas banidas. Não será reiniciado.", is_error=True)
+            detach_output(process)
+            if process.poll() is not None:
+                finish_bot(bot_letter, 'banned')
+            return
+
+        # Verificar se não está em processo de desligamento antes de tentar reiniciar
+        if is_shutdown_requested:
+            print_colored('Sistema', f"Desligamento solicitado. Bot {bot_letter} não será reiniciado.", is_warning=True)
+            return
+
+        decision = restart_states[bot_letter].record_failure(error_class, detail)
+        if decision is None:
+            # Já existe um reinício em andamento para este slot
+            return
+
+        if decision.delay is None:
+            if error_class == 'inactivity':
+                print_colored('Sistema', f"Bot {bot_letter} já reiniciado {decision.limit}x por inatividade - encerrando definitivamente.", is_warning=True)
+                finish_bot(bot_letter, 'inactive_timeout')
+                last_msg = bot_last_message.get(bot_letter, "Nenhuma atividade recente")
+                run_in_background(send_discord_timeout_alert, bot_letter, discord_webhook_url_br, discord_webhook_url_us, last_msg, list(bot_log_rings[bot_letter]))
+                retire_process(bot_letter, process, grace=3)
+                print_colored('Sistema', f"Bot {bot_letter} encerrado definitivamente por timeout de inatividade.", is_warning=True)
+            else:
+                print_colored('Sistema', f"Número máximo de reinicializações ({decision.limit}) atingido para Bot {bot_letter}. Não será reiniciado.", is_error=True)
+                finish_bot(bot_letter, 'failed')  # Marcar como falhou definitivamente
+                run_in_background(send_discord_max_restart_alert, bot_letter, discord_webhook_url_br, discord_webhook_url_us, decision.limit, detail, list(bot_log_rings[bot_letter]))
+            return
+
+        journal_slot_state(bot_letter, 'backoff', f"{decision.error_class}: {detail}")
+        journal_state("restart_counts", {bot: state.counters() for bot, state in restart_states.items()})
+        print_colored('Sistema', f"Tentativa de reinicialização {decision.attempt}/{decision.limit} para Bot {bot_letter}{reason} ({decision.error_class}) em {decision.delay:.0f}s", is_warning=True)
+        if decision.breaker_open:
+            print_colored('Sistema', f"⛔ Circuito '{decision.error_class}' aberto para Bot {bot_letter}: {decision.streak} falhas seguidas.", is_warning=True)
+
+        if process.poll() is None and process.pid not in retired:
+            # Parar de ler a saída e dar um tempo antes de encerrar o processo
+            retired.add(process.pid)
+            detach_output(process)
+            grace_delay = 0 if error_class == 'inactivity' else BOT_RESTART_DELAY_SECONDS
+            schedule(grace_delay, stop_for_restart, bot_letter, process, decision, detail, reason)
+        else:
+            schedule_restart(bot_letter, decision, reason)
+
+    def stop_for_restart(bot_letter, process, decision, detail, reason):
+        if decision.error_class != 'inactivity':
+            # Enviar mensagem para Discord com detalhes do erro
+            error_message = f"Reiniciando Bot {bot_letter} após erro crítico: {clean_error_message(detail)}"
+            run_in_background(send_discord_log_message, bot_acc_env, error_message, discord_webhook_log_env)
+        retire_process(bot_letter, process, grace=3 if decision.error_class == 'inactivity' else 10)
+        schedule_restart(bot_letter, decision, reason)
+
+    def schedule_restart(bot_letter, decision, reason):
+        schedule_start(
+            bot_letter, decision.delay, True,
+            f"Bot {bot_letter} reiniciado com sucesso{reason}.",
+            f"Falha ao reiniciar Bot {bot_letter}{reason}.",
+            failure_state='inactive_timeout' if decision.error_class == 'inactivity' else None,
+        )
+
+    def handle_critical_error(bot_letter, process, critical_error_found):
+        print_colored('Sistema', f"Detectado erro crítico no Bot {bot_letter}: {critical_error_found}", is_error=True)
+        request_restart(bot_letter, process, restart_error_class(critical_error_found), bot_last_critical_error[bot_letter] or critical_error_found)
+
+    # Processa uma linha de saída de um bot
+    def handle_line(bot_letter, process, line):
+        global bing_unreachable_count
+
+        # Atualizar timestamp da última atividade (o deadline é recalculado quando vencer)
+        bot_last_activity[bot_letter] = time.monotonic()
+
+        # Classificar a linha em uma única passada (regex combinado)
+        event = classify_bot_output(line)
+        display_line = line.strip()
+
+        # Limitar o tamanho da mensagem para evitar overflow no Discord
+        cleaned_line = event.text
+        if len(cleaned_line) > 100:
+            cleaned_line = cleaned_line[:97] + "..."
+        bot_last_message[bot_letter] = cleaned_line
+        stamped_line = f"{time.strftime('%H:%M:%S')} {event.text}"
+        bot_log_rings[bot_letter].append(stamped_line)
+        bot_log_spools[bot_letter].write(stamped_line)
+
+        # Registrar PIDs informados na saída
+        if event.pid is not None and event.pid not in bot_pids.setdefault(bot_letter, []):
+            bot_pids[bot_letter].append(event.pid)
+            print_colored('Sistema', f"PID {event.pid} registrado para Bot {bot_letter}", is_success=True)
+
+        # Verificar se a linha contém informações sobre pontos e adicionar emotes se necessário
+        if event.points is not None and event.points > 1:
+            display_line = f"🚨🚨🚨 {line.strip()} 🚨🚨🚨"
+            run_in_background(send_discord_redeem_alert, bot_letter, line.strip(), discord_webhook_url_br, discord_webhook_url_us)
+
+        if event.suspended:
+            bot_states[bot_letter] = 'banned'  # Marcar como banido
+            run_in_background(send_discord_suspension_alert, bot_letter, discord_webhook_url_br, discord_webhook_url_us)
+
+        # Verificar BING.COM UNREACHABLE e reiniciar Space após 5 detecções
+        if event.bing_unreachable:
+            bing_unreachable_count += 1
+            journal_state("bing_unreachable_count", bing_unreachable_count)
+            print_colored('Sistema', f"⚠️ BING.COM UNREACHABLE detectado ({bing_unreachable_count}/{BING_UNREACHABLE_THRESHOLD})", is_warning=True)
+
+            # Só executa restart uma única vez
+            if bing_unreachable_count >= BING_UNREACHABLE_THRESHOLD and not space_restart_triggered:
+                trigger_space_restart()
+
+        # Verificar erros que requerem deleção de cookies
+        if event.cookie_error:
+            print_colored('Sistema', f"Erro de {event.cookie_error} detectado no Bot {bot_letter}. Deletando cookies...", is_warning=True)
+            if delete_bot_cookies(bot_letter):
+                print_colored('Sistema', f"Cookies do Bot {bot_letter} deletados com sucesso.", is_success=True)
+            else:
+                print_colored('Sistema', f"Falha ao deletar cookies do Bot {bot_letter}.", is_error=True)
+
+        # O navegador do bot abriu: libera a admissão do próximo
+        if event.browser_ready:
+            starting = admission_state['starting']
+            if starting and starting[0] == bot_letter:
+                admission_state['starting'] = None
+
+        print_colored(bot_letter, display_line)
+
+        # Verificar se a linha contém algum dos padrões de erro crítico
+        if event.critical_error:
+            bot_last_critical_error[bot_letter] = line.strip()  # Capturar a linha completa do erro
+            handle_critical_error(bot_letter, process, event.critical_error)
+
+    # Lê tudo o que estiver disponível no pipe de um bot, sem bloquear
+    def read_output(bot_letter, pipe):
+        process = processes.get(bot_letter)
+        if process is None or process.stdout is not pipe:
+            # Pipe de um processo já substituído/encerrado
+            try:
+                selector.unregister(pipe)
+            except (KeyError, ValueError):
+                pass
+            return
+        try:
+            chunk = os.read(pipe.fileno(), 65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b""
+
+        if not chunk:
+            # EOF: processa o que restou no buffer e aguarda o código de saída
+            remainder = output_buffers.pop(bot_letter, b"")
+            if remainder.strip():
+                handle_line(bot_letter, process, remainder.decode('utf-8', errors='replace'))
+            if process.pid not in retired:
+                detach_output(process)
+                exiting[bot_letter] = process
+                schedule(0, reap_process, bot_letter, process, 0.05)
+            return
+
+        data = output_buffers.get(bot_letter, b"") + chunk
+        *lines, rest = data.split(b"\n")
+        output_buffers[bot_letter] = rest
+        for raw_line in lines:
+            # Um erro crítico pode ter aposentado o processo no meio do bloco
+            if process.pid in retired:
+                break
+            line = raw_line.decode('utf-8', errors='replace')
+            if line.strip():  # Ignorar linhas vazias
+                handle_line(bot_letter, process, line)
+
+    # Trata o término de um processo cujo pipe já fechou
+    def handle_exit(bot_letter, process, exit_code):
+        with processes_lock:
+            if processes.get(bot_letter) is process:
+                del processes[bot_letter]
+                # Processo colhido: seus PIDs podem ser reaproveitados, não servem mais para encerramento
+                bot_pids[bot_letter] = []
+
+        # Encerrar o que sobrou na sessão do bot (ex.: navegadores órfãos)
+        run_in_background(terminate_process_trees, [process.pid], 5)
+
+        started_at = process_started_at.pop(process.pid, None)
+        if exit_code != 0 and started_at is not None and time.monotonic() - started_at < 5:
+            print_colored('Sistema', f"Bot {bot_letter} encerrou prematuramente com código {exit_code}", is_error=True)
+
+        running_bots = [b for b, p in processes.items() if p.poll() is None and b != bot_letter]
+        if exit_code == 0:
+            print_colored('Sistema', f"Bot {bot_letter} concluído com sucesso.", is_success=True)
+            finish_bot(bot_letter, 'completed')  # Marcar como concluído com sucesso
+
+            # Verificar quais bots ainda estão em execução
+            if running_bots:
+                running_bots_str = ", ".join(running_bots)
+                print_colored('Sistema', f"Bots {running_bots_str} ainda em execução.", is_warning=True)
+            else:
+                print_colored('Sistema', "Todos os bots concluíram a execução.", is_success=True)
+            return
+
+        print_colored('Sistema', f"Bot {bot_letter} encerrou com código {exit_code}.", is_error=True)
+
+        # Verificar quais bots ainda estão em execução
+        if running_bots:
+            running_bots_str = ", ".join(running_bots)
+            print_colored('Sistema', f"Bots {running_bots_str} ainda em execução.", is_warning=True)
+
+        if is_shutdown_requested or space_restart_triggered:
+            return
+
+        # Tentar reiniciar se o bot encerrou com erro
+        request_restart(bot_letter, process, 'crash', f"Código de saída: {exit_code}", f" após código de saída {exit_code}")
+
+    def reap_process(bot_letter, process, delay):
+        """Aguarda o código de saída de um processo cujo pipe fechou, sem bloquear."""
+        if exiting.get(bot_letter) is not process:
+            return
+        exit_code = process.poll()
+        if exit_code is None:
+            # Processo ainda finalizando: tenta de novo com espera crescente
+            schedule(delay, reap_process, bot_letter, process, min(delay * 2, 1.0))
+            return
+        del exiting[bot_letter]
+        handle_exit(bot_letter, process, exit_code)
+
+    # Deadline de inatividade: um único timer por processo, reagendado para
+    # última atividade + INACTIVITY_TIMEOUT sempre que vence antes da hora
+    def check_inactivity(bot_letter, process):
+        if processes.get(bot_letter) is not process or process.pid in retired or process.poll() is not None:
+            return
+        inactive_time = time.monotonic() - bot_last_activity[bot_letter]
+        if inactive_time < INACTIVITY_TIMEOUT:
+            schedule(INACTIVITY_TIMEOUT - inactive_time, check_inactivity, bot_letter, process, essential=False)
+            return
+
+        print_colored('Sistema', f"Bot {bot_letter} inativo por {int(inactive_time/60)} min.", is_warning=True)
+        request_restart(bot_letter, process, 'inactivity', f"Inativo por {int(inactive_time/60)} min", " após timeout de inatividade")
+
+    def active_bots():
+        return [b for b, p in processes.items() if p.poll() is None or b in exiting]
+
+    # Flush periódico do stdout e dos spools (timer recorrente, não mantém o loop vivo)
+    def flush_output():
+        sys.stdout.flush()
+        for spool in bot_log_spools.values():
+            spool.flush()
+        schedule(SUPERVISOR_STDOUT_FLUSH_SECONDS, flush_output, essential=False)
+
+    # Log de status periódico (timer recorrente, não mantém o loop vivo)
+    def report_status():
+        running = active_bots()
+        if running:
+            print_colored('Sistema', f"Status: {len(running)} bot(s) ativo(s): {', '.join(running)}")
+        else:
+            # Mostrar estado detalhado quando não há processos ativos
+            completed = [bot for bot in bots_to_run if bot_states[bot] == 'completed']
+            failed = [bot for bot in bots_to_run if bot_states[bot] == 'failed']
+            banned = [bot for bot in bots_to_run if bot_states[bot] == 'banned']
+            timeout = [bot for bot in bots_to_run if bot_states[bot] == 'inactive_timeout']
+            still_running = [bot for bot in bots_to_run if bot_states[bot] == 'running']
+
+            if completed:
+                print_colored('Sistema', f"Bots concluídos com sucesso: {', '.join(completed)}")
+            if failed:
+                print_colored('Sistema', f"Bots que falharam: {', '.join(failed)}")
+            if banned:
+                print_colored('Sistema', f"Bots banidos: {', '.join(banned)}")
+            if timeout:
+                print_colored('Sistema', f"Bots encerrados por timeout: {', '.join(timeout)}")
+            if still_running:
+                print_colored('Sistema', f"Bots ainda aguardando: {', '.join(still_running)}")
+            else:
+                print_colored('Sistema', "Nenhum bot aguardando execução.")
+        schedule(SUPERVISOR_STATUS_INTERVAL_SECONDS, report_status, essential=False)
+
+    # Colocar todos os bots na fila de admissão (iniciam conforme a folga do host)
+    for bot_letter in bots_to_run:
+        if bot_slot_index(bot_letter) is not None:
+            schedule_start(
+                bot_letter, 0, False,
+                f"Bot {bot_letter} iniciado com sucesso.",
+                f"Falha ao iniciar Bot {bot_letter}.",
+            )
         else:
             print_colored('Sistema', f"Bot {bot_letter} não está configurado.")
-    
-    # Aguardar um pouco para garantir que os processos iniciem
-    time.sleep(10)
-    
-    # Verificar se algum processo já terminou prematuramente
-    for bot_letter, process in list(processes.items()):
-        if process.poll() is not None:
-            print_colored('Sistema', f"Bot {bot_letter} encerrou prematuramente com código {process.returncode}", is_error=True)
-    
-    # Manter o script em execução enquanto houver processos ativos ou bots esperados
+
+    # Lease da conta perdido: outro host assumiu a conta, então este para de rodá-la
+    lease_lost_handled = False
+
+    def stop_bots_for_lost_lease():
+        global is_shutdown_requested
+        is_shutdown_requested = True
+        admission_queue.clear()
+        print_colored('Sistema', "🔒 Lease da conta perdido: outro host assumiu. Encerrando todos os bots...", is_error=True)
+        root_pids = [process.pid for process in processes.values() if process.poll() is None]
+        if root_pids:
+            run_in_background(terminate_process_trees, root_pids, 5)
+
+    # Manter o loop em execução enquanto houver processos ativos ou bots esperados
     try:
         print_colored('Sistema', f"Monitorando {len(bots_to_run)} bot(s): {', '.join(bots_to_run)}")
-        last_status_check = time.time()
-        
-        # Função para verificar timeouts de inatividade
-        def check_inactivity_timeouts():
-            current_time = time.time()
-            bots_to_terminate = []
-            
-            with processes_lock:
-                for bot_letter, process in list(processes.items()):
-                    if process.poll() is None:  # Processo ainda ativo
-                        time_since_last_activity = current_time - bot_last_activity.get(bot_letter, current_time)
-                        
-                        if time_since_last_activity > INACTIVITY_TIMEOUT:
-                            bots_to_terminate.append((bot_letter, process, time_since_last_activity))
-            
-            # Encerrar ou reiniciar bots que excederam o timeout
-            for bot_letter, process, inactive_time in bots_to_terminate:
-                # Verificar se ainda pode tentar reiniciar
-                if timeout_restart_counts[bot_letter] < max_timeout_restarts:
-                    timeout_restart_counts[bot_letter] += 1
-                    print_colored('Sistema', f"Bot {bot_letter} inativo por {int(inactive_time/60)} min - reiniciando ({timeout_restart_counts[bot_letter]}/{max_timeout_restarts})...", is_warning=True)
-                    
-                    # Encerrar o processo atual
-                    try:
-                        process.terminate()
-                        time.sleep(3)
-                        if process.poll() is None:
-                            process.kill()
-                    except Exception as e:
-                        print_colored('Sistema', f"Erro ao encerrar Bot {bot_letter}: {str(e)}", is_error=True)
-                    
-                    # Remover do dicionário de processos
-                    with processes_lock:
-                        if bot_letter in processes:
-                            del processes[bot_letter]
-                    
-                    # Resetar timestamp e reiniciar
-                    bot_last_activity[bot_letter] = time.time()
-                    bot_last_message[bot_letter] = "Bot reiniciado após timeout de inatividade (check ativo)"
-                    
-                    def restart_bot_check_wrapper(bl=bot_letter):
-                        time.sleep(10)
-                        new_process = start_delayed_bot(bl, 0, is_restart=True)
-                        if new_process:
-                            with processes_lock:
-                                processes[bl] = new_process
-                            bot_states[bl] = 'running'
-                            print_colored('Sistema', f"Bot {bl} reiniciado com sucesso (verificação ativa).", is_success=True)
-                        else:
-                            print_colored('Sistema', f"Falha ao reiniciar Bot {bl}.", is_error=True)
-                            bot_states[bl] = 'inactive_timeout'
-                    
-                    restart_thread = threading.Thread(target=restart_bot_check_wrapper)
-                    restart_thread.daemon = False
-                    restart_thread.start()
-                else:
-                    # Já tentou reiniciar, encerra definitivamente
-                    print_colored('Sistema', f"Bot {bot_letter} inativo por {int(inactive_time/60)} min. Já reiniciado {max_timeout_restarts}x - encerrando definitivamente.", is_warning=True)
-                    
-                    # Marcar como encerrado por inatividade
-                    bot_states[bot_letter] = 'inactive_timeout'
-                    
-                    # Enviar notificação para Discord
-                    last_msg = bot_last_message.get(bot_letter, "Nenhuma atividade recente")
-                    threading.Thread(target=send_discord_timeout_alert, args=(bot_letter, discord_webhook_url_br, discord_webhook_url_us, last_msg)).start()
-                    
-                    # Encerrar o processo
-                    try:
-                        process.terminate()
-                        time.sleep(3)
-                        if process.poll() is None:
-                            process.kill()
-                        print_colored('Sistema', f"Bot {bot_letter} encerrado definitivamente por timeout (verificação ativa).", is_warning=True)
-                        
-                        # Remover do dicionário de processos
-                        with processes_lock:
-                            if bot_letter in processes:
-                                del processes[bot_letter]
-                                
-                    except Exception as e:
-                        print_colored('Sistema', f"Erro ao encerrar Bot {bot_letter}: {str(e)}", is_error=True)
-        
+        schedule(SUPERVISOR_STATUS_INTERVAL_SECONDS, report_status, essential=False)
+        schedule(SUPERVISOR_STDOUT_FLUSH_SECONDS, flush_output, essential=False)
+
         while True:
-            # Verificar timeouts de inatividade a cada ciclo
-            check_inactivity_timeouts()
-            
-            # Verificar se ainda há processos ativos
-            with processes_lock:
-                active_processes = {k: v for k, v in processes.items() if v.poll() is None}
-            
-            # Log de status a cada 5 minutos (300 segundos) em vez de 30 segundos
-            current_time = time.time()
-            if current_time - last_status_check >= 300:
-                if active_processes:
-                    active_bots = ", ".join(active_processes.keys())
-                    print_colored('Sistema', f"Status: {len(active_processes)} bot(s) ativo(s): {active_bots}")
-                else:
-                    # Mostrar estado detalhado quando não há processos ativos
-                    completed = [bot for bot in bots_to_run if bot_states[bot] == 'completed']
-                    failed = [bot for bot in bots_to_run if bot_states[bot] == 'failed'] 
-                    banned = [bot for bot in bots_to_run if bot_states[bot] == 'banned']
-                    timeout = [bot for bot in bots_to_run if bot_states[bot] == 'inactive_timeout']
-                    still_running = [bot for bot in bots_to_run if bot_states[bot] == 'running']
-                    
-                    if completed:
-                        print_colored('Sistema', f"Bots concluídos com sucesso: {', '.join(completed)}")
-                    if failed:
-                        print_colored('Sistema', f"Bots que falharam: {', '.join(failed)}")
-                    if banned:
-                        print_colored('Sistema', f"Bots banidos: {', '.join(banned)}")
-                    if timeout:
-                        print_colored('Sistema', f"Bots encerrados por timeout: {', '.join(timeout)}")
-                    if still_running:
-                        print_colored('Sistema', f"Bots ainda aguardando: {', '.join(still_running)}")
-                    else:
-                        print_colored('Sistema', "Nenhum bot aguardando execução.")
-                last_status_check = current_time
-            
-            # Se não há processos ativos, verificar se devemos encerrar
-            if not active_processes:
+            # Dormir até haver saída de algum bot ou até o próximo deadline da heap
+            wait_timeout = timers.next_timeout()
+            if selector.get_map():
+                events = selector.select(wait_timeout)
+            else:
+                events = []
+                if wait_timeout:
+                    time.sleep(wait_timeout)
+            for key, _ in events:
+                read_output(key.data, key.fileobj)
+
+            run_due_timers()
+            if not lease_lost_handled and run_lease_lost():
+                lease_lost_handled = True
+                stop_bots_for_lost_lease()
+            admit_pending_bots()
+
+            # Se não há processos ativos nem trabalho agendado (inícios/reinícios), verificar se devemos encerrar
+            if not admission_queue and not exiting and not timers.has_essential() and not active_bots():
                 # Contar bots por estado
                 completed_bots = [bot for bot in bots_to_run if bot_states[bot] == 'completed']
                 failed_bots = [bot for bot in bots_to_run if bot_states[bot] == 'failed']
                 banned_bots_list = [bot for bot in bots_to_run if bot_states[bot] == 'banned']
                 timeout_bots = [bot for bot in bots_to_run if bot_states[bot] == 'inactive_timeout']
                 still_running = [bot for bot in bots_to_run if bot_states[bot] == 'running']
-                
+
                 # Se todos os bots terminaram (seja com sucesso, falha, banimento ou timeout), encerrar
                 if not still_running:
                     print_colored('Sistema', f"Execução finalizada - Concluídos: {len(completed_bots)}, Falharam: {len(failed_bots)}, Banidos: {len(banned_bots_list)}, Timeout: {len(timeout_bots)}", is_success=True)
-                    break
-                
-                # Se há bots ainda esperados mas que podem ser reiniciados, aguardar um pouco mais
-                can_restart = [bot for bot in still_running if bot not in banned_bots and restart_counts[bot] < max_restarts and bot_states[bot] != 'inactive_timeout']
-                if not can_restart:
+                else:
                     print_colored('Sistema', "Todos os bots terminaram execução, falharam, estão banidos ou foram encerrados por timeout. Encerrando monitoramento.", is_success=True)
-                    break
-            
-            time.sleep(1)
-            
+                break
+
     except KeyboardInterrupt:
         print_colored('Sistema', "Interrupção detectada. Encerrando bots...")
-        for bot_letter, process in processes.items():
-            if process.poll() is None:
-                print_colored('Sistema', f"Encerrando Bot {bot_letter}...")
-                process.terminate()
-                process.wait(timeout=5)
-                if process.poll() is None:
-                    process.kill()
-    
+        running = {bot_letter: process for bot_letter, process in processes.items() if process.poll() is None}
+        if running:
+            print_colored('Sistema', f"Encerrando Bots {', '.join(running)}...")
+            terminate_process_trees([process.pid for process in running.values()], grace=5)
+            for process in running.values():
+                process.poll()
+    finally:
+        for process in list(processes.values()):
+            detach_output(process)
+        selector.close()
+        for spool in bot_log_spools.values():
+            spool.close()
+        sys.stdout.flush()
+        # Aguarda os alertas pendentes serem montados e entregues
+        io_pool.shutdown(wait=True)
+        flush_points_updates()
+        flush_notifications()
+
     print_colored('Sistema', "Execução finalizada!")
 
 def kill_all_bots():
@@ -2039,53 +4255,43 @@ def kill_all_bots():
     Encerra todos os bots e seus processos filhos de forma mais robusta,
     garantindo que não haja processos persistentes ou logs de execuções anteriores.
     """
-    global bot_pids, processes, restart_counts, is_shutdown_requested, banned_bots, last_banned_alerts, bing_unreachable_count, space_restart_triggered
+    global bot_pids, processes, is_shutdown_requested, banned_bots, last_banned_alerts, bing_unreachable_count, space_restart_triggered
     
     # Sinaliza que um desligamento foi solicitado
     is_shutdown_requested = True
     print("🛑 Encerrando todos os bots e processos relacionados...")
     
-    # Para cada bot principal
-    for bot_letter in ['A', 'B', 'C', 'D', 'E']:
-        # Obter os PIDs principais dos bots
-        for pid in bot_pids.get(bot_letter, []):
-            try:
-                # Matar o processo e toda sua família com SIGKILL para garantir encerramento
-                subprocess.run(f"pkill -9 -P {pid}", shell=True)
-                # Garantir que o processo principal também seja encerrado
-                subprocess.run(f"kill -9 {pid} 2>/dev/null", shell=True)
-                print(f"✅ Bot {bot_letter}: Processo {pid} e seus filhos encerrados")
-            except Exception as e:
-                print(f"⚠️ Erro ao encerrar Bot {bot_letter} (PID {pid}): {str(e)}")
+    # Processos vivos dos bots (Popen) + processos que ainda rodam dentro das
+    # pastas dos slots (restos de execuções anteriores deste mesmo supervisor).
+    # PIDs registrados de processos já encerrados não entram: podem ter sido reaproveitados.
+    live = {bot_letter: process for bot_letter, process in processes.items() if process.poll() is None}
+    root_pids = [process.pid for process in live.values()]
+    root_pids += bot_dir_pids()
+
+    # Encerrar todas as árvores em paralelo: SIGTERM, espera e SIGKILL no que restar
+    try:
+        forced = terminate_process_trees(root_pids, grace=5)
+        for bot_letter, process in live.items():
+            print(f"✅ Bot {bot_letter}: Processo {process.pid} e seus filhos encerrados")
+        if forced:
+            print(f"⚠️ {forced} processo(s) precisaram de SIGKILL")
+    except Exception as e:
+        print(f"⚠️ Erro ao encerrar bots: {str(e)}")
     
     # Limpar a lista de PIDs, contadores de reinicialização, bots banidos e alertas de banimento
     bot_pids = {key: [] for key in bot_pids}
     processes = {}  # Limpar o dicionário de processos
-    restart_counts = {
-        'A': 0,
-        'B': 0,
-        'C': 0,
-        'D': 0,
-        'E': 0
-    }  # Resetar os contadores de reinicialização
+    bot_restart_states.clear()  # Resetar os contadores de reinicialização
     banned_bots.clear()  # Limpar a lista de bots banidos
     last_banned_alerts.clear()  # Limpar o histórico de alertas de banimento
     bing_unreachable_count = 0  # Resetar contador de BING.COM UNREACHABLE
     space_restart_triggered = False  # Resetar flag de restart do Space
+    journal_state("banned_bots", [])
+    journal_state("last_banned_alerts", {})
+    journal_state("bing_unreachable_count", 0)
+    journal_state("restart_counts", {})
     print("🔄 Lista de contas banidas, histórico de alertas e contador de BING.COM UNREACHABLE foram limpos. Todos os bots podem ser reiniciados novamente.")
     
-    # Garantir que não haja processos zumbis ou órfãos relacionados aos bots
-    # Usar SIGKILL (-9) para garantir encerramento forçado
-    subprocess.run(f"pkill -9 -f '{BOT_BASE_DIR_NAME}_[A-E]' 2>/dev/null", shell=True)
-    subprocess.run(f"pkill -9 -f 'node.*{BOT_BASE_DIR_NAME}'", shell=True)
-    subprocess.run("pkill -9 -f 'firefox'", shell=True, check=False)
-    subprocess.run("pkill -9 -f 'chromium'", shell=True, check=False)
-    subprocess.run("pkill -9 -f 'chrome'", shell=True, check=False)
-    subprocess.run("pkill -9 -f 'thorium-browser'", shell=True, check=False)
-    
-    # Aguardar um momento para garantir que todos os processos foram encerrados
-    time.sleep(5)
-    
     # Limpar buffers de saída para evitar logs persistentes
     sys.stdout.flush()
     sys.stderr.flush()
@@ -2125,14 +4331,8 @@ def send_discord_log_message(bot_account, message_content, discord_webhook_url_l
     try:
         current_time = time.strftime("%d/%m/%Y %H:%M:%S")
         log_message = f"📝 {bot_account} [{current_time}]: {message_content}"
-        data = {
-            "content": log_message
-        }
-        response = post_discord_with_custom_dns(discord_webhook_url_log, data)
-        if response.status_code == 204:
-            print(f"✅ Mensagem de log enviada para o Discord: {message_content}")
-        else:
-            print(f"❌ Erro ao enviar mensagem de log para o Discord: {response.status_code} - {response.text}")
+        if notify_discord(discord_webhook_url_log, log_message):
+            print(f"📨 Mensagem de log enfileirada para o Discord: {message_content}")
     except Exception as e:
         print(f"❌ Exceção ao enviar mensagem de log para o Discord: {str(e)}")
 
@@ -2157,30 +4357,229 @@ def restart_space(HF_TOKEN, SPACE_REPO_ID, factory_reboot=True):
 
 
 #TODOIST FUNCTIONS
+# As tarefas ativas de cada projeto são lidas uma vez (todas as páginas) e
+# mantidas em um snapshot indexado pelo nome em minúsculas. Criações e
+# conclusões vão em lote pela Sync API; o uuid de cada comando é a chave do
+# outbox, então reenviar um lote já aplicado não duplica nada.
+TODOIST_API_URL = "https://api.todoist.com/api/v1"
+TODOIST_SNAPSHOT_TTL_SECONDS = float(os.getenv("TODOIST_SNAPSHOT_TTL_SECONDS", "60").strip() or 60)  # Validade do snapshot de tarefas
+TODOIST_PAGE_LIMIT = 200           # Máximo de tarefas por página na listagem
+TODOIST_SYNC_MAX_COMMANDS = 100    # Máximo de comandos por chamada da Sync API
+
 HEADERS = {
     "Authorization": f"Bearer {TODOIST_API_TOKEN}",
     "Content-Type": "application/json"
 }
 
+
+class TodoistSnapshot(NamedTuple):
+    fetched_at: float
+    tasks: dict        # nome em minúsculas -> tarefa
+
+
+class TodoistClient:
+    """Snapshot das tarefas ativas por projeto + envio em lote pela Sync API."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshots = {}   # project_id (ou None) -> TodoistSnapshot
+
+    def _get(self, path, params):
+        response = http_session().get(f"{TODOIST_API_URL}/{path}", headers=HEADERS, params=params)
+        if response.status_code in (401, 403):
+            raise OutboxPermanentError(f"Token do Todoist recusado ({response.status_code})")
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, projeto_id):
+        """Lê todas as páginas de tarefas ativas do projeto."""
+        tasks = {}
+        params = {"limit": TODOIST_PAGE_LIMIT}
+        if projeto_id:
+            params["project_id"] = projeto_id
+        while True:
+            page = self._get("tasks", params)
+            for tarefa in page.get("results", []):
+                tasks.setdefault(tarefa["content"].lower(), tarefa)
+            cursor = page.get("next_cursor")
+            if not cursor:
+                return tasks
+            params["cursor"] = cursor
+
+    def snapshot(self, projeto_id=None, refresh=False):
+        with self._lock:
+            snap = self._snapshots.get(projeto_id)
+            if refresh or snap is None or time.time() - snap.fetched_at > TODOIST_SNAPSHOT_TTL_SECONDS:
+                snap = self._snapshots[projeto_id] = TodoistSnapshot(time.time(), self._fetch(projeto_id))
+            return snap.tasks
+
+    def find(self, nome_tarefa, projeto_id=None, refresh=False):
+        return self.snapshot(projeto_id, refresh).get(nome_tarefa.lower())
+
+    def invalidate(self, projeto_id=None):
+        with self._lock:
+            self._snapshots.pop(projeto_id, None)
+
+    def _sync(self, commands):
+        response = http_session().post(f"{TODOIST_API_URL}/sync", headers=HEADERS, json={"commands": commands})
+        if response.status_code in (401, 403):
+            raise OutboxPermanentError(f"Token do Todoist recusado ({response.status_code})")
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            raise OutboxPermanentError(f"HTTP {response.status_code}: {response.text[:200]}")
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.json()
+
+    def apply(self, entries):
+        """
+        Aplica as ações ({'action': 'create' ou 'close', 'name', 'project_id'})
+        em ordem, com no máximo TODOIST_SYNC_MAX_COMMANDS comandos por chamada.
+        Retorna uma lista (entry, status) onde status é "ok", "skip", ou a
+        exceção (OutboxPermanentError para erros definitivos). Um erro
+        transitório encerra a lista: as entradas seguintes ficam de fora.
+        """
+        results = []
+        with self._lock:
+            for i in range(0, len(entries), TODOIST_SYNC_MAX_COMMANDS):
+                results.extend(self._apply_chunk(entries[i:i + TODOIST_SYNC_MAX_COMMANDS]))
+                if results and _todoist_transient(results[-1][1]):
+                    break
+        return results
+
+    def _apply_chunk(self, entries):
+        results = []
+        commands = []
+        sent = []         # (entry, comando) na ordem de envio
+        created = {}      # (project_id, nome) -> temp_id de tarefas criadas neste lote
+        closed = set()
+        for entry in entries:
+            action = entry.payload.get("action")
+            nome_tarefa = entry.payload["name"]
+            projeto_id = entry.payload.get("project_id")
+            projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
+            key = (projeto_id, nome_tarefa.lower())
+            try:
+                tarefa = self.find(nome_tarefa, projeto_id)
+            except OutboxPermanentError as e:
+                results.append((entry, e))
+                continue
+            except Exception as e:
+                results.append((entry, e))
+                return results
+            task_id = created.get(key) if key in created else (tarefa["id"] if tarefa and key not in closed else None)
+            command_uuid = str(uuid.UUID(entry.key)) if len(entry.key) == 32 else entry.key
+
+            if action == "create":
+                if task_id is not None:
+                    print(f"[⚠️ JÁ EXISTE] Tarefa '{nome_tarefa}' já existe e está ativa{projeto_info}.")
+                    results.append((entry, "skip"))
+                    continue
+                args = {"content": nome_tarefa}
+                if projeto_id:
+                    args["project_id"] = projeto_id
+                command = {"type": "item_add", "uuid": command_uuid, "temp_id": uuid.uuid4().hex, "args": args}
+                created[key] = command["temp_id"]
+                closed.discard(key)
+            elif action == "close":
+                if task_id is None:
+                    print(f"[⚠️ NÃO ENCONTRADA] Tarefa '{nome_tarefa}' não encontrada entre ativas{projeto_info}.")
+                    results.append((entry, "skip"))
+                    continue
+                command = {"type": "item_close", "uuid": command_uuid, "args": {"id": task_id}}
+                created.pop(key, None)
+                closed.add(key)
+            else:
+                results.append((entry, OutboxPermanentError(f"Ação desconhecida: {action}")))
+                continue
+            commands.append(command)
+            sent.append((entry, command))
+
+        if not commands:
+            return results
+        try:
+            response = self._sync(commands)
+        except OutboxPermanentError as e:
+            return results + [(entry, e) for entry, _ in sent]
+        except Exception as e:
+            print(f"[⚠️ ERRO] Falha no lote de {len(commands)} comando(s) do Todoist: {e}")
+            return results + [(sent[0][0], e)]
+
+        sync_status = response.get("sync_status", {})
+        temp_ids = response.get("temp_id_mapping", {})
+        for entry, command in sent:
+            nome_tarefa = entry.payload["name"]
+            projeto_id = entry.payload.get("project_id")
+            projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
+            status = sync_status.get(command["uuid"])
+            if status == "ok":
+                self._apply_local(command, entry.payload, temp_ids)
+                if command["type"] == "item_add":
+                    print(f"[✅ CRIADA] Tarefa '{nome_tarefa}' criada com sucesso{projeto_info}.")
+                else:
+                    print(f"[✔️ CONCLUÍDA] Tarefa '{nome_tarefa}' concluída com sucesso{projeto_info}.")
+                results.append((entry, "ok"))
+                continue
+            error = status if isinstance(status, dict) else {}
+            http_code = int(error.get("http_code") or 500)
+            print(f"[⚠️ ERRO] Falha ao {'criar' if command['type'] == 'item_add' else 'concluir'} tarefa '{nome_tarefa}' - {error.get('error') or 'sem status'} ({http_code})")
+            if command["type"] == "item_close" and http_code == 404:  # já foi concluída
+                self.invalidate(projeto_id)
+                results.append((entry, "skip"))
+            elif 400 <= http_code < 500 and http_code != 429:
+                results.append((entry, OutboxPermanentError(f"{error.get('error_code')}: {error.get('error')}")))
+            else:
+                # Os comandos seguintes podem depender deste; o snapshot é relido na próxima vez
+                self.invalidate(projeto_id)
+                results.append((entry, RuntimeError(f"HTTP {http_code}")))
+                return results
+        return results
+
+    def _apply_local(self, command, payload, temp_ids):
+        """Atualiza o snapshot com o resultado de um comando aplicado."""
+        snap = self._snapshots.get(payload.get("project_id"))
+        if snap is None:
+            return
+        key = payload["name"].lower()
+        if command["type"] == "item_add":
+            task_id = temp_ids.get(command["temp_id"], command["temp_id"])
+            snap.tasks[key] = {"id": task_id, "content": payload["name"], "project_id": payload.get("project_id")}
+        else:
+            snap.tasks.pop(key, None)
+
+
+def _todoist_transient(status):
+    return isinstance(status, Exception) and not isinstance(status, OutboxPermanentError)
+
+
+todoist_client = TodoistClient()
+
+
+def _pending_todoist_action(nome_tarefa, projeto_id=None):
+    """Última ação ainda não entregue (no outbox) para a tarefa: 'create', 'close' ou None."""
+    action = None
+    for entry in outbox().due("todoist"):
+        if entry.payload.get("project_id") == projeto_id and entry.payload["name"].lower() == nome_tarefa.lower():
+            action = entry.payload.get("action")
+    return action
+
 def verificar_tarefa_concluida(nome_tarefa, projeto_id=None):
     if not TODOIST_API_TOKEN:
         # Token não definido, apenas retorna como se não tivesse tarefa
         return False
     try:
-        # Se projeto_id foi especificado, filtra por projeto
-        if projeto_id:
-            response = requests.get(f"https://api.todoist.com/api/v1/tasks?project_id={projeto_id}", headers=HEADERS)
-        else:
-            response = requests.get("https://api.todoist.com/api/v1/tasks", headers=HEADERS)
-            
-        tarefas = response.json().get('results', [])
-        for tarefa in tarefas:
-            if tarefa["content"].lower() == nome_tarefa.lower():
-                projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
-                print(f"[❌ A FAZER] Tarefa ainda ativa{projeto_info}: {tarefa['content']}")
-                return False
-        
         projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
+        # Criações/conclusões ainda no outbox valem mais que o snapshot
+        pending = _pending_todoist_action(nome_tarefa, projeto_id)
+        if pending == "close":
+            print(f"[✅ CONCLUÍDA OU INEXISTENTE] '{nome_tarefa}' tem conclusão pendente de envio{projeto_info}.")
+            return True
+        tarefa = todoist_client.find(nome_tarefa, projeto_id)
+        if pending == "create" and not tarefa:
+            print(f"[❌ A FAZER] Tarefa com criação pendente de envio{projeto_info}: {nome_tarefa}")
+            return False
+        if tarefa:
+            print(f"[❌ A FAZER] Tarefa ainda ativa{projeto_info}: {tarefa['content']}")
+            return False
         print(f"[✅ CONCLUÍDA OU INEXISTENTE] '{nome_tarefa}' não está entre tarefas ativas{projeto_info}.")
         return True
     except Exception:
@@ -2188,67 +4587,17 @@ def verificar_tarefa_concluida(nome_tarefa, projeto_id=None):
         return False
 
 def concluir_tarefa(nome_tarefa, projeto_id=None):
+    """Agenda a conclusão da tarefa (entregue pelo outbox, sem esperar a rede)."""
     if not TODOIST_API_TOKEN:
         # Token não definido, retorna silenciosamente
         return False
-    try:
-        # Se projeto_id foi especificado, filtra por projeto
-        if projeto_id:
-            response = requests.get(f"https://api.todoist.com/api/v1/tasks?project_id={projeto_id}", headers=HEADERS)
-        else:
-            response = requests.get("https://api.todoist.com/api/v1/tasks", headers=HEADERS)
-            
-        tarefas = response.json().get('results', [])
-        for tarefa in tarefas:
-            if tarefa["content"].lower() == nome_tarefa.lower():
-                tarefa_id = tarefa["id"]
-                r = requests.post(f"https://api.todoist.com/api/v1/tasks/{tarefa_id}/close", headers=HEADERS)
-                if r.status_code == 204:
-                    projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
-                    print(f"[✔️ CONCLUÍDA] Tarefa '{nome_tarefa}' concluída com sucesso{projeto_info}.")
-                    return True
-                else:
-                    print(f"[⚠️ ERRO] Falha ao concluir tarefa '{nome_tarefa}' - Status: {r.status_code}")
-                    return False
-        
-        projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
-        print(f"[⚠️ NÃO ENCONTRADA] Tarefa '{nome_tarefa}' não encontrada entre ativas{projeto_info}.")
-        return False
-    except Exception:
-        # Falha silenciosa se não conseguir acessar a API
-        return False
+    record_side_effect("todoist", {"action": "close", "name": nome_tarefa, "project_id": projeto_id})
+    return True
 
 def criar_tarefa(nome_tarefa, projeto_id=None):
+    """Agenda a criação da tarefa (entregue pelo outbox, sem esperar a rede)."""
     if not TODOIST_API_TOKEN:
         # Token não definido, retorna silenciosamente
         return False
-    try:
-        # Se projeto_id foi especificado, filtra por projeto para verificar se já existe
-        if projeto_id:
-            response = requests.get(f"https://api.todoist.com/api/v1/tasks?project_id={projeto_id}", headers=HEADERS)
-        else:
-            response = requests.get("https://api.todoist.com/api/v1/tasks", headers=HEADERS)
-            
-        tarefas = response.json().get('results', [])
-        for tarefa in tarefas:
-            if tarefa["content"].lower() == nome_tarefa.lower():
-                projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
-                print(f"[⚠️ JÁ EXISTE] Tarefa '{nome_tarefa}' já existe e está ativa{projeto_info}.")
-                return False
-                
-        url = "https://api.todoist.com/api/v1/tasks"
-        payload = {"content": nome_tarefa}
-        if projeto_id:
-            payload["project_id"] = projeto_id
-        response = requests.post(url, headers=HEADERS, json=payload)
-        if response.status_code in (200, 204):
-            projeto_info = f" no projeto {projeto_id}" if projeto_id else ""
-            print(f"[✅ CRIADA] Tarefa '{nome_tarefa}' criada com sucesso{projeto_info}.")
-            return True
-        else:
-            print(f"[⚠️ ERRO] Falha ao criar tarefa '{nome_tarefa}' - Status: {response.status_code}")
-            print(response.text)
-            return False
-    except Exception:
-        # Falha silenciosa se não conseguir acessar a API
-        return False
+    record_side_effect("todoist", {"action": "create", "name": nome_tarefa, "project_id": projeto_id})
+    return True